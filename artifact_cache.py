@@ -0,0 +1,196 @@
+from collections import OrderedDict
+from dotenv import load_dotenv, find_dotenv
+import threading
+import hashlib
+import shutil
+import os
+
+load_dotenv(find_dotenv())
+
+ARTIFACT_CACHE_FOLDER_NAME = os.getenv("ARTIFACT_CACHE_FOLDER_NAME", "artifact_cache")
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", 10 * 1024 ** 3))
+
+class ArtifactCache:
+    """
+    Persistent on-disk LRU cache for artifacts fetched from remote storage
+    ### Note:
+    - Keys are "<folder_name>/<file_name>" (artifact names are uuid based and never rewritten),
+    stored on disk under the sha256 of the key so any key maps to a safe file name
+    - Writes are atomic: files are fetched into a "<cache file>.<pid>.<thread id>.part" file and renamed into place
+    - The cache folder is shared by the API and the training workers: a file cached by one process is a hit
+    in every other, only ".part" files of processes that are gone are removed, and max_bytes caps the
+    folder as a whole (eviction rescans it, so the LRU order is the files' mtime)
+    - Concurrent requests for the same key share a single in-flight fetch
+    - Cached files are handed out as hard links (copies across devices), so consumers
+    must never rewrite a materialized file in place
+    - A max_bytes of 0 disables the cache
+    """
+    def __init__(self, cache_folder_name=ARTIFACT_CACHE_FOLDER_NAME, max_bytes=ARTIFACT_CACHE_MAX_BYTES) -> None:
+        self.cache_folder_name = cache_folder_name
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(self.cache_folder_name, exist_ok=True)
+            self.load_index()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def load_index(self):
+        """Removes ".part" files left by processes that are gone and rebuilds the LRU order from disk"""
+        for cache_file_name in os.listdir(self.cache_folder_name):
+            if cache_file_name.endswith(".part") and not is_part_file_owner_alive(cache_file_name):
+                remove_file(os.path.join(self.cache_folder_name, cache_file_name))
+        self.evict()
+
+    def scan_cache_folder(self):
+        """Returns: ([(mtime, cache_file_name, size)] of the cached files, oldest access first), bytes of in-flight ".part" files)"""
+        cached_files = []
+        part_files_bytes = 0
+        for cache_file_name in os.listdir(self.cache_folder_name):
+            try:
+                file_stat = os.stat(os.path.join(self.cache_folder_name, cache_file_name))
+            except FileNotFoundError:
+                # Renamed or evicted by another process meanwhile
+                continue
+            if cache_file_name.endswith(".part"):
+                part_files_bytes += file_stat.st_size
+            else:
+                cached_files.append((file_stat.st_mtime, cache_file_name, file_stat.st_size))
+        return sorted(cached_files), part_files_bytes
+
+    def get_cache_file_name(self, key):
+        return hashlib.sha256(key.encode("utf-8")).hexdigest() + os.path.splitext(key)[1]
+
+    def get(self, key):
+        """Returns the cached file path for key or None on a miss"""
+        if not self.enabled:
+            return None
+        cache_file_name = self.get_cache_file_name(key)
+        cache_file_path = os.path.join(self.cache_folder_name, cache_file_name)
+        with self.lock:
+            if not os.path.exists(cache_file_path):
+                # Never cached, or evicted by another process sharing the cache folder
+                if cache_file_name in self.entries:
+                    self.total_bytes -= self.entries.pop(cache_file_name)
+                return None
+            if cache_file_name not in self.entries:
+                # Cached by another process sharing the cache folder
+                self.entries[cache_file_name] = os.path.getsize(cache_file_path)
+                self.total_bytes += self.entries[cache_file_name]
+            self.entries.move_to_end(cache_file_name)
+        # mtime keeps the LRU order across restarts
+        os.utime(cache_file_path)
+        return cache_file_path
+
+    def put(self, key, source_file_path):
+        """Adds a local file to the cache (e.g. an artifact that was just uploaded)"""
+        if not self.enabled:
+            return None
+        return self.get_or_fetch(key, lambda part_file_path: self.materialize(source_file_path, part_file_path))
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Returns the cached file path for key, calling fetch(part_file_path) on a miss.
+        fetch must write the artifact to part_file_path and return a truthy value on success.
+        Returns None if the fetch failed.
+        """
+        cache_file_path = self.get(key)
+        if cache_file_path is not None:
+            return cache_file_path
+
+        cache_file_name = self.get_cache_file_name(key)
+        cache_file_path = os.path.join(self.cache_folder_name, cache_file_name)
+        with self.lock:
+            in_flight_event = self.in_flight.get(cache_file_name)
+            is_fetch_owner = in_flight_event is None
+            if is_fetch_owner:
+                in_flight_event = threading.Event()
+                self.in_flight[cache_file_name] = in_flight_event
+
+        if not is_fetch_owner:
+            in_flight_event.wait()
+            return self.get(key)
+
+        part_file_path = "{}.{}.{}.part".format(cache_file_path, os.getpid(), threading.get_ident())
+        try:
+            if not fetch(part_file_path):
+                return None
+            os.replace(part_file_path, cache_file_path)
+            size = os.path.getsize(cache_file_path)
+            with self.lock:
+                if cache_file_name in self.entries:
+                    self.total_bytes -= self.entries.pop(cache_file_name)
+                self.entries[cache_file_name] = size
+                self.total_bytes += size
+            self.evict()
+            return cache_file_path
+        finally:
+            if os.path.exists(part_file_path):
+                os.remove(part_file_path)
+            with self.lock:
+                self.in_flight.pop(cache_file_name, None)
+            in_flight_event.set()
+
+    def invalidate(self, key):
+        if not self.enabled:
+            return
+        cache_file_name = self.get_cache_file_name(key)
+        cache_file_path = os.path.join(self.cache_folder_name, cache_file_name)
+        with self.lock:
+            if cache_file_name in self.entries:
+                self.total_bytes -= self.entries.pop(cache_file_name)
+            if os.path.exists(cache_file_path):
+                os.remove(cache_file_path)
+
+    def evict(self):
+        """Removes the least recently used files until the cache folder (with in-flight ".part" files) fits max_bytes"""
+        with self.lock:
+            cached_files, part_files_bytes = self.scan_cache_folder()
+            folder_bytes = part_files_bytes + sum(size for _, _, size in cached_files)
+            self.entries.clear()
+            self.total_bytes = 0
+            for _, cache_file_name, size in cached_files:
+                if folder_bytes > self.max_bytes:
+                    remove_file(os.path.join(self.cache_folder_name, cache_file_name))
+                    folder_bytes -= size
+                    continue
+                self.entries[cache_file_name] = size
+                self.total_bytes += size
+
+    def materialize(self, cache_file_path, destination_file_path):
+        """Places a cached file at destination_file_path without another download"""
+        if os.path.exists(destination_file_path):
+            os.remove(destination_file_path)
+        try:
+            os.link(cache_file_path, destination_file_path)
+        except OSError:
+            shutil.copyfile(cache_file_path, destination_file_path)
+        return destination_file_path
+
+def is_part_file_owner_alive(part_file_name):
+    """Whether the process that named a "<cache file>.<pid>.<thread id>.part" file is still running"""
+    name_parts = part_file_name.split(".")
+    if len(name_parts) < 4 or not name_parts[-3].isdigit():
+        return False
+    try:
+        os.kill(int(name_parts[-3]), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running under another user
+        return True
+    return True
+
+def remove_file(file_path):
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        # Already removed by another process sharing the cache folder
+        pass
+
+artifact_cache = ArtifactCache()
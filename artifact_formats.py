@@ -0,0 +1,205 @@
+from dotenv import load_dotenv, find_dotenv
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from pandas.tseries.api import guess_datetime_format
+import pandas as pd
+import os
+
+load_dotenv(find_dotenv())
+
+# Format uploaded data artifacts are converted to, and synthetic data artifacts are generated in: "parquet" | "csv"
+DATA_ARTIFACT_FORMAT = os.getenv("DATA_ARTIFACT_FORMAT", "parquet")
+SYNTHETIC_DATA_ARTIFACT_FORMAT = os.getenv("SYNTHETIC_DATA_ARTIFACT_FORMAT", "parquet")
+# Rows per record batch when a parquet artifact is read or re-encoded batch by batch
+ARTIFACT_FORMAT_BATCH_SIZE = int(os.getenv("ARTIFACT_FORMAT_BATCH_SIZE", 50000))
+# Bytes of csv parsed per block when a csv artifact is converted to parquet (column types are inferred on the first block)
+ARTIFACT_CSV_BLOCK_SIZE = int(os.getenv("ARTIFACT_CSV_BLOCK_SIZE", 16 * 1024 * 1024))
+
+ARTIFACT_FILE_EXTENSIONS = {
+    "csv": ".csv",
+    "parquet": ".parquet"
+}
+
+ARTIFACT_MEDIA_TYPES = {
+    ".csv": "text/csv",
+    ".parquet": "application/vnd.apache.parquet"
+}
+
+def is_parquet_file(file_path):
+    return file_path.endswith(ARTIFACT_FILE_EXTENSIONS["parquet"])
+
+def read_artifact(file_path, columns=None):
+    """
+    Reads a data / synthetic data artifact into a DataFrame
+    ### Note:
+    - columns: only these columns are read (None reads all)
+    - Parquet artifacts are memory mapped and only the projected column chunks are decoded
+    """
+    if is_parquet_file(file_path):
+        return pd.read_parquet(file_path, columns=columns, memory_map=True)
+    return pd.read_csv(file_path, usecols=columns)
+
+def read_typed_artifact(file_path, columns=None, categorical_columns=None, datetime_columns=None, downcast_integers=True):
+    """
+    Reads an artifact (see read_artifact) into compact dtypes for training
+    ### Note:
+    - categorical_columns are read as "category" (Parquet columns straight from their dictionary encoding)
+    - datetime_columns are parsed to datetime64, see parse_datetime_column
+    - Integer columns are downcast to the smallest integer dtype holding their values; floats stay float64
+    since float32 values no longer round to the decimals of the source data
+    """
+    columns_to_read = set(columns) if columns is not None else None
+    categorical_columns = [column for column in (categorical_columns or []) if columns_to_read is None or column in columns_to_read]
+    datetime_columns = [column for column in (datetime_columns or []) if columns_to_read is None or column in columns_to_read]
+    if is_parquet_file(file_path):
+        data_df = pd.read_parquet(file_path, columns=columns, memory_map=True, read_dictionary=categorical_columns or None)
+    else:
+        data_df = pd.read_csv(file_path, usecols=columns, dtype={column: "category" for column in categorical_columns})
+
+    for column in categorical_columns:
+        if column in data_df.columns and not isinstance(data_df[column].dtype, pd.CategoricalDtype):
+            data_df[column] = data_df[column].astype("category")
+    for column in datetime_columns:
+        if column in data_df.columns and not pd.api.types.is_datetime64_any_dtype(data_df[column]):
+            data_df[column] = parse_datetime_column(data_df[column])
+    if downcast_integers:
+        for column in data_df.select_dtypes(include="integer").columns:
+            data_df[column] = pd.to_numeric(data_df[column], downcast="integer")
+    return data_df
+
+def parse_datetime_column(values):
+    """
+    Parses a column of date / time values to datetime64
+    ### Note:
+    - The format guessed from the first value parses the whole column in one vectorized pass
+    - Values that format misses (a column mixing formats) are parsed again value by value with format="mixed"
+    - Raises ValueError if values are still not dates, instead of silently turning them into NaT
+    """
+    present_values = values.notna()
+    if not present_values.any():
+        return pd.to_datetime(values, errors="coerce")
+    datetime_format = guess_datetime_format(str(values[present_values].iloc[0]))
+    parsed_values = pd.to_datetime(values, format=datetime_format or "mixed", errors="coerce")
+    if datetime_format is not None and (parsed_values.isna() & present_values).any():
+        parsed_values = pd.to_datetime(values, format="mixed", errors="coerce")
+    unparsed_values = values[parsed_values.isna() & present_values]
+    if len(unparsed_values) > 0:
+        raise ValueError("Column {} Has {} Values That Are Not Dates, e.g.: {}".format(values.name, len(unparsed_values), ", ".join(map(str, unparsed_values.head(3)))))
+    return parsed_values
+
+def iter_artifact_batches(file_path, batch_size=ARTIFACT_FORMAT_BATCH_SIZE):
+    """Yields an artifact as DataFrames of at most batch_size rows"""
+    if is_parquet_file(file_path):
+        parquet_file = pq.ParquetFile(file_path, memory_map=True)
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+            yield record_batch.to_pandas()
+    else:
+        yield from pd.read_csv(file_path, chunksize=batch_size)
+
+def get_artifact_num_rows(file_path):
+    """Row count of an artifact, read from the parquet footer without decoding any data"""
+    if is_parquet_file(file_path):
+        return pq.ParquetFile(file_path).metadata.num_rows
+    return sum(len(data_batch_df) for data_batch_df in iter_artifact_batches(file_path))
+
+def write_artifact_batches(data_batches, file_path):
+    """
+    Writes DataFrame batches into a csv or parquet artifact (by the extension of file_path)
+    Returns: Number of rows written
+    ### Note:
+    - Parquet batches become row groups, so peak memory depends on the batch size and not on the artifact size
+    - The parquet schema starts as the one of the first batch and is promoted when a later batch needs wider
+    types (a column all null in the first batch, int64 -> double, ...), see promote_parquet_file
+    """
+    num_rows = 0
+    parquet_writer = None
+    try:
+        for data_batch_df in data_batches:
+            if is_parquet_file(file_path):
+                record_table = pa.Table.from_pandas(data_batch_df, preserve_index=False)
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(file_path, record_table.schema)
+                elif not record_table.schema.equals(parquet_writer.schema):
+                    artifact_schema = pa.unify_schemas([parquet_writer.schema, record_table.schema], promote_options="permissive")
+                    if not artifact_schema.equals(parquet_writer.schema):
+                        parquet_writer.close()
+                        parquet_writer = None
+                        parquet_writer = promote_parquet_file(file_path, artifact_schema)
+                    record_table = record_table.select(artifact_schema.names).cast(artifact_schema)
+                parquet_writer.write_table(record_table)
+            else:
+                data_batch_df.to_csv(file_path, mode = 'w' if num_rows == 0 else 'a', header = num_rows == 0, index = False, encoding = 'utf-8')
+            num_rows += len(data_batch_df)
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+    return num_rows
+
+def promote_parquet_file(file_path, schema):
+    """
+    Rewrites the row groups written so far to file_path with a promoted schema
+    Returns: Open pq.ParquetWriter on file_path to append further row groups to
+    ### Note:
+    - The rewrite goes one row group at a time, so memory stays bounded by the batch size
+    - Only happens when a batch widens a column type, at most once per column for null -> typed columns
+    """
+    unpromoted_file_path = file_path + ".unpromoted"
+    os.replace(file_path, unpromoted_file_path)
+    parquet_writer = pq.ParquetWriter(file_path, schema)
+    try:
+        parquet_file = pq.ParquetFile(unpromoted_file_path)
+        for row_group_index in range(parquet_file.num_row_groups):
+            parquet_writer.write_table(parquet_file.read_row_group(row_group_index).select(schema.names).cast(schema))
+    except Exception:
+        parquet_writer.close()
+        raise
+    finally:
+        os.remove(unpromoted_file_path)
+    return parquet_writer
+
+def get_csv_column_type(inferred_type):
+    """
+    Arrow type a csv column is converted with, from the type inferred on the first block
+    ### Note:
+    - Columns empty in the first block (null) are read as strings so later values still convert
+    - Dates / times stay strings like pd.read_csv keeps them, and are parsed where they are used (see read_typed_artifact)
+    """
+    if pa.types.is_null(inferred_type) or pa.types.is_temporal(inferred_type):
+        return pa.string()
+    return inferred_type
+
+def convert_csv_to_parquet(csv_file_path, block_size=ARTIFACT_CSV_BLOCK_SIZE):
+    """
+    Converts a csv artifact to a parquet file next to it, streaming it block by block
+    Returns: (parquet file path, number of rows)
+    ### Note:
+    - Memory stays bounded by block_size whatever the csv size
+    - Column types are inferred on the first block (see get_csv_column_type), a later value that does not convert
+    (e.g. a float in an int column) raises and no parquet file is left behind, so the caller can keep the csv
+    """
+    parquet_file_path = os.path.splitext(csv_file_path)[0] + ARTIFACT_FILE_EXTENSIONS["parquet"]
+    read_options = pa_csv.ReadOptions(block_size=block_size)
+    with pa_csv.open_csv(csv_file_path, read_options=read_options, convert_options=pa_csv.ConvertOptions(strings_can_be_null=True)) as csv_reader:
+        column_types = {field.name: get_csv_column_type(field.type) for field in csv_reader.schema}
+    convert_options = pa_csv.ConvertOptions(column_types=column_types, strings_can_be_null=True)
+
+    num_rows = 0
+    try:
+        with pa_csv.open_csv(csv_file_path, read_options=read_options, convert_options=convert_options) as csv_reader:
+            with pq.ParquetWriter(parquet_file_path, csv_reader.schema) as parquet_writer:
+                for record_batch in csv_reader:
+                    parquet_writer.write_batch(record_batch, row_group_size=ARTIFACT_FORMAT_BATCH_SIZE)
+                    num_rows += record_batch.num_rows
+    except Exception:
+        if os.path.exists(parquet_file_path):
+            os.remove(parquet_file_path)
+        raise
+    return parquet_file_path, num_rows
+
+def stream_parquet_as_csv(parquet_file_path, batch_size=ARTIFACT_FORMAT_BATCH_SIZE):
+    """Yields a parquet artifact as csv text, one record batch at a time"""
+    is_first_batch = True
+    for data_batch_df in iter_artifact_batches(parquet_file_path, batch_size):
+        yield data_batch_df.to_csv(index=False, header=is_first_batch)
+        is_first_batch = False
@@ -0,0 +1,150 @@
+from google_drive_api import GoogleDriveAPI
+from dotenv import load_dotenv, find_dotenv
+from abc import ABC, abstractmethod
+import threading
+import shutil
+import os
+
+load_dotenv(find_dotenv())
+
+CLIENT_BUFFER_FOLDER_NAME = os.getenv("CLIENT_BUFFER_FOLDER_NAME")
+# "google_drive" | "local"
+ARTIFACT_STORAGE_BACKEND = os.getenv("ARTIFACT_STORAGE_BACKEND", "google_drive")
+LOCAL_ARTIFACT_STORAGE_FOLDER_NAME = os.getenv("LOCAL_ARTIFACT_STORAGE_FOLDER_NAME", "artifact_storage")
+ARTIFACT_STORAGE_STREAM_CHUNK_SIZE = int(os.getenv("ARTIFACT_STORAGE_STREAM_CHUNK_SIZE", 1024 * 1024))
+
+class ArtifactStorage(ABC):
+    """
+    Storage interface for every artifact the service keeps
+    ### Note:
+    - Artifacts live in named folders: "data_artifacts", "models", "model_encoding_mappings", "synthetic_data_artifacts"
+    - get() places the artifact in the Client Buffer, callers own (and remove) the returned file
+    - put() and get() return False on failure, like GoogleDriveAPI
+    - A backend missing any of the methods below fails when it is instantiated
+    """
+    @abstractmethod
+    def put(self, folder_name, file_path, overwrite=False):
+        """Stores a local file under its base name (overwrite replaces an artifact of the same name). Returns: ID of the stored artifact or False"""
+
+    @abstractmethod
+    def get(self, folder_name, file_name):
+        """Returns: Path of the artifact in the Client Buffer or False"""
+
+    @abstractmethod
+    def stream(self, folder_name, file_name, chunk_size=ARTIFACT_STORAGE_STREAM_CHUNK_SIZE):
+        """Yields the bytes of an artifact without staging it in the Client Buffer"""
+
+    @abstractmethod
+    def delete(self, folder_name, file_name, permanent=False):
+        """Returns: True if the artifact was deleted (permanent skips any trash the backend keeps)"""
+
+    @abstractmethod
+    def exists(self, folder_name, file_name):
+        """Returns: True if folder_name holds an artifact named file_name"""
+
+    @abstractmethod
+    def ensure_folder(self, folder_name):
+        """Creates folder_name if it does not exist yet. Returns: True if the folder exists"""
+
+class GoogleDriveStorage(ArtifactStorage):
+    def __init__(self) -> None:
+        self.google_drive_api = GoogleDriveAPI()
+
+    def put(self, folder_name, file_path, overwrite=False):
+        return self.google_drive_api.upload_file(folder_name, file_path, overwrite=overwrite)
+
+    def get(self, folder_name, file_name):
+        return self.google_drive_api.download_file(folder_name, file_name)
+
+    def stream(self, folder_name, file_name, chunk_size=ARTIFACT_STORAGE_STREAM_CHUNK_SIZE):
+        return self.google_drive_api.stream_file(folder_name, file_name, chunk_size)
+
+    def delete(self, folder_name, file_name, permanent=False):
+        return self.google_drive_api.delete_file(folder_name, file_name, permanent)
+
+    def exists(self, folder_name, file_name):
+        return self.google_drive_api.get_file_id(folder_name, file_name) is not None
+
+    def ensure_folder(self, folder_name):
+        return self.google_drive_api.create_folder(folder_name) is not None
+
+class LocalFileSystemStorage(ArtifactStorage):
+    """
+    Stores artifacts under <root_folder_name>/<folder_name>/<file_name>
+    ### Note:
+    - Writes go to a ".part" file that is renamed into place, so readers never see partial artifacts
+    (an artifact of the same name is always replaced, and deletes are always permanent)
+    - get() hard links into the Client Buffer (copies across devices)
+    """
+    def __init__(self, root_folder_name=LOCAL_ARTIFACT_STORAGE_FOLDER_NAME) -> None:
+        self.root_folder_name = root_folder_name
+        os.makedirs(self.root_folder_name, exist_ok=True)
+        os.makedirs(CLIENT_BUFFER_FOLDER_NAME, exist_ok=True)
+
+    def get_artifact_path(self, folder_name, file_name):
+        return os.path.join(self.root_folder_name, folder_name, os.path.basename(file_name))
+
+    def put(self, folder_name, file_path, overwrite=False):
+        try:
+            artifact_path = self.get_artifact_path(folder_name, file_path)
+            os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+            part_file_path = "{}.{}.{}.part".format(artifact_path, os.getpid(), threading.get_ident())
+            shutil.copyfile(file_path, part_file_path)
+            os.replace(part_file_path, artifact_path)
+            print(f"[LocalFileSystemStorage][SUCCESS] File '{file_path}' stored successfully at {artifact_path}")
+            return os.path.join(folder_name, os.path.basename(file_path))
+        except Exception as e:
+            print("[LocalFileSystemStorage][ERROR] Error Storing File: " + str(e))
+            return False
+
+    def get(self, folder_name, file_name):
+        try:
+            artifact_path = self.get_artifact_path(folder_name, file_name)
+            if not os.path.exists(artifact_path):
+                print(f"[LocalFileSystemStorage][ERROR] File '{file_name}' not found in folder '{folder_name}'.")
+                return False
+            local_file_path = os.path.join(CLIENT_BUFFER_FOLDER_NAME, file_name)
+            if os.path.exists(local_file_path):
+                os.remove(local_file_path)
+            try:
+                os.link(artifact_path, local_file_path)
+            except OSError:
+                shutil.copyfile(artifact_path, local_file_path)
+            return local_file_path
+        except Exception as e:
+            print("[LocalFileSystemStorage][ERROR] Error Getting File: " + str(e))
+            return False
+
+    def stream(self, folder_name, file_name, chunk_size=ARTIFACT_STORAGE_STREAM_CHUNK_SIZE):
+        with open(self.get_artifact_path(folder_name, file_name), 'rb') as artifact_file:
+            while True:
+                chunk = artifact_file.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def delete(self, folder_name, file_name, permanent=False):
+        artifact_path = self.get_artifact_path(folder_name, file_name)
+        if not os.path.exists(artifact_path):
+            print(f"[LocalFileSystemStorage][ERROR] File '{file_name}' not found in folder '{folder_name}'.")
+            return False
+        os.remove(artifact_path)
+        return True
+
+    def exists(self, folder_name, file_name):
+        return os.path.exists(self.get_artifact_path(folder_name, file_name))
+
+    def ensure_folder(self, folder_name):
+        os.makedirs(os.path.join(self.root_folder_name, folder_name), exist_ok=True)
+        return True
+
+ARTIFACT_STORAGE_BACKENDS = {
+    "google_drive": GoogleDriveStorage,
+    "local": LocalFileSystemStorage
+}
+
+def get_artifact_storage(backend=ARTIFACT_STORAGE_BACKEND):
+    """Returns the configured storage backend (ARTIFACT_STORAGE_BACKEND)"""
+    if backend not in ARTIFACT_STORAGE_BACKENDS:
+        raise ValueError("Unknown Artifact Storage Backend: " + backend)
+    return ARTIFACT_STORAGE_BACKENDS[backend]()
@@ -0,0 +1,238 @@
+from sdv.metadata import SingleTableMetadata
+from pandas.tseries.api import guess_datetime_format
+from artifact_formats import is_parquet_file
+from dotenv import load_dotenv, find_dotenv
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pandas as pd
+import numpy as np
+import json
+import io
+import os
+
+load_dotenv(find_dotenv())
+
+# Distinct values per column parsed while scoring how date-like a column is
+DATETIME_DETECTION_SAMPLE_SIZE = int(os.getenv("DATETIME_DETECTION_SAMPLE_SIZE", 1000))
+# Rows profiled per data artifact, larger artifacts are profiled on a uniform random sample (0 profiles every row)
+COLUMN_PROFILE_SAMPLE_SIZE = int(os.getenv("COLUMN_PROFILE_SAMPLE_SIZE", 100000))
+COLUMN_PROFILE_CHUNK_SIZE = int(os.getenv("COLUMN_PROFILE_CHUNK_SIZE", 100000))
+# Bumped whenever the profile layout changes, older cached profiles are recomputed
+COLUMN_PROFILE_VERSION = 2
+
+def read_csv_sample(file_path, sample_size=COLUMN_PROFILE_SAMPLE_SIZE, chunk_size=COLUMN_PROFILE_CHUNK_SIZE):
+    """
+    Reads a uniform random sample of at most sample_size rows of a csv while streaming it
+    Returns: (sample DataFrame in file order, total number of rows)
+    ### Note:
+    - Reservoir sampling by random keys: every row draws a key and the sample_size rows with the smallest
+    keys are kept, so memory stays bounded by sample_size + chunk_size rows whatever the file size
+    - Chunks are read as raw text and the sample is parsed once at the end, so its dtypes are inferred
+    exactly as pd.read_csv would on those rows (and not chunk by chunk)
+    - A csv with at most sample_size rows is returned whole
+    """
+    if sample_size <= 0:
+        data_df = pd.read_csv(file_path)
+        return data_df, len(data_df)
+
+    rng = np.random.default_rng(0)
+    reservoir_df = None
+    total_rows = 0
+    for chunk_df in pd.read_csv(file_path, dtype=object, keep_default_na=False, chunksize=chunk_size):
+        chunk_df = chunk_df.assign(_row_number=np.arange(total_rows, total_rows + len(chunk_df)), _sample_key=rng.random(len(chunk_df)))
+        total_rows += len(chunk_df)
+        if reservoir_df is not None and len(reservoir_df) == sample_size:
+            # Only rows with a smaller key than the largest kept one can enter a full reservoir
+            chunk_df = chunk_df[chunk_df["_sample_key"] < reservoir_df["_sample_key"].max()]
+        reservoir_df = chunk_df if reservoir_df is None else pd.concat([reservoir_df, chunk_df], ignore_index=True)
+        if len(reservoir_df) > sample_size:
+            reservoir_df = reservoir_df.nsmallest(sample_size, "_sample_key")
+
+    if reservoir_df is None:
+        return pd.read_csv(file_path), 0
+    reservoir_df = reservoir_df.sort_values("_row_number").drop(columns=["_row_number", "_sample_key"])
+    return pd.read_csv(io.StringIO(reservoir_df.to_csv(index=False))), total_rows
+
+def read_parquet_sample(file_path, sample_size=COLUMN_PROFILE_SAMPLE_SIZE, chunk_size=COLUMN_PROFILE_CHUNK_SIZE):
+    """
+    Reads a uniform random sample of at most sample_size rows of a parquet artifact
+    Returns: (sample DataFrame in file order, total number of rows)
+    ### Note:
+    - The row count comes from the parquet footer, so the sampled row positions are drawn up front and
+    taken from the record batches as they stream by (memory bounded by sample_size + chunk_size rows)
+    """
+    parquet_file = pq.ParquetFile(file_path, memory_map=True)
+    total_rows = parquet_file.metadata.num_rows
+    if sample_size <= 0 or total_rows <= sample_size:
+        return parquet_file.read().to_pandas(), total_rows
+
+    sample_positions = np.sort(np.random.default_rng(0).choice(total_rows, size=sample_size, replace=False))
+    sample_batches = []
+    batch_start = 0
+    for record_batch in parquet_file.iter_batches(batch_size=chunk_size):
+        batch_end = batch_start + record_batch.num_rows
+        batch_positions = sample_positions[(sample_positions >= batch_start) & (sample_positions < batch_end)] - batch_start
+        if len(batch_positions) > 0:
+            sample_batches.append(record_batch.take(pa.array(batch_positions)))
+        batch_start = batch_end
+    return pa.Table.from_batches(sample_batches).to_pandas(), total_rows
+
+def profile_data_artifact(file_path, sample_size=COLUMN_PROFILE_SAMPLE_SIZE):
+    """Profiles a csv / parquet data artifact on at most sample_size rows (see read_csv_sample, read_parquet_sample and profile_columns)"""
+    if is_parquet_file(file_path):
+        data_df, total_rows = read_parquet_sample(file_path, sample_size)
+    else:
+        data_df, total_rows = read_csv_sample(file_path, sample_size)
+    return profile_columns(data_df, total_rows)
+
+def profile_columns(data_df, total_rows=None):
+    """
+    Profiles every column of a data artifact in one pass
+    ### Note:
+    - Per column: dtype, is_string (object / string dtype), null_count, num_unique, numeric_ratio / alpha_ratio (shares of the non-null values that
+    convert to numbers / contain letters), non_numeric_unique_ratio (share of the distinct values of a string
+    column that are not numbers), singleton_count (distinct values of a string column seen once), date_ratio (over at most DATETIME_DETECTION_SAMPLE_SIZE distinct values,
+    see datetime_parse_rate) and numeric min / max
+    - The SDV SingleTableMetadata detected from data_df is kept under "metadata"
+    - The profile is JSON serializable and cached on the DataArtifacts record (see load_column_profile)
+    - data_df may be a sample of total_rows rows: num_rows is then total_rows, the column statistics are
+    those of the sample and "sampling_report" tells how far they can be trusted (see get_sampling_report)
+    """
+    metadata = SingleTableMetadata()
+    metadata.detect_from_dataframe(data_df)
+    matched_datetime_formats = []
+    columns = {column: profile_column(data_df[column], matched_datetime_formats) for column in data_df.columns}
+    total_rows = data_df.shape[0] if total_rows is None else total_rows
+    return {
+        "version": COLUMN_PROFILE_VERSION,
+        "num_rows": int(total_rows),
+        "num_columns": int(data_df.shape[1]),
+        "columns": columns,
+        "metadata": metadata.to_dict(),
+        "sampling_report": get_sampling_report(columns, data_df.shape[0], total_rows)
+    }
+
+def get_sampling_report(columns, sample_rows, total_rows):
+    """
+    Returns: How much a profile computed on sample_rows of total_rows rows can be trusted, None if it saw every row
+    ### Note:
+    - unseen_category_probability (Good-Turing): share of the column's sampled values that were seen only once,
+    an estimate of the chance that the next row holds a category the sample never saw
+    - Categorical columns (distinct values at most half of the sampled values) with such singletons may be missing
+    categories and are listed in columns_may_miss_categories, near unique columns (ids, free text) are not
+    - Numeric min / max are those of the sample, the full data may reach further
+    """
+    if total_rows <= sample_rows:
+        return None
+    unseen_category_probability = {}
+    columns_may_miss_categories = []
+    for column, column_profile in columns.items():
+        num_values = sample_rows - column_profile["null_count"]
+        if not column_profile["is_string"] or num_values == 0:
+            continue
+        unseen_category_probability[column] = column_profile["singleton_count"] / num_values
+        if column_profile["singleton_count"] > 0 and column_profile["num_unique"] <= num_values // 2:
+            columns_may_miss_categories.append(column)
+    if columns_may_miss_categories:
+        print("[ColumnProfiler][NOTICE] Sample Of {} / {} Rows May Miss Categories In: {}".format(sample_rows, total_rows, ", ".join(columns_may_miss_categories)))
+    return {
+        "sample_rows": int(sample_rows),
+        "total_rows": int(total_rows),
+        "sampling_fraction": sample_rows / total_rows,
+        "unseen_category_probability": unseen_category_probability,
+        "columns_may_miss_categories": columns_may_miss_categories
+    }
+
+def profile_column(series, matched_datetime_formats=None):
+    non_null_values = series.dropna()
+    column_profile = {
+        "dtype": str(series.dtype),
+        "is_string": is_string_column(series),
+        "null_count": int(len(series) - len(non_null_values)),
+        "num_unique": 0,
+        "numeric_ratio": 1.0,
+        "alpha_ratio": 0.0,
+        "non_numeric_unique_ratio": 0.0,
+        "singleton_count": 0,
+        "date_ratio": 0.0,
+        "min": None,
+        "max": None
+    }
+    if len(non_null_values) == 0:
+        return column_profile
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        column_profile["num_unique"] = int(non_null_values.nunique())
+        column_profile["numeric_ratio"] = 0.0
+        column_profile["date_ratio"] = 1.0
+        return column_profile
+
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        column_profile["num_unique"] = int(non_null_values.nunique())
+        numeric_values = non_null_values.astype(float)
+    else:
+        # String columns are profiled over their distinct values weighted by their counts,
+        # low cardinality columns only parse a handful of values
+        value_counts = non_null_values.value_counts(sort=False)
+        counts = value_counts.to_numpy()
+        column_profile["num_unique"] = int(len(counts))
+        column_profile["singleton_count"] = int((counts == 1).sum())
+        distinct_values = pd.Series(value_counts.index)
+        distinct_strings = distinct_values.astype(str)
+        numeric_values = pd.to_numeric(distinct_values, errors="coerce").astype(float)
+        column_profile["numeric_ratio"] = float(counts[numeric_values.notna().to_numpy()].sum() / counts.sum())
+        column_profile["alpha_ratio"] = float(counts[distinct_strings.str.contains("[a-zA-Z]").to_numpy()].sum() / counts.sum())
+        if column_profile["is_string"]:
+            column_profile["non_numeric_unique_ratio"] = float((~distinct_strings.str.replace(".", "", n=1, regex=False).str.isdigit()).mean())
+        if len(distinct_strings) > DATETIME_DETECTION_SAMPLE_SIZE:
+            distinct_strings = distinct_strings.sample(n=DATETIME_DETECTION_SAMPLE_SIZE, random_state=0)
+        column_profile["date_ratio"] = datetime_parse_rate(distinct_strings, matched_datetime_formats)
+
+    numeric_values = numeric_values[np.isfinite(numeric_values)]
+    if len(numeric_values) > 0:
+        column_profile["min"] = float(numeric_values.min())
+        column_profile["max"] = float(numeric_values.max())
+    return column_profile
+
+def is_string_column(series):
+    return series.dtype == object or isinstance(series.dtype, pd.StringDtype)
+
+def datetime_parse_rate(values, matched_datetime_formats=None):
+    """
+    Share of values (strings) that parse as dates
+    ### Note:
+    - Values are parsed at once with pd.to_datetime using a format guessed from the first value, then the
+    formats that matched earlier columns (matched_datetime_formats is extended with every format that fit)
+    - Values in no known format (mixed formats, month names, ...) are parsed one by one
+    """
+    if len(values) == 0:
+        return 0.0
+    matched_datetime_formats = matched_datetime_formats if matched_datetime_formats is not None else []
+    guessed_datetime_format = guess_datetime_format(values.iloc[0])
+    candidate_formats = list(matched_datetime_formats)
+    if guessed_datetime_format is not None and guessed_datetime_format not in candidate_formats:
+        candidate_formats.insert(0, guessed_datetime_format)
+
+    unparsed_values = values
+    for datetime_format in candidate_formats:
+        parsed_dates = pd.to_datetime(unparsed_values, format=datetime_format, errors="coerce", utc=True)
+        if parsed_dates.notna().any() and datetime_format not in matched_datetime_formats:
+            matched_datetime_formats.append(datetime_format)
+        unparsed_values = unparsed_values[parsed_dates.isna().to_numpy()]
+        if len(unparsed_values) == 0:
+            return 1.0
+
+    parsed_dates = pd.to_datetime(unparsed_values, format="mixed", errors="coerce", utc=True)
+    return 1 - int(parsed_dates.isna().sum()) / len(values)
+
+def load_column_profile(data_artifact_db_record):
+    """Returns: The column profile cached on a DataArtifacts record, or None if it has none (or an outdated one)"""
+    if not data_artifact_db_record.column_profile:
+        return None
+    column_profile = json.loads(data_artifact_db_record.column_profile)
+    if column_profile.get("version") != COLUMN_PROFILE_VERSION:
+        return None
+    return column_profile
+
+def store_column_profile(data_artifact_db_record, column_profile):
+    data_artifact_db_record.column_profile = json.dumps(column_profile)
@@ -0,0 +1,27 @@
+import tempfile
+import os
+import pytest
+
+# Tests run against a throwaway database, Client Buffer and local Artifact Storage, set before any module reads them
+TEST_FOLDER_NAME = tempfile.mkdtemp(prefix="synthium_tests_")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(TEST_FOLDER_NAME, "database.sqlite")
+os.environ["CLIENT_BUFFER_FOLDER_NAME"] = os.path.join(TEST_FOLDER_NAME, "client_buffer")
+os.environ["ARTIFACT_STORAGE_BACKEND"] = "local"
+os.environ["LOCAL_ARTIFACT_STORAGE_FOLDER_NAME"] = os.path.join(TEST_FOLDER_NAME, "artifact_storage")
+os.environ["ARTIFACT_CACHE_FOLDER_NAME"] = os.path.join(TEST_FOLDER_NAME, "artifact_cache")
+os.environ["ARTIFACT_CACHE_MAX_BYTES"] = "0"
+os.makedirs(os.environ["CLIENT_BUFFER_FOLDER_NAME"], exist_ok=True)
+
+
+@pytest.fixture
+def db():
+    """Session on the test database, emptied after every test"""
+    from database import Base, SessionLocal, engine
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        with engine.begin() as connection:
+            for table in reversed(Base.metadata.sorted_tables):
+                connection.execute(table.delete())
@@ -0,0 +1,84 @@
+from dotenv import load_dotenv, find_dotenv
+import csv
+import io
+import re
+import os
+
+load_dotenv(find_dotenv())
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+# A line holding only whitespace, matched from the newline before it (the newline after it is not consumed)
+BLANK_LINE_PATTERN = re.compile(rb"\n[ \t\r]*(?=\n)")
+
+class StreamingCSVUploadWriter:
+    """
+    Writes an uploaded csv to disk chunk by chunk in a single pass
+    ### Note:
+    - The header line is rewritten on the fly with single quotes removed from the column names
+    - Records are counted by the newlines outside of quoted fields (quoted fields may contain newlines),
+    plus a final record without a trailing newline
+    - Blank (whitespace only) lines are not records, like pd.read_csv skips them
+    """
+    def __init__(self, file_object) -> None:
+        self.file_object = file_object
+        self.header_buffer = b""
+        self.header_written = False
+        self.in_quotes = False
+        self.num_rows = 0
+        # Whether the current line holds anything but whitespace so far
+        self.line_has_content = False
+
+    def write(self, chunk):
+        if not self.header_written:
+            self.header_buffer += chunk
+            newline_index = self.header_buffer.find(b"\n")
+            if newline_index == -1:
+                return
+            header_line, chunk = self.header_buffer[:newline_index + 1], self.header_buffer[newline_index + 1:]
+            self.file_object.write(self.clean_header_line(header_line))
+            self.header_buffer = b""
+            self.header_written = True
+        if not chunk:
+            return
+        self.count_records(chunk)
+        self.file_object.write(chunk)
+
+    def count_records(self, chunk):
+        # Segments split on '"' alternate between outside and inside quoted fields
+        # (an escaped quote "" toggles twice and so leaves the state unchanged)
+        for segment in chunk.split(b'"'):
+            if self.in_quotes:
+                self.line_has_content = True
+            else:
+                self.count_segment_records(segment)
+            self.in_quotes = not self.in_quotes
+        self.in_quotes = not self.in_quotes
+
+    def count_segment_records(self, segment):
+        """Counts the non-blank lines a segment outside of quoted fields ends"""
+        first_newline_index = segment.find(b"\n")
+        if first_newline_index == -1:
+            self.line_has_content = self.line_has_content or bool(segment.strip())
+            return
+        num_newlines = segment.count(b"\n")
+        # The first newline ends the line carried over from earlier segments, every later blank line is matched
+        num_blank_lines = 0 if self.line_has_content or segment[:first_newline_index].strip() else 1
+        num_blank_lines += len(BLANK_LINE_PATTERN.findall(segment, first_newline_index))
+        self.num_rows += num_newlines - num_blank_lines
+        self.line_has_content = bool(segment[segment.rfind(b"\n") + 1:].strip())
+
+    def clean_header_line(self, header_line):
+        line_ending = b"\r\n" if header_line.endswith(b"\r\n") else b"\n" if header_line.endswith(b"\n") else b""
+        columns = next(csv.reader([header_line.decode("utf-8-sig").rstrip("\r\n")]), [])
+        header_output = io.StringIO()
+        csv.writer(header_output, lineterminator="").writerow([column.replace("'", "") for column in columns])
+        return header_output.getvalue().encode("utf-8") + line_ending
+
+    def close(self):
+        """Flushes a header-only file and returns the number of records (excluding the header)"""
+        if not self.header_written and self.header_buffer:
+            self.file_object.write(self.clean_header_line(self.header_buffer))
+            self.header_written = True
+        if self.line_has_content:
+            self.num_rows += 1
+        return self.num_rows
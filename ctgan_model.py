@@ -1,20 +1,137 @@
 from sdv.single_table import CTGANSynthesizer
 from sdv.metadata import SingleTableMetadata
+from ctgan.synthesizers.ctgan import Discriminator
+from ctgan.data_transformer import DataTransformer
+import ctgan.synthesizers.ctgan as ctgan_synthesizer_module
+from early_stopping import EarlyStopping, quality_probe_score
+from artifact_formats import read_typed_artifact
+from tqdm import tqdm
 import pandas as pd
+import contextvars
+import itertools
+import torch
 import json
 import os
 
+# Training session of the CTGAN fit running in the current context
+current_training_session = contextvars.ContextVar("current_training_session", default=None)
+
+class CTGANTrainingSession:
+    """
+    State of one CTGAN fit that ctgan keeps in local variables of CTGAN.fit
+    ### Note:
+    - The discriminator and optimizers are registered as CTGAN.fit creates them, so epochs can be checkpointed
+    - resume_state (a training state, see CTGANER.get_training_state) is restored before the first epoch,
+    epochs before resume_state["epoch"] are skipped
+    """
+    def __init__(self, synthesizer, epoch_callback=None, resume_state=None) -> None:
+        self.synthesizer = synthesizer
+        self.epoch_callback = epoch_callback
+        self.resume_state = resume_state
+        self.discriminator = None
+        self.optimizers = []
+
+    def restore(self):
+        ctgan_model = self.synthesizer._model
+        ctgan_model._generator.load_state_dict(self.resume_state["generator"])
+        if "discriminator" in self.resume_state:
+            self.discriminator.load_state_dict(self.resume_state["discriminator"])
+        for optimizer, optimizer_state in zip(self.optimizers, self.resume_state.get("optimizers", [])):
+            optimizer.load_state_dict(optimizer_state)
+        if "loss_values" in self.resume_state:
+            ctgan_model.loss_values = self.resume_state["loss_values"]
+        print("[CTGANER][SUCCESS] Training Resumed From Epoch:", self.resume_state.get("epoch", 0))
+
+def create_tracked_discriminator(*args, **kwargs):
+    discriminator = Discriminator(*args, **kwargs)
+    training_session = current_training_session.get()
+    if training_session is not None:
+        training_session.discriminator = discriminator
+    return discriminator
+
+class TrackedOptimizers:
+    """Stands in for torch.optim in ctgan's synthesizer module, registering the optimizers CTGAN.fit creates (generator first)"""
+    def __getattr__(self, name):
+        optimizer_class = getattr(torch.optim, name)
+        def create_tracked_optimizer(*args, **kwargs):
+            optimizer = optimizer_class(*args, **kwargs)
+            training_session = current_training_session.get()
+            if training_session is not None:
+                training_session.optimizers.append(optimizer)
+            return optimizer
+        return create_tracked_optimizer
+
+original_data_transformer_fit = DataTransformer.fit
+
+def resumable_data_transformer_fit(self, *args, **kwargs):
+    # A resumed fit must encode the data exactly like the checkpointed networks expect
+    training_session = current_training_session.get()
+    if training_session is not None and training_session.resume_state is not None and "transformer" in training_session.resume_state:
+        self.__dict__.update(training_session.resume_state["transformer"].__dict__)
+        return
+    return original_data_transformer_fit(self, *args, **kwargs)
+
+class EpochCallbackIterator:
+    """
+    Stands in for tqdm around the epoch loop of ctgan's CTGAN.fit
+    ### Note:
+    - Restores the resume state of the current training session before the first epoch
+    - Calls the epoch callback of the current training session after every completed epoch
+    - If the callback returns False the loop ends early, leaving a normally fitted model
+    """
+    def __init__(self, iterable, *args, **kwargs) -> None:
+        self.training_session = current_training_session.get()
+        start_epoch = 0
+        if self.training_session is not None and self.training_session.resume_state is not None:
+            start_epoch = min(self.training_session.resume_state.get("epoch", 0), len(iterable))
+        self.progress_bar = tqdm(itertools.islice(iterable, start_epoch, None), *args, initial=start_epoch, total=len(iterable), **kwargs)
+
+    def __iter__(self):
+        if self.training_session is not None and self.training_session.resume_state is not None:
+            self.training_session.restore()
+        for epoch in self.progress_bar:
+            yield epoch
+            if self.training_session is not None and self.training_session.epoch_callback is not None and self.training_session.epoch_callback(epoch) is False:
+                self.progress_bar.close()
+                break
+
+    def __getattr__(self, name):
+        return getattr(self.progress_bar, name)
+
+# CTGAN.fit keeps its epoch loop, discriminator and optimizers local, so it is hooked through the names it looks up
+# in ctgan's synthesizer module, fail at import if those changed (the ctgan version is pinned in requirements.txt)
+if not isinstance(ctgan_synthesizer_module.__dict__.get("optim"), TrackedOptimizers):
+    missing_ctgan_symbols = [name for name in ("tqdm", "Discriminator", "optim") if name not in ctgan_synthesizer_module.__dict__]
+    if ctgan_synthesizer_module.__dict__.get("optim") is not torch.optim:
+        missing_ctgan_symbols.append("optim (torch.optim)")
+    if not callable(getattr(DataTransformer, "fit", None)):
+        missing_ctgan_symbols.append("DataTransformer.fit")
+    if missing_ctgan_symbols:
+        raise ImportError("Unsupported ctgan version, ctgan.synthesizers.ctgan is missing: " + ", ".join(dict.fromkeys(missing_ctgan_symbols)) + " (see requirements.txt)")
+    ctgan_synthesizer_module.tqdm = EpochCallbackIterator
+    ctgan_synthesizer_module.Discriminator = create_tracked_discriminator
+    ctgan_synthesizer_module.optim = TrackedOptimizers()
+    DataTransformer.fit = resumable_data_transformer_fit
+
 
 class CTGANER:
     """
     Initialize CTGANER instance with given file path
     ### Note: 
-    - If in "load_mode" file_path will be assumed to be data_artifact path (.csv file)
+    - If in "load_mode" file_path will be assumed to be data_artifact path (.csv or .parquet file)
     - If not in "load_mode" file_path will be assumed to be model path (.pkl file)
     """
     def __init__(self, file_path, main_config, load_mode=False) -> None:
         if not load_mode:
-            self.data_df = pd.read_csv(file_path)
+            # Only the columns the metadata describes are read, categorical ones as "category"
+            metadata_columns = main_config["metadata"]["columns"]
+            self.data_df = read_typed_artifact(
+                file_path,
+                columns = list(metadata_columns),
+                categorical_columns = [column for column, column_metadata in metadata_columns.items() if column_metadata.get("sdtype") == "categorical"],
+                # Sampled integers are cast back to the training dtypes, so narrow ones need min / max enforced
+                downcast_integers = main_config["enforce_min_max_values"]
+            )
             self.main_config = main_config
             self.metadata = SingleTableMetadata.load_from_dict(main_config["metadata"])
             self.model = CTGANSynthesizer(
@@ -45,14 +162,123 @@ class CTGANER:
             #     self.main_config = json.load(json_file)
             # self.metadata = SingleTableMetadata.load_from_dict(main_config["metadata"])
 
-    def train(self):
-        self.model.fit(self.data_df)
+    def train(self, epoch_callback=None, checkpoint_callback=None, checkpoint_interval=None, training_state=None):
+        """
+        ### Note:
+        - epoch_callback(epoch, total_epochs, generator_loss, discriminator_loss) is called after every epoch
+        (epoch is 0 based), returning False stops the training early
+        - checkpoint_callback(training_state) is called every checkpoint_interval epochs, except after the last one
+        - training_state (a checkpoint, or get_warm_start_state) continues training from that state
+        - With "early_stopping" in the model config, training stops once losses (and quality probes) plateau
+        ### Returns:
+        - {"start_epoch", "trained_epochs", "total_epochs", "stopped_early"}
+        """
+        total_epochs = self.main_config["epochs"]
+        start_epoch = training_state.get("epoch", 0) if training_state is not None else 0
+        early_stopping = EarlyStopping.from_config(self.main_config)
+        training_summary = {"start_epoch": start_epoch, "trained_epochs": start_epoch, "total_epochs": total_epochs, "stopped_early": False}
+
+        def ctgan_epoch_callback(epoch):
+            training_summary["trained_epochs"] = epoch + 1
+            if checkpoint_callback is not None and checkpoint_interval and (epoch + 1) % checkpoint_interval == 0 and epoch + 1 < total_epochs:
+                checkpoint_callback(self.get_training_state(epoch + 1))
+            generator_loss, discriminator_loss = self.get_last_losses()
+            continue_training = True
+            if epoch_callback is not None:
+                continue_training = epoch_callback(epoch, total_epochs, generator_loss, discriminator_loss) is not False
+            if early_stopping is not None and continue_training:
+                early_stopping.add_losses(generator_loss, discriminator_loss)
+                if early_stopping.is_probe_due(epoch + 1):
+                    early_stopping.add_quality_score(self.run_quality_probe(early_stopping.probe_sample_size))
+                if early_stopping.should_stop(epoch + 1) and epoch + 1 < total_epochs:
+                    print("[CTGANER][SUCCESS] Early Stopping After Epoch {}/{}".format(epoch + 1, total_epochs))
+                    training_summary["stopped_early"] = True
+                    continue_training = False
+            return continue_training
+
+        self.training_session = CTGANTrainingSession(self.model, ctgan_epoch_callback, training_state)
+        token = current_training_session.set(self.training_session)
+        try:
+            self.model.fit(self.data_df)
+        finally:
+            current_training_session.reset(token)
+        return training_summary
+
+    def run_quality_probe(self, sample_size):
+        """Scores a small sample of the model being trained against a sample of the training data"""
+        ctgan_model = self.model._model
+        ctgan_model._generator.eval()
+        try:
+            with torch.no_grad():
+                synthetic_data_df = self.model._data_processor.reverse_transform(ctgan_model.sample(sample_size))
+        finally:
+            ctgan_model._generator.train()
+        real_data_df = self.data_df.sample(min(sample_size, len(self.data_df)), random_state=0)
+        return quality_probe_score(real_data_df, synthetic_data_df)
+
+    def get_training_state(self, epoch):
+        """Everything needed to continue training after `epoch` completed epochs (only valid during train)"""
+        ctgan_model = self.model._model
+        return {
+            "epoch": epoch,
+            "transformer": ctgan_model._transformer,
+            "generator": ctgan_model._generator.state_dict(),
+            "discriminator": self.training_session.discriminator.state_dict(),
+            "optimizers": [optimizer.state_dict() for optimizer in self.training_session.optimizers],
+            "loss_values": ctgan_model.loss_values
+        }
+
+    @staticmethod
+    def get_warm_start_state(model_file_path):
+        """Training state that starts a new training from the generator (and data encoding) of a trained model"""
+        ctgan_model = CTGANSynthesizer.load(model_file_path)._model
+        return {
+            "epoch": 0,
+            "transformer": ctgan_model._transformer,
+            "generator": ctgan_model._generator.state_dict()
+        }
+
+    def get_last_losses(self):
+        """Returns (generator_loss, discriminator_loss) of the last finished epoch, or (None, None)"""
+        loss_values = getattr(getattr(self.model, "_model", None), "loss_values", None)
+        if loss_values is None or len(loss_values) == 0:
+            return None, None
+        last_loss_values = loss_values.iloc[-1]
+        # Older ctgan versions spell the column "Distriminator Loss"
+        generator_loss = next((float(last_loss_values[column]) for column in loss_values.columns if "Generator" in column), None)
+        discriminator_loss = next((float(last_loss_values[column]) for column in loss_values.columns if "riminator" in column), None)
+        return generator_loss, discriminator_loss
 
     def generate_synthetic_data_df(self, num_examples):
         return self.model.sample(num_examples)
 
-    def generate_synthetic_data_csv(self, filename, num_examples, index=False, encoding='utf-8'):
-        self.generate_synthetic_data_df(num_examples).to_csv(filename, index = index, encoding=encoding)
+    def generate_synthetic_data_batches(self, num_examples, batch_size):
+        """
+        Yields synthetic data in DataFrames of at most batch_size rows until num_examples rows are sampled
+        """
+        remaining_examples = num_examples
+        while remaining_examples > 0:
+            current_batch_size = min(batch_size, remaining_examples)
+            yield self.model.sample(current_batch_size)
+            remaining_examples -= current_batch_size
+
+    def generate_synthetic_data_csv(self, filename, num_examples, index=False, encoding='utf-8', batch_size=None):
+        """
+        Writes synthetic data to a csv file and returns the number of rows written
+        ### Note:
+        - If batch_size is given, rows are sampled and appended to the file batch by batch
+        so that peak memory depends on batch_size and not on num_examples
+        """
+        if batch_size is None:
+            synthetic_data_df = self.generate_synthetic_data_df(num_examples)
+            synthetic_data_df.to_csv(filename, index = index, encoding=encoding)
+            return len(synthetic_data_df)
+
+        num_rows = 0
+        for synthetic_data_batch_df in self.generate_synthetic_data_batches(num_examples, batch_size):
+            synthetic_data_batch_df.to_csv(filename, mode = 'w' if num_rows == 0 else 'a', header = num_rows == 0, index = index, encoding=encoding)
+            num_rows += len(synthetic_data_batch_df)
+        return num_rows
 
     def show_df(self):
         return self.data_df
@@ -1,6 +1,7 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import Column, Integer, Float, String, DateTime, BIGINT, Text, Boolean
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker, declarative_base, relationship
+from sqlalchemy import Column, Integer, Float, String, DateTime, BIGINT, Text, Boolean, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.schema import CreateTable, AddConstraint
 from sqlalchemy.sql import func
 from dotenv import load_dotenv, find_dotenv
 import os
@@ -9,14 +10,29 @@ load_dotenv(find_dotenv()) # read local .env file
 
 Base = declarative_base()
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///database.sqlite"
-# SQLALCHEMY_DATABASE_URL = "mysql+pymysql://{}:{}@{}:{}/{}?charset=utf8mb4".format(
-#     os.getenv("AWS_RDS_DB_MASTER_USERNAME"),
-#     os.getenv("AWS_RDS_DB_MASTER_PASS"),
-#     os.getenv("AWS_RDS_DB_HOST"),
-#     os.getenv("AWS_RDS_DB_PORT"),
-#     os.getenv("AWS_RDS_DB_NAME"),
-# )
+# DATABASE_URL wins, else the AWS RDS (MySQL) database once its host is set, else the local SQLite file
+if os.getenv("DATABASE_URL"):
+    SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
+elif os.getenv("AWS_RDS_DB_HOST"):
+    SQLALCHEMY_DATABASE_URL = "mysql+pymysql://{}:{}@{}:{}/{}?charset=utf8mb4".format(
+        os.getenv("AWS_RDS_DB_MASTER_USERNAME"),
+        os.getenv("AWS_RDS_DB_MASTER_PASS"),
+        os.getenv("AWS_RDS_DB_HOST"),
+        os.getenv("AWS_RDS_DB_PORT", 3306),
+        os.getenv("AWS_RDS_DB_NAME"),
+    )
+else:
+    SQLALCHEMY_DATABASE_URL = "sqlite:///database.sqlite"
+
+# Connection pool (API requests, training workers and their heartbeat / log threads each hold a connection)
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", 10))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", 20))
+DATABASE_POOL_TIMEOUT = int(os.getenv("DATABASE_POOL_TIMEOUT", 30)) # Seconds to wait for a free connection
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", 1800)) # Seconds, below MySQL's wait_timeout
+# SQLite only
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", 30000)) # Milliseconds a writer waits on a locked database
 
 # Models
 class Users(Base):
@@ -41,15 +57,28 @@ class Projects(Base):
     status = Column(String(length=256))
     model_training_time = Column(Float())
     synthetic_quality_score = Column(Float)
-    model_id = Column(Integer, unique=True)
-    model_config_id = Column(Integer, unique=True)
-    model_log_id = Column(Integer, unique=True)
-    user_id = Column(Integer)
-    data_artifact_id = Column(Integer)
-    synthetic_quality_report_id = Column(Integer)
+    # use_alter: these tables reference projects back, MySQL needs one side of each cycle added after CREATE TABLE
+    model_id = Column(Integer, ForeignKey('models.id', use_alter=True), unique=True)
+    model_config_id = Column(Integer, ForeignKey('model_configs.id', use_alter=True), unique=True)
+    model_log_id = Column(Integer, ForeignKey('model_logs.id', use_alter=True), unique=True)
+    user_id = Column(Integer, ForeignKey('users.id'))
+    data_artifact_id = Column(Integer, ForeignKey('data_artifacts.id'))
+    synthetic_quality_report_id = Column(Integer, ForeignKey('synthetic_quality_reports.id', use_alter=True))
     created_on = Column(DateTime(timezone=True), server_default=func.current_timestamp())
     updated_on = Column(DateTime(timezone=True), server_default=func.current_timestamp(), onupdate=func.current_timestamp())
 
+    # Many-to-one relationships resolve from the session's identity map, so reading them after a flush costs no query
+    model = relationship('Models', foreign_keys=[model_id])
+    model_config = relationship('ModelConfigs', foreign_keys=[model_config_id])
+    model_log = relationship('ModelLogs', foreign_keys=[model_log_id])
+    data_artifact = relationship('DataArtifacts', foreign_keys=[data_artifact_id])
+    synthetic_quality_report = relationship('SyntheticQualityReports', foreign_keys=[synthetic_quality_report_id])
+    synthetic_data_artifacts = relationship('SyntheticDataArtifacts', primaryjoin='Projects.id == foreign(SyntheticDataArtifacts.project_id)', viewonly=True)
+
+    __table_args__ = (
+        Index('ix_projects_user_id_created_on', 'user_id', 'created_on'),
+    )
+
 class Models(Base):
     __tablename__ = 'models'
     
@@ -58,8 +87,13 @@ class Models(Base):
     file_extension = Column(String(length=256), server_default=".pkl") # OR ".pt" if DGAN Model Type
     model_type = Column(String(length=256))
     model_training_time = Column(Float())
-    project_id = Column(Integer, unique=True)
-    user_id = Column(Integer)
+    trained_epochs = Column(Integer)
+    configured_epochs = Column(Integer)
+    model_training_time_saved = Column(Float()) # Estimated seconds saved by early stopping
+    model_config_data = Column(Text(length=10000)) # Model config the model was trained with (the project's config may change later)
+    # Every training of a project adds a model, Projects.model_id points at the newest one
+    project_id = Column(Integer, ForeignKey('projects.id'), index=True)
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
     created_on = Column(DateTime(timezone=True), server_default=func.current_timestamp())
 
 class ModelConfigs(Base):
@@ -68,8 +102,8 @@ class ModelConfigs(Base):
     id = Column(Integer, primary_key=True)
     model_config_id = Column(String(length=256), unique=True)
     model_config_data = Column(Text(length=10000))
-    project_id = Column(Integer, unique=True)
-    user_id = Column(Integer)
+    project_id = Column(Integer, ForeignKey('projects.id'), unique=True)
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
     created_on = Column(DateTime(timezone=True), server_default=func.current_timestamp())
 
 class ModelLogs(Base):
@@ -78,11 +112,41 @@ class ModelLogs(Base):
     id = Column(Integer, primary_key=True)
     model_log_id = Column(String(length=256), unique=True)
     model_log_data = Column(Text(length=10000))
-    project_id = Column(Integer, unique=True)
-    user_id = Column(Integer)
+    # Every training of a project adds a model log, Projects.model_log_id points at the newest one
+    project_id = Column(Integer, ForeignKey('projects.id'), index=True)
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
     created_on = Column(DateTime(timezone=True), server_default=func.current_timestamp())
     updated_on = Column(DateTime(timezone=True), server_default=func.current_timestamp(), onupdate=func.current_timestamp())
 
+class ModelLogChunks(Base):
+    __tablename__ = 'model_log_chunks'
+    
+    id = Column(Integer, primary_key=True)
+    model_log_id = Column(Integer, ForeignKey('model_logs.id'))
+    sequence_number = Column(Integer)
+    model_log_chunk_data = Column(Text)
+    created_on = Column(DateTime(timezone=True), server_default=func.current_timestamp())
+
+    __table_args__ = (
+        Index('ix_model_log_chunks_model_log_id_sequence_number', 'model_log_id', 'sequence_number'),
+    )
+
+class TrainingProgress(Base):
+    __tablename__ = 'training_progress'
+    
+    id = Column(Integer, primary_key=True)
+    model_log_id = Column(Integer, ForeignKey('model_logs.id'), index=True)
+    project_id = Column(Integer, ForeignKey('projects.id'))
+    epoch = Column(Integer)
+    total_epochs = Column(Integer)
+    batch = Column(Integer)
+    total_batches = Column(Integer)
+    frac_completed = Column(Float)
+    generator_loss = Column(Float)
+    discriminator_loss = Column(Float)
+    rows_per_second = Column(Float)
+    created_on = Column(DateTime(timezone=True), server_default=func.current_timestamp())
+
 class DataArtifacts(Base):
     __tablename__ = 'data_artifacts'
     
@@ -91,9 +155,14 @@ class DataArtifacts(Base):
     file_extension = Column(String(length=256), server_default=".csv")
     original_filename = Column(String(length=256))
     num_rows = Column(Integer)
-    user_id = Column(Integer)
+    column_profile = Column(Text(length=16777215)) # JSON of column_profiler.profile_columns, filled in on first use
+    user_id = Column(Integer, ForeignKey('users.id'))
     created_on = Column(DateTime(timezone=True), server_default=func.current_timestamp())
 
+    __table_args__ = (
+        Index('ix_data_artifacts_user_id_created_on', 'user_id', 'created_on'),
+    )
+
 class SyntheticDataArtifacts(Base):
     __tablename__ = 'synthetic_data_artifacts'
     
@@ -101,8 +170,8 @@ class SyntheticDataArtifacts(Base):
     synthetic_data_artifact_id = Column(String(length=256),unique=True)
     file_extension = Column(String(length=256), server_default=".csv")
     num_rows = Column(Integer)
-    user_id = Column(Integer)
-    project_id = Column(Integer)
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
+    project_id = Column(Integer, ForeignKey('projects.id'), index=True)
     created_on = Column(DateTime(timezone=True), server_default=func.current_timestamp())
 
 class SyntheticQualityReports(Base):
@@ -111,13 +180,180 @@ class SyntheticQualityReports(Base):
     id = Column(Integer, primary_key=True)
     synthetic_quality_report_id = Column(String(length=256),unique=True)
     synthetic_quality_report_data = Column(Text(length=10000))
-    user_id = Column(Integer)
-    project_id = Column(Integer)
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
+    project_id = Column(Integer, ForeignKey('projects.id'), index=True)
     created_on = Column(DateTime(timezone=True), server_default=func.current_timestamp())
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-# engine = create_engine(SQLALCHEMY_DATABASE_URL)
+class TrainingJobs(Base):
+    __tablename__ = 'training_jobs'
+    
+    id = Column(Integer, primary_key=True)
+    training_job_id = Column(String(length=256), unique=True)
+    model_log_id = Column(String(length=256))
+    training_job_data = Column(Text(length=10000)) # JSON of the UpdatePendingProjectRequest
+    status = Column(String(length=256), server_default="queued") # "queued" | "running" | "completed" | "failed"
+    priority = Column(Integer, server_default="0")
+    attempts = Column(Integer, server_default="0")
+    worker_id = Column(String(length=256))
+    error = Column(Text(length=10000))
+    project_id = Column(Integer, ForeignKey('projects.id'), index=True)
+    user_id = Column(Integer, ForeignKey('users.id'))
+    created_on = Column(DateTime(timezone=True), server_default=func.current_timestamp())
+    started_on = Column(DateTime(timezone=True))
+    heartbeat_on = Column(DateTime(timezone=True))
+    finished_on = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Claiming: status == "queued" ORDER BY priority DESC, id
+        Index('ix_training_jobs_status_priority_id', 'status', 'priority', 'id'),
+        Index('ix_training_jobs_user_id_created_on', 'user_id', 'created_on'),
+    )
+
+class TrainingCheckpoints(Base):
+    __tablename__ = 'training_checkpoints'
+    
+    id = Column(Integer, primary_key=True)
+    model_log_id = Column(String(length=256)) # Same as TrainingJobs.model_log_id, shared by every attempt of a training job
+    stage = Column(String(length=256)) # "prepare" | "train" | "upload_model" | "generate" | "upload_synthetic_data" | "quality_report" | "finalize"
+    checkpoint_data = Column(Text(length=10000)) # JSON of the stage outputs
+    project_id = Column(Integer, ForeignKey('projects.id'))
+    created_on = Column(DateTime(timezone=True), server_default=func.current_timestamp())
+
+    __table_args__ = (
+        Index('ix_training_checkpoints_model_log_id_stage', 'model_log_id', 'stage'),
+    )
+
+def create_database_engine(database_url):
+    """
+    Creates the engine with a tuned connection pool
+    ### Note:
+    - SQLite connections run in WAL mode: readers polling project status and training progress
+    are no longer blocked by the training threads committing logs, and writers wait busy_timeout
+    for the write lock instead of failing with "database is locked"
+    - synchronous=NORMAL is durable in WAL mode up to the last commits before a power loss
+    - In-memory SQLite keeps SQLAlchemy's default single connection pool
+    """
+    if not database_url.startswith("sqlite"):
+        return create_engine(
+            database_url,
+            pool_size=DATABASE_POOL_SIZE,
+            max_overflow=DATABASE_MAX_OVERFLOW,
+            pool_timeout=DATABASE_POOL_TIMEOUT,
+            pool_recycle=DATABASE_POOL_RECYCLE,
+            pool_pre_ping=True
+        )
+
+    connect_args = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT / 1000}
+    if database_url in ("sqlite://", "sqlite:///:memory:"):
+        sqlite_engine = create_engine(database_url, connect_args=connect_args)
+    else:
+        sqlite_engine = create_engine(
+            database_url,
+            connect_args=connect_args,
+            pool_size=DATABASE_POOL_SIZE,
+            max_overflow=DATABASE_MAX_OVERFLOW,
+            pool_timeout=DATABASE_POOL_TIMEOUT
+        )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode={}".format(SQLITE_JOURNAL_MODE))
+        cursor.execute("PRAGMA synchronous={}".format(SQLITE_SYNCHRONOUS))
+        cursor.execute("PRAGMA busy_timeout={}".format(SQLITE_BUSY_TIMEOUT))
+        cursor.close()
+
+    return sqlite_engine
+
+engine = create_database_engine(SQLALCHEMY_DATABASE_URL)
+
+def add_missing_columns(connection, table, existing_column_names):
+    for column in table.columns:
+        if column.name in existing_column_names:
+            continue
+        column_definition = "{} {}".format(column.name, column.type.compile(dialect=connection.dialect))
+        if column.server_default is not None and isinstance(column.server_default.arg, str):
+            column_definition += " DEFAULT '{}'".format(column.server_default.arg.replace("'", "''"))
+        connection.execute(text("ALTER TABLE {} ADD COLUMN {}".format(table.name, column_definition)))
+        print("[Database][SUCCESS] Column Added:", table.name, column.name)
+
+def get_stale_unique_constraints(table, existing_unique_constraints):
+    """Unique constraints of the database table that its model no longer declares"""
+    declared_unique_columns = {(column.name,) for column in table.columns if column.unique}
+    declared_unique_columns.update(tuple(constraint.columns.keys()) for constraint in table.constraints if isinstance(constraint, UniqueConstraint))
+    return [
+        unique_constraint for unique_constraint in existing_unique_constraints
+        if tuple(unique_constraint["column_names"]) not in declared_unique_columns
+    ]
+
+def drop_unique_constraint(connection, table, unique_constraint):
+    # MySQL keeps unique constraints as unique indexes
+    if connection.dialect.name == "mysql":
+        connection.execute(text("ALTER TABLE {} DROP INDEX {}".format(table.name, unique_constraint["name"])))
+    else:
+        connection.execute(text("ALTER TABLE {} DROP CONSTRAINT {}".format(table.name, unique_constraint["name"])))
+    print("[Database][SUCCESS] Unique Constraint Dropped:", table.name, ", ".join(unique_constraint["column_names"]))
+
+def rebuild_sqlite_table(connection, table):
+    """SQLite cannot add or drop constraints of a table, so the table is recreated from the model and its rows copied over"""
+    rebuilt_table_name = "rebuilt_" + table.name
+    column_names = ", ".join(column.name for column in table.columns)
+    create_table_statement = str(CreateTable(table).compile(dialect=connection.dialect)).strip()
+    connection.execute(text("DROP TABLE IF EXISTS {}".format(rebuilt_table_name)))
+    connection.execute(text(create_table_statement.replace("CREATE TABLE {} ".format(table.name), "CREATE TABLE {} ".format(rebuilt_table_name), 1)))
+    connection.execute(text("INSERT INTO {} ({}) SELECT {} FROM {}".format(rebuilt_table_name, column_names, column_names, table.name)))
+    connection.execute(text("DROP TABLE {}".format(table.name)))
+    connection.execute(text("ALTER TABLE {} RENAME TO {}".format(rebuilt_table_name, table.name)))
+    print("[Database][SUCCESS] Table Rebuilt From Model:", table.name)
+
+def migrate_database(engine):
+    """
+    Lightweight migration of an existing database to the models in this file
+    ### Note:
+    - create_all only creates missing tables, so missing columns, foreign keys and indexes are added here,
+    and unique constraints the models no longer declare are dropped
+    - Added columns are nullable and only keep constant server defaults
+    - SQLite tables missing foreign keys or keeping dropped unique constraints are rebuilt (foreign key
+    enforcement is off while rows are copied)
+    - Existing rows that violate a new foreign key are reported, not removed
+    """
+    inspector = inspect(engine)
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            connection.execute(text("PRAGMA foreign_keys=OFF"))
+            connection.commit()
+        with connection.begin():
+            for table in Base.metadata.sorted_tables:
+                if not inspector.has_table(table.name):
+                    continue
+                add_missing_columns(connection, table, {column["name"] for column in inspector.get_columns(table.name)})
+
+                existing_foreign_key_columns = {tuple(foreign_key["constrained_columns"]) for foreign_key in inspector.get_foreign_keys(table.name)}
+                missing_foreign_keys = [
+                    foreign_key for foreign_key in table.foreign_key_constraints
+                    if tuple(foreign_key.column_keys) not in existing_foreign_key_columns
+                ]
+                stale_unique_constraints = get_stale_unique_constraints(table, inspector.get_unique_constraints(table.name))
+                if (missing_foreign_keys or stale_unique_constraints) and engine.dialect.name == "sqlite":
+                    rebuild_sqlite_table(connection, table)
+                    stale_unique_constraints = []
+                elif missing_foreign_keys:
+                    for foreign_key in missing_foreign_keys:
+                        connection.execute(AddConstraint(foreign_key))
+                        print("[Database][SUCCESS] Foreign Key Added:", table.name, ", ".join(foreign_key.column_keys))
+
+                # Indexes go first: MySQL only drops a unique index a foreign key relies on once another index covers the column
+                for index in table.indexes:
+                    index.create(connection, checkfirst=True)
+                for unique_constraint in stale_unique_constraints:
+                    drop_unique_constraint(connection, table, unique_constraint)
+
+            if engine.dialect.name == "sqlite":
+                foreign_key_violations = connection.execute(text("PRAGMA foreign_key_check")).fetchall()
+                if foreign_key_violations:
+                    print("[Database][NOTICE] Rows Violating Foreign Keys:", len(foreign_key_violations))
 
 Base.metadata.create_all(bind=engine)
+migrate_database(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
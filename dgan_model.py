@@ -1,14 +1,20 @@
 from gretel_synthetics.timeseries_dgan.config import DGANConfig, OutputType
 from gretel_synthetics.timeseries_dgan.structures import ProgressInfo
 from gretel_synthetics.timeseries_dgan.dgan import DGAN
+import gretel_synthetics.timeseries_dgan.dgan as dgan_module
 from sklearn.preprocessing import OrdinalEncoder
+from early_stopping import EarlyStopping, quality_probe_score
+from artifact_formats import read_typed_artifact
 import matplotlib.pyplot as plt
 import matplotlib.dates as md
 import pandas as pd
 import numpy as np
 import torch
+import contextvars
+import dataclasses
 import pickle
 import json
+import io
 import os
 
 def handle_missing_values(df):
@@ -19,20 +25,75 @@ def handle_missing_values(df):
         if pd.api.types.is_numeric_dtype(df[col]):
             # Numeric column: interpolate missing values
             df[col] = df[col].interpolate()
+        elif isinstance(df[col].dtype, pd.CategoricalDtype):
+            # Categorical column: replace missing values with an 'NA' category
+            if 'NA' not in df[col].cat.categories:
+                df[col] = df[col].cat.add_categories(['NA'])
+            df[col] = df[col].fillna('NA')
         elif pd.api.types.is_string_dtype(df[col]):
             # String column: replace missing values with 'NA'
-            df[col].fillna('NA', inplace=True)
+            df[col] = df[col].fillna('NA')
         else:
             # Handle other types if needed
             pass
     
     return df
 
+# Training session of the DGAN train call running in the current context
+current_training_session = contextvars.ContextVar("current_dgan_training_session", default=None)
+
+class DGANTrainingSession:
+    """
+    Optimizers of the DGAN train calls of one training, which gretel keeps in local variables of DGAN._train
+    ### Note:
+    - Optimizers are registered as DGAN._train creates them (feature discriminator, attribute discriminator, generator)
+    - optimizer_states (from a checkpoint, or from the previous train call) are loaded into them as they are
+    created, so Adam's moments carry over resumed trainings and quality probe slices
+    """
+    def __init__(self, optimizer_states=None) -> None:
+        self.optimizer_states = optimizer_states or []
+        self.optimizers = []
+
+    def register_optimizer(self, optimizer):
+        optimizer_index = len(self.optimizers)
+        if optimizer_index < len(self.optimizer_states):
+            optimizer.load_state_dict(self.optimizer_states[optimizer_index])
+        self.optimizers.append(optimizer)
+
+    def end_train_call(self):
+        self.optimizer_states = [optimizer.state_dict() for optimizer in self.optimizers]
+        self.optimizers = []
+
+class TrackedOptimizers:
+    """Stands in for torch.optim in gretel's dgan module, registering the optimizers DGAN._train creates"""
+    def __getattr__(self, name):
+        optimizer_class = getattr(torch.optim, name)
+        def create_tracked_optimizer(*args, **kwargs):
+            optimizer = optimizer_class(*args, **kwargs)
+            training_session = current_training_session.get()
+            if training_session is not None:
+                training_session.register_optimizer(optimizer)
+            return optimizer
+        return create_tracked_optimizer
+
+class TrackedTorch:
+    """Stands in for torch in gretel's dgan module, with torch.optim replaced by TrackedOptimizers"""
+    optim = TrackedOptimizers()
+
+    def __getattr__(self, name):
+        return getattr(torch, name)
+
+# DGAN._train creates its optimizers through the torch module of gretel's dgan module, fail at import if that changed
+if not isinstance(getattr(dgan_module, "torch", None), TrackedTorch):
+    if getattr(dgan_module, "torch", None) is not torch or not hasattr(DGAN, "_train"):
+        raise ImportError("Unsupported gretel-synthetics version: DGAN._train and torch in gretel_synthetics.timeseries_dgan.dgan are required for training checkpoints (see requirements.txt)")
+    dgan_module.torch = TrackedTorch()
+
 class DGANER:
     """
     Initialize CTGANER instance with given file path
     ### Note: 
-    - If in "load_mode" file_path will be assumed to be data_artifact path (.csv file)
+    - If in "load_mode" file_path will be assumed to be data_artifact path (.csv or .parquet file)
     - If not in "load_mode" file_path will be assumed to be model path (.pt file)
     """
     def __init__(self, file_path, main_config, load_mode=False, model_encoding_mappings_path=None) -> None:
@@ -54,7 +115,18 @@ class DGANER:
         if not load_mode:
             # Not Load Mode
             self.encodable_encoding_mappings = {}
-            self.data_df = handle_missing_values(pd.read_csv(file_path))
+            # Only the columns DGAN trains on are read, discrete / encodable ones as "category" and the time column as datetime64
+            # (without feature_columns DGAN takes every remaining column as a feature, so every column is read)
+            training_columns = None
+            if self.main_config["feature_columns"] is not None:
+                training_columns = [self.main_config["time_column"], self.main_config["example_id_column"]] + self.main_config["feature_columns"] + (self.main_config["attribute_columns"] or [])
+                training_columns = list(dict.fromkeys(column for column in training_columns if column))
+            self.data_df = handle_missing_values(read_typed_artifact(
+                file_path,
+                columns = training_columns,
+                categorical_columns = (self.main_config["discrete_columns"] or []) + (self.main_config["encodable_columns"] or []),
+                datetime_columns = [self.main_config["time_column"]] if self.main_config["time_column"] else None
+            ))
         else:
             # Load Mode
             self.model = self.model.load(file_path)
@@ -73,54 +145,178 @@ class DGANER:
         #     model_path = os.path.join(project_directory_path, "model.pt")
         #     self.model = self.model.load(model_path)
 
-    def train(self):
-        encoder = OrdinalEncoder()
+    def train(self, progress_callback=None, checkpoint_callback=None, checkpoint_interval=None, training_state=None):
+        """
+        ### Note:
+        - progress_callback(progress_info: ProgressInfo) is called after every batch, next to progress_callbacker
+        - checkpoint_callback(training_state) is called every checkpoint_interval epochs, except after the last one,
+        from the progress callback of the last batch of the epoch (training is not split for checkpoints)
+        - training_state (a checkpoint, or get_warm_start_state) continues training from that state, optimizer state included
+        - With "early_stopping" in the model config, training stops once quality probes plateau: the epochs are then
+        trained in slices of probe_interval epochs, with the optimizer state carried from slice to slice
+        ### Returns:
+        - {"start_epoch", "trained_epochs", "total_epochs", "stopped_early"}
+        """
+        self.training_progress_callback = progress_callback
+        self.checkpoint_callback = checkpoint_callback if checkpoint_interval else None
+        self.checkpoint_interval = checkpoint_interval
+        start_epoch = 0
+        encoding_categories = {}
+        optimizer_states = None
+        if training_state is not None:
+            self.model = DGAN.load(io.BytesIO(training_state["model"]))
+            start_epoch = training_state["epoch"]
+            # Keep the category codes the loaded networks were trained with
+            encoding_categories = training_state["encodable_encoding_mappings"]
+            optimizer_states = training_state.get("optimizers")
+            print("[DGANER][SUCCESS] Training Resumed From Epoch:", start_epoch)
+
         self.encodable_encoding_mappings = {}
         for column in self.encodable_columns:
+            encoder = OrdinalEncoder(categories=[encoding_categories[column]]) if column in encoding_categories else OrdinalEncoder()
             # Encode the column
             self.data_df[column] = encoder.fit_transform(self.data_df[[column]])
             # Store the mapping (encoder.categories_ contains the original values)
             self.encodable_encoding_mappings[column] = encoder.categories_[0]
 
-        self.model.train_dataframe(
-            self.data_df,
-            df_style = self.df_style,
-            example_id_column = self.example_id_column,
-            feature_columns = self.feature_columns,
-            attribute_columns = self.attribute_columns,
-            discrete_columns = self.discrete_columns,
-            time_column = self.time_column,
-            progress_callback = self.progress_callbacker
-            )
+        total_epochs = self.main_config["epochs"]
+        # DGAN reports no losses to callers, so early stopping relies on quality probes between slices
+        early_stopping = EarlyStopping.from_config(self.main_config, watch_losses=False)
+        epochs_per_slice = early_stopping.probe_interval if early_stopping is not None and early_stopping.watch_quality else total_epochs
+        training_summary = {"start_epoch": start_epoch, "trained_epochs": start_epoch, "total_epochs": total_epochs, "stopped_early": False}
+        self.training_session = DGANTrainingSession(optimizer_states)
+        self.epoch_offset = start_epoch
+        while self.epoch_offset < total_epochs:
+            self.model.config.epochs = min(epochs_per_slice, total_epochs - self.epoch_offset)
+            token = current_training_session.set(self.training_session)
+            try:
+                # An already built DGAN keeps its networks and output transformations and continues training
+                self.model.train_dataframe(
+                    self.data_df,
+                    df_style = self.df_style,
+                    example_id_column = self.example_id_column,
+                    feature_columns = self.feature_columns,
+                    attribute_columns = self.attribute_columns,
+                    discrete_columns = self.discrete_columns,
+                    time_column = self.time_column,
+                    progress_callback = self.progress_callbacker
+                    )
+            finally:
+                current_training_session.reset(token)
+                self.training_session.end_train_call()
+            self.epoch_offset += self.model.config.epochs
+            training_summary["trained_epochs"] = self.epoch_offset
+            if self.epoch_offset >= total_epochs:
+                break
+            if early_stopping is not None:
+                if early_stopping.is_probe_due(self.epoch_offset):
+                    early_stopping.add_quality_score(self.run_quality_probe(early_stopping.probe_sample_size))
+                if early_stopping.should_stop(self.epoch_offset):
+                    print("[DGANER][SUCCESS] Early Stopping After Epoch {}/{}".format(self.epoch_offset, total_epochs))
+                    training_summary["stopped_early"] = True
+                    break
+        self.model.config.epochs = total_epochs
+        return training_summary
+
+    def run_quality_probe(self, sample_size):
+        """Scores a few generated sequences against the (encoded) training data"""
+        num_sequences = max(1, sample_size // self.model.config.max_sequence_len)
+        synthetic_data_df = self.model.generate_dataframe(num_sequences)
+        real_data_df = self.data_df.sample(min(sample_size, len(self.data_df)), random_state=0)
+        return quality_probe_score(real_data_df, synthetic_data_df, self.feature_columns)
+
+    def get_training_state(self, epoch):
+        """Everything needed to continue training after `epoch` completed epochs"""
+        model_buffer = io.BytesIO()
+        self.model.save(model_buffer)
+        training_session = self.training_session
+        return {
+            "epoch": epoch,
+            "model": model_buffer.getvalue(),
+            "encodable_encoding_mappings": self.encodable_encoding_mappings,
+            "optimizers": [optimizer.state_dict() for optimizer in training_session.optimizers] if training_session.optimizers else training_session.optimizer_states
+        }
+
+    @staticmethod
+    def get_warm_start_state(model_file_path, model_encoding_mappings_path):
+        """Training state that starts a new training from the networks (and category codes) of a trained model"""
+        with open(model_file_path, "rb") as model_file:
+            model_data = model_file.read()
+        with open(model_encoding_mappings_path, "rb") as pickle_file:
+            encodable_encoding_mappings = pickle.load(pickle_file)
+        return {
+            "epoch": 0,
+            "model": model_data,
+            "encodable_encoding_mappings": encodable_encoding_mappings
+        }
 
     def generate_synthetic_data_df(self, num_examples):
         actual_num_examples = 0
         while (actual_num_examples*self.main_config["max_sequence_len"]) < num_examples:
             actual_num_examples+=1
+        return self.revert_encodable_columns(self.model.generate_dataframe(actual_num_examples))
+
+    def revert_encodable_columns(self, synthetic_data_df):
         if self.encodable_columns:
-            # Create a copy to avoid modifying the original encoded_df
-            reverted_df = self.model.generate_dataframe(actual_num_examples)
-            print(reverted_df)
             # Iterate over the encoding mappings and revert each column
             for column, mapping in self.encodable_encoding_mappings.items():
-                reverted_df[column] = reverted_df[column].astype(int)
-                print(reverted_df)
+                synthetic_data_df[column] = synthetic_data_df[column].astype(int)
                 # Create a mapping from encoded value back to original value
                 inverse_mapping = {i: val for i, val in enumerate(mapping)}
                 # Replace encoded values with original values using the inverse mapping
-                reverted_df[column] = reverted_df[column].map(inverse_mapping)
+                synthetic_data_df[column] = synthetic_data_df[column].map(inverse_mapping)
+        # Return the DataFrame with reverted encoding
+        return synthetic_data_df
 
-            # Return the DataFrame with reverted encoding
-            return reverted_df
-        else:
-            return self.model.generate_dataframe(actual_num_examples)
+    def generate_synthetic_data_batches(self, num_examples, batch_size):
+        """
+        Yields synthetic data in DataFrames of whole sequences until at least num_examples rows are generated
+        ### Note:
+        - Each batch holds batch_size // max_sequence_len sequences (at least one)
+        - Example ids are offset across batches so that every sequence keeps a unique id
+        """
+        max_sequence_len = self.main_config["max_sequence_len"]
+        actual_num_examples = -(-num_examples // max_sequence_len)
+        sequences_per_batch = max(1, batch_size // max_sequence_len)
+        example_id_column = self.example_id_column if self.example_id_column else "example_id"
+        generated_examples = 0
+        while generated_examples < actual_num_examples:
+            current_num_examples = min(sequences_per_batch, actual_num_examples - generated_examples)
+            synthetic_data_batch_df = self.revert_encodable_columns(self.model.generate_dataframe(current_num_examples))
+            if example_id_column in synthetic_data_batch_df.columns and pd.api.types.is_numeric_dtype(synthetic_data_batch_df[example_id_column]):
+                synthetic_data_batch_df[example_id_column] += generated_examples
+            yield synthetic_data_batch_df
+            generated_examples += current_num_examples
+
+    def generate_synthetic_data_csv(self, filename, num_examples, index=False, encoding='utf-8', batch_size=None):
+        """
+        Writes synthetic data to a csv file and returns the number of rows written
+        ### Note:
+        - If batch_size is given, sequences are generated and appended to the file batch by batch
+        so that peak memory depends on batch_size and not on num_examples
+        """
+        if batch_size is None:
+            synthetic_data_df = self.generate_synthetic_data_df(num_examples)
+            synthetic_data_df.to_csv(filename, index = index, encoding=encoding)
+            return len(synthetic_data_df)
 
-    def generate_synthetic_data_csv(self, filename, num_examples, index=False, encoding='utf-8'):
-        self.generate_synthetic_data_df(num_examples).to_csv(filename, index = index, encoding=encoding)
+        num_rows = 0
+        for synthetic_data_batch_df in self.generate_synthetic_data_batches(num_examples, batch_size):
+            synthetic_data_batch_df.to_csv(filename, mode = 'w' if num_rows == 0 else 'a', header = num_rows == 0, index = index, encoding=encoding)
+            num_rows += len(synthetic_data_batch_df)
+        return num_rows
 
     def progress_callbacker(self, progress_callback:ProgressInfo):
+        # Epochs of a training slice are counted from the start of the whole training
+        progress_callback = dataclasses.replace(progress_callback, epoch=getattr(self, "epoch_offset", 0) + progress_callback.epoch, total_epochs=self.main_config["epochs"])
         progress = f"Epoch {progress_callback.epoch}/{progress_callback.total_epochs}, Batch {progress_callback.batch}/{progress_callback.total_batches}: {int(progress_callback.frac_completed * 100)}%"
         print(progress)
+        if getattr(self, "training_progress_callback", None) is not None:
+            self.training_progress_callback(progress_callback)
+        completed_epochs = progress_callback.epoch + 1
+        is_epoch_end = progress_callback.batch + 1 >= progress_callback.total_batches
+        if getattr(self, "checkpoint_callback", None) is not None and is_epoch_end and completed_epochs % self.checkpoint_interval == 0 and completed_epochs < progress_callback.total_epochs:
+            self.checkpoint_callback(self.get_training_state(completed_epochs))
         return progress
 
     def show_df(self):
@@ -0,0 +1,123 @@
+from sdmetrics.single_column import KSComplement, TVComplement
+from dotenv import load_dotenv, find_dotenv
+from collections import deque
+import pandas as pd
+import numpy as np
+import os
+
+load_dotenv(find_dotenv())
+
+# Defaults for model configs that enable "early_stopping" without setting the "early_stopping_*" keys
+EARLY_STOPPING_PATIENCE = int(os.getenv("EARLY_STOPPING_PATIENCE", 20))
+EARLY_STOPPING_MIN_DELTA = float(os.getenv("EARLY_STOPPING_MIN_DELTA", 0.05))
+EARLY_STOPPING_MIN_EPOCHS = int(os.getenv("EARLY_STOPPING_MIN_EPOCHS", 50))
+# Epochs between two quality probes (0 disables probes)
+EARLY_STOPPING_PROBE_INTERVAL = int(os.getenv("EARLY_STOPPING_PROBE_INTERVAL", 25))
+EARLY_STOPPING_PROBE_SAMPLE_SIZE = int(os.getenv("EARLY_STOPPING_PROBE_SAMPLE_SIZE", 1000))
+EARLY_STOPPING_PROBE_PATIENCE = int(os.getenv("EARLY_STOPPING_PROBE_PATIENCE", 2))
+EARLY_STOPPING_PROBE_MIN_DELTA = float(os.getenv("EARLY_STOPPING_PROBE_MIN_DELTA", 0.005))
+# Smoothing factor of the exponential moving average over epoch losses
+EARLY_STOPPING_LOSS_SMOOTHING = 0.1
+
+class EarlyStopping:
+    """
+    Detects when a training run stops improving
+    ### Note:
+    - Losses: plateaued once the smoothed generator and discriminator losses moved less than
+    min_delta (relative to their magnitude, at least 1) over the last `patience` epochs
+    - Quality probes (optional): plateaued once the best probe score did not improve by
+    probe_min_delta for `probe_patience` probes in a row
+    - When both signals are watched both have to plateau, and training never stops before min_epochs
+    """
+    def __init__(self, patience=EARLY_STOPPING_PATIENCE, min_delta=EARLY_STOPPING_MIN_DELTA, min_epochs=EARLY_STOPPING_MIN_EPOCHS,
+                 probe_interval=EARLY_STOPPING_PROBE_INTERVAL, probe_sample_size=EARLY_STOPPING_PROBE_SAMPLE_SIZE,
+                 probe_patience=EARLY_STOPPING_PROBE_PATIENCE, probe_min_delta=EARLY_STOPPING_PROBE_MIN_DELTA, watch_losses=True) -> None:
+        self.patience = patience
+        self.min_delta = min_delta
+        self.min_epochs = min_epochs
+        self.probe_interval = probe_interval
+        self.probe_sample_size = probe_sample_size
+        self.probe_patience = probe_patience
+        self.probe_min_delta = probe_min_delta
+        self.watch_losses = watch_losses
+        self.smoothed_losses = None
+        self.recent_smoothed_losses = deque(maxlen=patience)
+        self.best_quality_score = None
+        self.probes_without_improvement = 0
+
+    @classmethod
+    def from_config(cls, main_config, watch_losses=True):
+        """Returns: EarlyStopping for a model config with "early_stopping" enabled, else None"""
+        if not main_config.get("early_stopping", False):
+            return None
+        return cls(
+            patience = main_config.get("early_stopping_patience", EARLY_STOPPING_PATIENCE),
+            min_delta = main_config.get("early_stopping_min_delta", EARLY_STOPPING_MIN_DELTA),
+            min_epochs = main_config.get("early_stopping_min_epochs", EARLY_STOPPING_MIN_EPOCHS),
+            probe_interval = main_config.get("early_stopping_probe_interval", EARLY_STOPPING_PROBE_INTERVAL),
+            probe_sample_size = main_config.get("early_stopping_probe_sample_size", EARLY_STOPPING_PROBE_SAMPLE_SIZE),
+            watch_losses = watch_losses
+        )
+
+    @property
+    def watch_quality(self):
+        return self.probe_interval > 0
+
+    def is_probe_due(self, completed_epochs):
+        return self.watch_quality and completed_epochs % self.probe_interval == 0
+
+    def add_losses(self, generator_loss, discriminator_loss):
+        if generator_loss is None or discriminator_loss is None:
+            return
+        losses = np.array([generator_loss, discriminator_loss], dtype=float)
+        if self.smoothed_losses is None:
+            self.smoothed_losses = losses
+        else:
+            self.smoothed_losses = EARLY_STOPPING_LOSS_SMOOTHING * losses + (1 - EARLY_STOPPING_LOSS_SMOOTHING) * self.smoothed_losses
+        self.recent_smoothed_losses.append(self.smoothed_losses)
+
+    def add_quality_score(self, quality_score):
+        if self.best_quality_score is None or quality_score > self.best_quality_score + self.probe_min_delta:
+            self.best_quality_score = quality_score
+            self.probes_without_improvement = 0
+        else:
+            self.probes_without_improvement += 1
+        print("[EarlyStopping][SUCCESS] Quality Probe Score: {:.4f} (Best: {:.4f})".format(quality_score, self.best_quality_score))
+
+    def losses_plateaued(self):
+        if len(self.recent_smoothed_losses) < self.patience:
+            return False
+        recent_smoothed_losses = np.array(self.recent_smoothed_losses)
+        loss_ranges = recent_smoothed_losses.max(axis=0) - recent_smoothed_losses.min(axis=0)
+        loss_scales = np.maximum(1.0, np.abs(recent_smoothed_losses[-1]))
+        return bool(np.all(loss_ranges <= self.min_delta * loss_scales))
+
+    def quality_plateaued(self):
+        return self.probes_without_improvement >= self.probe_patience
+
+    def should_stop(self, completed_epochs):
+        if completed_epochs < self.min_epochs:
+            return False
+        if self.watch_losses and not self.losses_plateaued():
+            return False
+        if self.watch_quality and not self.quality_plateaued():
+            return False
+        return self.watch_losses or self.watch_quality
+
+def quality_probe_score(real_data_df, synthetic_data_df, columns=None):
+    """
+    Cheap quality estimate of a synthetic sample: mean KSComplement (numeric columns) /
+    TVComplement (low cardinality columns) over the shared columns, between 0 and 1
+    """
+    columns = [column for column in (columns or real_data_df.columns) if column in synthetic_data_df.columns]
+    column_scores = []
+    for column in columns:
+        real_column, synthetic_column = real_data_df[column].dropna(), synthetic_data_df[column].dropna()
+        if len(real_column) == 0 or len(synthetic_column) == 0:
+            continue
+        if pd.api.types.is_numeric_dtype(real_column) and pd.api.types.is_numeric_dtype(synthetic_column):
+            column_scores.append(KSComplement.compute(real_column, synthetic_column))
+        elif real_column.nunique() <= max(1, len(real_column) // 2):
+            # Near unique columns (ids, free text) score ~0 whatever the model learned
+            column_scores.append(TVComplement.compute(real_column.astype(str), synthetic_column.astype(str)))
+    return float(np.mean(column_scores)) if column_scores else 0.0
@@ -4,7 +4,12 @@ from google.oauth2 import service_account
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 from googleapiclient.http import MediaIoBaseDownload
+import google_auth_httplib2
+import httplib2
 from dotenv import load_dotenv, find_dotenv
+from artifact_cache import artifact_cache
+import threading
+import time
 import io
 import os
 
@@ -14,21 +19,121 @@ SCOPES = [os.getenv("GOOGLE_DRIVE_API_SCOPES")]
 SERVICE_ACCOUNT_FILE = os.getenv("GOOGLE_DRIVE_API_SERVICE_ACCOUNT_FILE")
 PARENT_FOLDER_ID = os.getenv("GOOGLE_DRIVE_API_PARENT_FOLDER_ID")
 CLIENT_BUFFER_FOLDER_NAME = os.getenv("CLIENT_BUFFER_FOLDER_NAME")
+GOOGLE_DRIVE_API_FILE_ID_CACHE_TTL = int(os.getenv("GOOGLE_DRIVE_API_FILE_ID_CACHE_TTL", 300))
+GOOGLE_DRIVE_API_DOWNLOAD_CHUNK_SIZE = int(os.getenv("GOOGLE_DRIVE_API_DOWNLOAD_CHUNK_SIZE", 32 * 1024 * 1024))
+GOOGLE_DRIVE_API_MAX_RETRIES = int(os.getenv("GOOGLE_DRIVE_API_MAX_RETRIES", 5))
+# Must be a multiple of 256 KB
+GOOGLE_DRIVE_API_UPLOAD_CHUNK_SIZE = int(os.getenv("GOOGLE_DRIVE_API_UPLOAD_CHUNK_SIZE", 32 * 1024 * 1024))
+# Files at least this large are uploaded through a resumable session
+GOOGLE_DRIVE_API_RESUMABLE_UPLOAD_THRESHOLD = int(os.getenv("GOOGLE_DRIVE_API_RESUMABLE_UPLOAD_THRESHOLD", 5 * 1024 * 1024))
+
+class DriveIDCache:
+    """
+    Process-wide cache of Google Drive IDs
+    ### Note:
+    - Folder name -> ID map is loaded once and only reloaded on a miss (folders under PARENT_FOLDER_ID are static)
+    - (folder name, file name) -> ID entries expire after file_id_ttl seconds
+    """
+    def __init__(self, file_id_ttl=GOOGLE_DRIVE_API_FILE_ID_CACHE_TTL) -> None:
+        self.file_id_ttl = file_id_ttl
+        self.folder_ids = {}
+        self.file_ids = {}
+        self.lock = threading.Lock()
+
+    def get_folder_id(self, folder_name):
+        with self.lock:
+            return self.folder_ids.get(folder_name)
+
+    def set_folder_ids(self, folder_ids):
+        with self.lock:
+            self.folder_ids = dict(folder_ids)
+
+    def set_folder_id(self, folder_name, folder_id):
+        with self.lock:
+            self.folder_ids[folder_name] = folder_id
+
+    def get_file_id(self, folder_name, file_name):
+        with self.lock:
+            cached_file_id = self.file_ids.get((folder_name, file_name))
+            if cached_file_id is None:
+                return None
+            file_id, expires_on = cached_file_id
+            if expires_on < time.monotonic():
+                del self.file_ids[(folder_name, file_name)]
+                return None
+            return file_id
+
+    def set_file_id(self, folder_name, file_name, file_id):
+        if self.file_id_ttl <= 0:
+            return
+        with self.lock:
+            self.file_ids[(folder_name, file_name)] = (file_id, time.monotonic() + self.file_id_ttl)
+
+    def invalidate_file_id(self, folder_name, file_name):
+        with self.lock:
+            self.file_ids.pop((folder_name, file_name), None)
+
+drive_id_cache = DriveIDCache()
+
+class GoogleDriveClientPool:
+    """
+    Process-wide pool of authenticated Google Drive clients
+    ### Note:
+    - Service account credentials are read once and refreshed under a lock before they expire
+    - httplib2 transports are not thread-safe, so every thread builds its own Drive service
+    (with its own AuthorizedHttp) once and reuses it for all later requests
+    """
+    def __init__(self) -> None:
+        self.creds = None
+        self.lock = threading.Lock()
+        self.thread_local = threading.local()
+
+    def get_credentials(self):
+        with self.lock:
+            if self.creds is None:
+                self.creds = service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+            if not self.creds.valid:
+                self.creds.refresh(google_auth_httplib2.Request(httplib2.Http()))
+            return self.creds
+
+    def get_service(self):
+        creds = self.get_credentials()
+        service = getattr(self.thread_local, "service", None)
+        if service is None:
+            authorized_http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+            service = build('drive', 'v3', http=authorized_http, cache_discovery=False)
+            self.thread_local.service = service
+        return service
+
+drive_client_pool = GoogleDriveClientPool()
 
 class GoogleDriveAPI:
+    """
+    Cheap to construct: credentials and Drive services come from the process-wide drive_client_pool
+    """
     def __init__(self):
         self.creds = self.authenticate()
-        self.service = build('drive', 'v3', credentials=self.creds)
         # Create the directory if it doesn't exist
         os.makedirs(CLIENT_BUFFER_FOLDER_NAME, exist_ok=True)
 
+    @property
+    def service(self):
+        # Resolved on every use so that an instance shared across threads never shares a transport
+        return drive_client_pool.get_service()
+
     def authenticate(self):
-        creds = service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-        return creds
+        return drive_client_pool.get_credentials()
         
-    def upload_file(self, destination_folder_name, file_path):
+    def upload_file(self, destination_folder_name, file_path, progress_callback=None, resumable=None, overwrite=False):
         """Upload a file to the specified folder and prints file ID, folder ID
-        Args: Name of the folder
+        Args:
+            destination_folder_name: Name of the folder
+            file_path: Local file to upload
+            progress_callback: Optional callable(file_name, bytes_uploaded, total_size) called after each chunk
+            resumable: Force (True) or disable (False) a resumable chunked upload, by default
+                files of at least GOOGLE_DRIVE_API_RESUMABLE_UPLOAD_THRESHOLD bytes are uploaded resumably
+            overwrite: Replace the content of a file with the same name in the folder (keeping its ID)
+                instead of creating another file next to it
         Returns: ID of the file uploaded"""
         try:
             # Get the folder ID for corresponding folder name
@@ -38,61 +143,200 @@ class GoogleDriveAPI:
                 return False
             
             # Upload the file to Google Drive
-            file_metadata = {"name": os.path.basename(file_path), "parents": [folder_id]}
-            media = MediaFileUpload(
-                file_path
-            )
+            file_name = os.path.basename(file_path)
+            file_metadata = {"name": file_name, "parents": [folder_id]}
+            if resumable is None:
+                resumable = os.path.getsize(file_path) >= GOOGLE_DRIVE_API_RESUMABLE_UPLOAD_THRESHOLD
+            if resumable:
+                media = MediaFileUpload(
+                    file_path,
+                    chunksize=GOOGLE_DRIVE_API_UPLOAD_CHUNK_SIZE,
+                    resumable=True
+                )
+            else:
+                media = MediaFileUpload(
+                    file_path
+                )
+            existing_file_id = self.get_file_id(destination_folder_name, file_name) if overwrite else None
             # pylint: disable=maybe-no-member
-            file = (
-                self.service.files()
-                .create(body=file_metadata, media_body=media, fields="id")
-                .execute()
-            )
+            if existing_file_id is not None:
+                request = self.service.files().update(fileId=existing_file_id, media_body=media, fields="id")
+            else:
+                request = self.service.files().create(body=file_metadata, media_body=media, fields="id")
+            if resumable:
+                file = self.execute_resumable_upload(request, file_name, progress_callback)
+            else:
+                file = request.execute()
             print(f"[GoogleDriveAPI][SUCCESS] File '{file_path}' uploaded successfully with ID: {file.get('id')}")
+            drive_id_cache.set_file_id(destination_folder_name, file_name, file.get("id"))
+            # Keep a local copy so the next download of this artifact is a local file read
+            try:
+                if existing_file_id is not None:
+                    artifact_cache.invalidate(destination_folder_name + "/" + file_name)
+                artifact_cache.put(destination_folder_name + "/" + file_name, file_path)
+            except Exception as e:
+                print("[ArtifactCache][ERROR] Error Caching Uploaded File: " + str(e))
             return file.get("id")
 
         except Exception as e:
+            # The cached ID of an overwritten file may be stale, look it up again next time
+            drive_id_cache.invalidate_file_id(destination_folder_name, os.path.basename(file_path))
             print("[GoogleDriveAPI] Error Uploading File: " + str(e))
             return False
-        
-    def download_file(self, parent_folder_name, file_name):
+
+    def execute_resumable_upload(self, request, file_name, progress_callback=None):
+        """
+        Sends a resumable upload request chunk by chunk.
+        ### Note:
+        - A failed chunk is retried with backoff up to GOOGLE_DRIVE_API_MAX_RETRIES times
+        - After a failure the client first asks Drive how many bytes arrived and only resends the rest
+        - Client errors (4xx other than 408/429) are not retried
+        Returns: The created file resource
+        """
+        response = None
+        failed_attempts = 0
+        while response is None:
+            try:
+                status, response = request.next_chunk()
+            except (HttpError, httplib2.HttpLib2Error, OSError) as e:
+                if isinstance(e, HttpError) and e.resp.status < 500 and e.resp.status not in (408, 429):
+                    raise
+                failed_attempts += 1
+                if failed_attempts > GOOGLE_DRIVE_API_MAX_RETRIES:
+                    raise
+                print(f"[GoogleDriveAPI][ERROR] Upload of '{file_name}' interrupted, resuming (attempt {failed_attempts}): {str(e)}")
+                time.sleep(2 ** failed_attempts)
+                continue
+            failed_attempts = 0
+            if status is not None and progress_callback is not None:
+                progress_callback(file_name, status.resumable_progress, status.total_size)
+        return response
+
+    def download_file(self, parent_folder_name, file_name, progress_callback=None):
         """
         Downloads a file and saves it locally.
 
         Args:
             parent_folder_name: Name of the folder where the file is located.
             file_name: Name of the file to download.
-            local_filename: Name of the local file to save the downloaded data.
+            progress_callback: Optional callable(file_name, bytes_downloaded, total_size) called after each chunk.
         """
         try:
             local_file_path = os.path.join(CLIENT_BUFFER_FOLDER_NAME, file_name)
+            if not artifact_cache.enabled:
+                return self.download_file_to_path(parent_folder_name, file_name, local_file_path, progress_callback)
+
+            cache_file_path = artifact_cache.get_or_fetch(
+                parent_folder_name + "/" + file_name,
+                # The cache already fetches into its own ".part" file, so the download writes straight into it
+                lambda part_file_path: self.download_file_to_path(parent_folder_name, file_name, part_file_path, progress_callback, part_file_path=part_file_path)
+            )
+            if cache_file_path is None:
+                return False
+            artifact_cache.materialize(cache_file_path, local_file_path)
+            print(f"[GoogleDriveAPI][SUCCESS] File '{file_name}' served from artifact cache at {local_file_path}.")
+            return local_file_path
+        
+        except Exception as e:
+            print("[GoogleDriveAPI][ERROR] Error Downloading File: " + str(e))
+            return False
+
+    def download_file_to_path(self, parent_folder_name, file_name, local_file_path, progress_callback=None, chunk_size=GOOGLE_DRIVE_API_DOWNLOAD_CHUNK_SIZE, part_file_path=None):
+        """
+        Streams a file from Google Drive to the given local path, one chunk at a time.
+        ### Note:
+        - Chunks are written straight to part_file_path ("<local_file_path>.part" by default), which is renamed
+        to local_file_path once complete (a part_file_path equal to local_file_path is not renamed)
+        - A failed chunk is retried with backoff up to GOOGLE_DRIVE_API_MAX_RETRIES times, resuming with a
+        ranged request from the bytes already on disk (also across calls, if a ".part" file was left behind)
+        - A ".part" file left behind already holding the whole file is taken as complete (one larger than the
+        file is discarded), a ranged request past the end would fail on every retry
+        Returns: local_file_path or False
+        """
+        try:
             file_id = self.get_file_id(parent_folder_name, file_name)
             if file_id is None:
                 print(f"[GoogleDriveAPI][ERROR] File '{file_name}' not found in folder '{parent_folder_name}'.")
                 return False
 
-            request = self.service.files().get_media(fileId=file_id)
-            file = io.BytesIO()
-            downloader = MediaIoBaseDownload(file, request)
-            done = False
-            while done is False:
-                status, done = downloader.next_chunk()
-                print(f"Download {int(status.progress() * 100)}%")
+            part_file_path = part_file_path or local_file_path + ".part"
+            part_file_size = os.path.getsize(part_file_path) if os.path.exists(part_file_path) else 0
+            is_part_file_complete = False
+            if part_file_size > 0:
+                file_size = self.service.files().get(fileId=file_id, fields="size").execute().get("size")
+                if file_size is not None and part_file_size == int(file_size):
+                    is_part_file_complete = True
+                elif file_size is not None and part_file_size > int(file_size):
+                    os.remove(part_file_path)
+
+            if not is_part_file_complete:
+                request = self.service.files().get_media(fileId=file_id)
+                with open(part_file_path, 'ab') as part_file:
+                    downloader = MediaIoBaseDownload(part_file, request, chunksize=chunk_size)
+                    # MediaIoBaseDownload requests "Range: bytes=<_progress>-...", so starting it at the
+                    # current size of the .part file resumes an interrupted download
+                    downloader._progress = part_file.tell()
+                    failed_attempts = 0
+                    done = False
+                    while done is False:
+                        try:
+                            status, done = downloader.next_chunk()
+                        except (HttpError, httplib2.HttpLib2Error, OSError) as e:
+                            failed_attempts += 1
+                            if failed_attempts > GOOGLE_DRIVE_API_MAX_RETRIES:
+                                raise
+                            print(f"[GoogleDriveAPI][ERROR] Download of '{file_name}' interrupted, resuming (attempt {failed_attempts}): {str(e)}")
+                            time.sleep(2 ** failed_attempts)
+                            continue
+                        failed_attempts = 0
+                        if progress_callback is not None:
+                            progress_callback(file_name, status.resumable_progress, status.total_size)
 
-            with open(local_file_path, 'wb') as local_file:
-                local_file.write(file.getvalue())
+            if part_file_path != local_file_path:
+                os.replace(part_file_path, local_file_path)
             print(f"[GoogleDriveAPI][SUCCESS] File '{file_name}' downloaded successfully at {local_file_path}.")
             return local_file_path
         
         except Exception as e:
+            # The cached file ID may be stale, look it up again next time
+            drive_id_cache.invalidate_file_id(parent_folder_name, file_name)
             print("[GoogleDriveAPI][ERROR] Error Downloading File: " + str(e))
             return False
         
-    def delete_file(self, parent_folder_name, file_name):
+    def stream_file(self, parent_folder_name, file_name, chunk_size=GOOGLE_DRIVE_API_DOWNLOAD_CHUNK_SIZE):
+        """
+        Yields the bytes of a file chunk by chunk without staging it in the Client Buffer.
+        Served from the artifact cache when the file is cached.
+        """
+        cache_file_path = artifact_cache.get(parent_folder_name + "/" + file_name)
+        if cache_file_path is not None:
+            with open(cache_file_path, 'rb') as cache_file:
+                while True:
+                    chunk = cache_file.read(chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+
+        file_id = self.get_file_id(parent_folder_name, file_name)
+        if file_id is None:
+            raise FileNotFoundError(f"File '{file_name}' not found in folder '{parent_folder_name}'.")
+
+        request = self.service.files().get_media(fileId=file_id)
+        chunk_buffer = io.BytesIO()
+        downloader = MediaIoBaseDownload(chunk_buffer, request, chunksize=chunk_size)
+        done = False
+        while done is False:
+            status, done = downloader.next_chunk(num_retries=GOOGLE_DRIVE_API_MAX_RETRIES)
+            yield chunk_buffer.getvalue()
+            chunk_buffer.seek(0)
+            chunk_buffer.truncate()
+
+    def delete_file(self, parent_folder_name, file_name, permanent=False):
         """Move specified file to the specified folder.
         Args:
             file_id: Id of the file to move.
             folder_id: Id of the folder
+            permanent: Delete the file for good instead of moving it to the "trash" folder
         Print: An object containing the new parent folder and other meta data
         Returns : Parent Ids for the file"""
         try:
@@ -100,7 +344,14 @@ class GoogleDriveAPI:
             if file_id is None:
                 print(f"[GoogleDriveAPI][ERROR] File '{file_name}' not found in folder '{parent_folder_name}'.")
                 return False
-            
+
+            if permanent:
+                self.service.files().delete(fileId=file_id).execute()
+                drive_id_cache.invalidate_file_id(parent_folder_name, file_name)
+                artifact_cache.invalidate(parent_folder_name + "/" + file_name)
+                print(f"[GoogleDriveAPI][SUCCESS] File '{file_name}' deleted successfully.")
+                return True
+
             trash_folder_id = self.get_folder_id("trash")
             if trash_folder_id is None:
                 print(f"[GoogleDriveAPI][ERROR] Trash Folder Not Found.")
@@ -119,6 +370,8 @@ class GoogleDriveAPI:
                 )
                 .execute()
             )
+            drive_id_cache.invalidate_file_id(parent_folder_name, file_name)
+            artifact_cache.invalidate(parent_folder_name + "/" + file_name)
             print(f"[GoogleDriveAPI][SUCCESS] File '{file_name}' moved successfully to trash folder: '{trash_folder_id}'.")
             return True
 
@@ -127,6 +380,11 @@ class GoogleDriveAPI:
             return False
         
     def get_folder_id(self, folder_name):
+        """Returns the ID of a folder under PARENT_FOLDER_ID, listing the folders only on a cache miss"""
+        folder_id = drive_id_cache.get_folder_id(folder_name)
+        if folder_id is not None:
+            return folder_id
+
         try:
             files = []
             page_token = None
@@ -145,10 +403,11 @@ class GoogleDriveAPI:
                 page_token = response.get("nextPageToken", None)
                 if page_token is None:
                     break
-            for file in files:
-                if folder_name == file.get("name"):
-                    print("[GoogleDriveAPI][SUCCESS] Folder '{}' found successfully with ID: {}".format(folder_name, file.get("id")))
-                    return file.get("id")
+            drive_id_cache.set_folder_ids({file.get("name"): file.get("id") for file in files})
+            folder_id = drive_id_cache.get_folder_id(folder_name)
+            if folder_id is not None:
+                print("[GoogleDriveAPI][SUCCESS] Folder '{}' found successfully with ID: {}".format(folder_name, folder_id))
+                return folder_id
 
         except Exception as e:
             print("[GoogleDriveAPI][ERROR] Error Getting Folder ID: " + str(e))
@@ -156,7 +415,29 @@ class GoogleDriveAPI:
         print("[GoogleDriveAPI][ERROR] No Folder Corresponding to name '{}' was found!".format(folder_name))
         return None
     
+    def create_folder(self, folder_name):
+        """Returns the ID of a folder under PARENT_FOLDER_ID, creating the folder if it does not exist yet"""
+        folder_id = self.get_folder_id(folder_name)
+        if folder_id is not None:
+            return folder_id
+
+        try:
+            folder_metadata = {"name": folder_name, "mimeType": "application/vnd.google-apps.folder", "parents": [PARENT_FOLDER_ID]}
+            folder = self.service.files().create(body=folder_metadata, fields="id").execute()
+            drive_id_cache.set_folder_id(folder_name, folder.get("id"))
+            print("[GoogleDriveAPI][SUCCESS] Folder '{}' created successfully with ID: {}".format(folder_name, folder.get("id")))
+            return folder.get("id")
+
+        except Exception as e:
+            print("[GoogleDriveAPI][ERROR] Error Creating Folder: " + str(e))
+            return None
+
     def get_file_id(self, parent_folder_name, file_name):
+        """Returns the ID of a file in a folder, using the TTL'd file ID cache when possible"""
+        file_id = drive_id_cache.get_file_id(parent_folder_name, file_name)
+        if file_id is not None:
+            return file_id
+
         try:
             parent_folder_id = self.get_folder_id(parent_folder_name)
             if parent_folder_id is None:
@@ -183,6 +464,7 @@ class GoogleDriveAPI:
             for file in files:
                 if file_name == file.get("name"):
                     print("[GoogleDriveAPI][SUCCESS] File '{}' found successfully with ID: {}".format(file_name, file.get("id")))
+                    drive_id_cache.set_file_id(parent_folder_name, file_name, file.get("id"))
                     return file.get("id")
 
         except Exception as e:
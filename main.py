@@ -1,8 +1,9 @@
 # API Dependencies
 import uvicorn
-from fastapi import FastAPI, status, File, UploadFile, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, status, File, UploadFile, HTTPException, Depends, BackgroundTasks, Header
 from fastapi.responses import StreamingResponse, HTMLResponse, FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from fastapi.openapi.models import HTTPBase
 from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel
@@ -13,16 +14,22 @@ import shutil
 import json
 import time
 import os
-from sqlalchemy.orm import Session
-from database import Base, engine, SessionLocal, Users, Projects, Models, ModelConfigs, ModelLogs, DataArtifacts, SyntheticDataArtifacts, SyntheticQualityReports
+from sqlalchemy.orm import Session, joinedload
+from database import Base, engine, SessionLocal, Users, Projects, Models, ModelConfigs, ModelLogs, DataArtifacts, SyntheticDataArtifacts, SyntheticQualityReports, TrainingJobs
 # from models import CreateNewProjectRequest, CreateNewProjectResponse, UpdateEmptyProjectRequest, UpdateEmptyProjectResponse, UpdatePendingProjectRequest, UpdatePendingProjectResponse, GenerateSyntheticDataRequest, GenerateSyntheticDataResponse, GetAllProjectsResponse
 from models import *
-from model_helpers import AutoSyntheticConfigurator, synthetic_model_trainer, synthetic_model_data_generator
-from api_helpers import get_model_configuration, start_model_training
+from model_helpers import AutoSyntheticConfigurator, synthetic_model_trainer, synthetic_model_data_generator, synthetic_model_data_streamer, synthetic_model_schema, SYNTHETIC_DATA_STREAMING_MEDIA_TYPES
+from api_helpers import get_model_configuration, start_model_training, get_synthetic_model_loader
+from csv_upload import StreamingCSVUploadWriter, UPLOAD_CHUNK_SIZE
 from synthetic_quality_report import SyntheticQualityAssurance
+from training_logs import read_model_log_data
+from artifact_formats import ARTIFACT_FILE_EXTENSIONS, ARTIFACT_MEDIA_TYPES, DATA_ARTIFACT_FORMAT, SYNTHETIC_DATA_ARTIFACT_FORMAT, convert_csv_to_parquet, stream_parquet_as_csv
+from column_profiler import load_column_profile, store_column_profile
+from training_progress import training_progress_event_stream
+from training_queue import enqueue_training_job, get_active_training_job, get_training_queue_position, start_training_workers, API_TRAINING_WORKER_CONCURRENCY
 from ctgan_model import CTGANER
 from dgan_model import DGANER
-from google_drive_api import GoogleDriveAPI
+from artifact_storage import get_artifact_storage
 import auth
 from typing import Annotated
 from dotenv import load_dotenv, find_dotenv
@@ -54,6 +61,13 @@ app.add_middleware(
 # models.Base.metadata.create_all(bind=engine)
 Base.metadata.create_all(bind=engine)
 
+@app.on_event("startup")
+def start_training_worker_pool():
+    # Training runs in separate worker processes so the API process stays responsive, by default
+    # they are started on their own with "python training_queue.py --workers <n>"
+    if API_TRAINING_WORKER_CONCURRENCY > 0:
+        start_training_workers(API_TRAINING_WORKER_CONCURRENCY)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -104,7 +118,7 @@ def get_data_artifact_metadata(user: user_dependency, db: db_dependency, project
     if project_db_record is None or project_db_record.user_id != user["id"] or project_db_record.data_artifact_id is None:
         raise HTTPException(status_code=status.HTTP_204_NO_CONTENT, detail="Specified Data Artifact from Project Was Not Found!")
     
-    data_artifact_db_record = db.query(DataArtifacts).filter(DataArtifacts.id == project_db_record.data_artifact_id).first()
+    data_artifact_db_record = project_db_record.data_artifact
 
     return GetDataArtifactMetadataResponse(
         project_id = project_db_record.project_id,
@@ -121,7 +135,7 @@ def get_project_synthetic_data_artifacts_metadata(user: user_dependency, db: db_
     if project_db_record is None or project_db_record.user_id != user["id"] or (project_db_record.status != "completed" and project_db_record.status != "training"):
         raise HTTPException(status_code=status.HTTP_204_NO_CONTENT, detail="Specified Synthetic Data Artifact from Project Was Not Found!")
     
-    synthetic_data_artifact_db_record = db.query(SyntheticDataArtifacts).filter(SyntheticDataArtifacts.project_id == project_db_record.id).all()
+    synthetic_data_artifact_db_record = project_db_record.synthetic_data_artifacts
 
     synthetic_data_artifacts_metadata_list: list[SyntheticDataArtifactMetadata] = []
 
@@ -164,7 +178,7 @@ def get_model_config(user: user_dependency, db: db_dependency, project_id: str):
     if project_db_record is None or project_db_record.user_id != user["id"] or project_db_record.model_config_id is None:
         raise HTTPException(status_code=status.HTTP_204_NO_CONTENT, detail="Specified Project or it's Model Config Was Not Found!")
     
-    model_config_db_record = db.query(ModelConfigs).filter(ModelConfigs.id == project_db_record.model_config_id).first()
+    model_config_db_record = project_db_record.model_config
     if model_config_db_record is None or model_config_db_record.user_id != user["id"]:
         raise HTTPException(status_code=status.HTTP_204_NO_CONTENT, detail="Specified Project or it's Model Config Was Not Found!")
     
@@ -180,23 +194,36 @@ def get_model_logs(user: user_dependency, db: db_dependency, project_id: str):
     if project_db_record is None or project_db_record.user_id != user["id"] or project_db_record.model_log_id is None:
         raise HTTPException(status_code=status.HTTP_204_NO_CONTENT, detail="Specified Project or it's Model Logs Were Not Found!")
     
-    model_logs_db_record = db.query(ModelLogs).filter(ModelLogs.id == project_db_record.model_log_id).first()
+    model_logs_db_record = project_db_record.model_log
     
     return GetModelLogsResponse(
         project_id = project_db_record.project_id,
         ModelLog_id = model_logs_db_record.model_log_id,
-        ModelLog_data = model_logs_db_record.model_log_data,
+        ModelLog_data = read_model_log_data(db, model_logs_db_record),
         created_on = model_logs_db_record.created_on,
         updated_on = model_logs_db_record.updated_on
     )
 
+@app.get("/stream_training_progress/{project_id}")
+def stream_training_progress(user: user_dependency, db: db_dependency, project_id: str, last_event_id: Annotated[Optional[int], Header()] = None):
+    project_db_record = db.query(Projects).filter(Projects.project_id == project_id).first()
+    if project_db_record is None or project_db_record.user_id != user["id"]:
+        raise HTTPException(status_code=status.HTTP_204_NO_CONTENT, detail="Specified Project Was Not Found!")
+    
+    # Server-Sent Events, reconnecting clients resume after the Last-Event-ID they received
+    return StreamingResponse(
+        training_progress_event_stream(project_db_record.id, last_event_id or 0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/get_synthetic_quality_report/{project_id}")
 def get_synthetic_quality_report(user: user_dependency, db: db_dependency, project_id: str):
     project_db_record = db.query(Projects).filter(Projects.project_id == project_id).first()
     if project_db_record is None or project_db_record.user_id != user["id"] or project_db_record.synthetic_quality_report_id is None:
         raise HTTPException(status_code=status.HTTP_204_NO_CONTENT, detail="Specified Project or it's Synthetic Quality Report Was Not Found!")
     
-    synthetic_quality_report_db_record = db.query(SyntheticQualityReports).filter(SyntheticQualityReports.id == project_db_record.synthetic_quality_report_id).first()
+    synthetic_quality_report_db_record = project_db_record.synthetic_quality_report
     synthetic_quality_report_data = ast.literal_eval(synthetic_quality_report_db_record.synthetic_quality_report_data)
     
     return GetSyntheticQualityReportResponse(
@@ -215,66 +242,96 @@ def get_synthetic_quality_report(user: user_dependency, db: db_dependency, proje
     )
 
 @app.get("/download_synthetic_data/{synthetic_data_artifact_id}")
-def download_synthetic_data(user: user_dependency, db: db_dependency, synthetic_data_artifact_id: str, background_tasks: BackgroundTasks):
+def download_synthetic_data(user: user_dependency, db: db_dependency, synthetic_data_artifact_id: str, background_tasks: BackgroundTasks, output_format: Optional[str] = None):
     synthetic_data_artifact_db_record = db.query(SyntheticDataArtifacts).filter(SyntheticDataArtifacts.synthetic_data_artifact_id == synthetic_data_artifact_id).first()
     if synthetic_data_artifact_db_record is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Synthetic Data Artifact Not Found!")
     if synthetic_data_artifact_db_record.user_id != user["id"]:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Synthetic Data Artifact Not AUthorized For Client!")
     
-    synthetic_data_artifact_file_name = synthetic_data_artifact_db_record.synthetic_data_artifact_id + synthetic_data_artifact_db_record.file_extension
+    # Clients pick "csv" or "parquet", by default the artifact is served as csv whatever format it is stored in
+    output_format = output_format or "csv"
+    if output_format not in ARTIFACT_FILE_EXTENSIONS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Output Format Must Be One Of: " + ", ".join(ARTIFACT_FILE_EXTENSIONS))
+    stored_file_extension = synthetic_data_artifact_db_record.file_extension
+    file_extension = ARTIFACT_FILE_EXTENSIONS[output_format]
+    synthetic_data_artifact_file_name = synthetic_data_artifact_db_record.synthetic_data_artifact_id + stored_file_extension
+    download_file_name = synthetic_data_artifact_db_record.synthetic_data_artifact_id + file_extension
+    headers = {"Content-Disposition": f"attachment; filename={download_file_name}"}
+
+    artifact_storage = get_artifact_storage()
+    if file_extension == stored_file_extension:
+        # Stream the Synthetic Data Artifact from Artifact Storage without staging it in the Client Buffer
+        if not artifact_storage.exists("synthetic_data_artifacts", synthetic_data_artifact_file_name):
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error Downloading Synthetic Data Artifact File!")
+        print("[SyntheticDataDownloader][SUCCESS] Synthetic Data Downloaded For Client Successfully!: " + synthetic_data_artifact_id)
+        return StreamingResponse(
+                artifact_storage.stream("synthetic_data_artifacts", synthetic_data_artifact_file_name),
+                media_type=ARTIFACT_MEDIA_TYPES[file_extension],
+                headers=headers
+            )
 
-    # Download Model and Encoding file from Google Drive
-    google_drive_api = GoogleDriveAPI()
-    gdrive_response = google_drive_api.download_file("synthetic_data_artifacts", synthetic_data_artifact_file_name)
-    
-    if not gdrive_response:
+    # Another format is converted in the Client Buffer (Deleted in a Background Task)
+    storage_response = artifact_storage.get("synthetic_data_artifacts", synthetic_data_artifact_file_name)
+    if not storage_response:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error Downloading Synthetic Data Artifact File!")
-    
-    synthetic_data_artifact_file_path = gdrive_response
-    
-    # Delete the file from the Client Buffer (Background Task)
-    background_tasks.add_task(os.remove, synthetic_data_artifact_file_path)
-
-    print("[SyntheticDataDownloader][SUCCESS] Synthetic Data Downloaded For Client Successfully!: " + synthetic_data_artifact_id)
+    synthetic_data_artifact_local_file_path = storage_response
+    print("[SyntheticDataDownloader][SUCCESS] Synthetic Data Converted For Client Successfully!: " + synthetic_data_artifact_id + " " + file_extension)
+
+    if file_extension == ARTIFACT_FILE_EXTENSIONS["csv"]:
+        background_tasks.add_task(os.remove, synthetic_data_artifact_local_file_path)
+        return StreamingResponse(
+                stream_parquet_as_csv(synthetic_data_artifact_local_file_path),
+                media_type=ARTIFACT_MEDIA_TYPES[file_extension],
+                headers=headers
+            )
 
-    return FileResponse(
-            synthetic_data_artifact_file_path, 
-            media_type='text/csv',
-            filename=synthetic_data_artifact_file_name,
-            headers={"Content-Disposition": f"attachment; filename={synthetic_data_artifact_file_name}"}
-        )
+    try:
+        parquet_file_path, _ = convert_csv_to_parquet(synthetic_data_artifact_local_file_path)
+    except Exception as e:
+        print("[SyntheticDataDownloader][ERROR] Error Converting Synthetic Data Artifact To Parquet:", str(e))
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error Converting Synthetic Data Artifact To Parquet!")
+    finally:
+        os.remove(synthetic_data_artifact_local_file_path)
+    background_tasks.add_task(os.remove, parquet_file_path)
+    return FileResponse(parquet_file_path, media_type=ARTIFACT_MEDIA_TYPES[file_extension], headers=headers)
 
 @app.post("/upload_data_artifact")
 async def upload_data_artifact(user: user_dependency, db: db_dependency, background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     # Generate a unique ID for this upload
     data_artifact_id = "data_" + str(uuid.uuid4())
-    google_drive_api = GoogleDriveAPI()
+    artifact_storage = get_artifact_storage()
 
     # Define the file path
     data_artifact_local_file_name = data_artifact_id + ".csv"
     data_artifact_local_file_path = os.path.join(CLIENT_BUFFER_FOLDER_NAME, data_artifact_local_file_name)
  
-    # Save the uploaded file to the Client Buffer
-    with open(data_artifact_local_file_path, "wb+") as file_object:
-        file_object.write(await file.read())
-
-    # Step 1: Read the CSV file into a DataFrame
-    data_artifact_df = pd.read_csv(data_artifact_local_file_path)
-
-    # Step 2: Iterate through the column names and remove single quotes
-    data_artifact_df.columns = [col.replace("'", "") for col in data_artifact_df.columns]
-
-    # Step 3: Save the modified DataFrame back to a CSV file
-    data_artifact_df.to_csv(data_artifact_local_file_path, index=False)
-
-    # Get number of rows in the data artifact file
-    num_rows = len(data_artifact_df)
-
-    # Upload file to Google Drive Glacier Service
-    gdrive_response = google_drive_api.upload_file("data_artifacts", data_artifact_local_file_path)
-
-    if not gdrive_response:
+    # Stream the uploaded file to the Client Buffer, removing single quotes from the column names
+    # and counting the rows on the way
+    with open(data_artifact_local_file_path, "wb") as file_object:
+        csv_upload_writer = StreamingCSVUploadWriter(file_object)
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            csv_upload_writer.write(chunk)
+        num_rows = csv_upload_writer.close()
+
+    # Convert the csv once, every later stage reads the columnar artifact (a csv that fails to convert is kept as is)
+    file_extension = ARTIFACT_FILE_EXTENSIONS["csv"]
+    if DATA_ARTIFACT_FORMAT == "parquet":
+        try:
+            parquet_file_path, num_rows = await run_in_threadpool(convert_csv_to_parquet, data_artifact_local_file_path)
+            os.remove(data_artifact_local_file_path)
+            data_artifact_local_file_path = parquet_file_path
+            file_extension = ARTIFACT_FILE_EXTENSIONS["parquet"]
+        except Exception as e:
+            print("[DataArtifactConverter][NOTICE] Keeping Data Artifact As CSV, Parquet Conversion Failed:", str(e))
+
+    # Upload file to Artifact Storage
+    storage_response = artifact_storage.put("data_artifacts", data_artifact_local_file_path)
+
+    if not storage_response:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error Uploading Data Artifact. Please try again!")
     
     # Delete the file from the Client Buffer (Background Task)
@@ -282,6 +339,7 @@ async def upload_data_artifact(user: user_dependency, db: db_dependency, backgro
 
     data_artifact_db_record = DataArtifacts(
         data_artifact_id = data_artifact_id,
+        file_extension = file_extension,
         original_filename = file.filename,
         num_rows = num_rows,
         user_id = user['id']
@@ -320,15 +378,28 @@ def create_new_project(user: user_dependency, db: db_dependency, project_data: C
     
 @app.post("/update_empty_project")
 def update_empty_project(user: user_dependency, db: db_dependency, project_data: UpdateEmptyProjectRequest, background_tasks: BackgroundTasks):
+    project_db_record = db.query(Projects).filter(Projects.project_id == project_data.project_id).first()
+    if project_db_record is None or project_db_record.user_id != user["id"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project Not Found!")
+    data_artifact_db_record = db.query(DataArtifacts).filter(DataArtifacts.data_artifact_id == project_data.data_artifact_id).first()
+    if data_artifact_db_record is None or data_artifact_db_record.user_id != user["id"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Data Artifact Not Found!")
+
     model_config_id = "model_config_" + str(uuid.uuid4())
-    google_drive_api = GoogleDriveAPI()
-    gdrive_response = google_drive_api.download_file("data_artifacts", project_data.data_artifact_id + ".csv")
-    
-    if not gdrive_response:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error Downloading Data Artifact!")
-    
-    data_artifact_file_path = gdrive_response
-    model_config = get_model_configuration(data_artifact_file_path, project_data.modelType)
+    # The data artifact is only downloaded (and profiled) until its column profile is cached
+    column_profile = load_column_profile(data_artifact_db_record)
+    data_artifact_file_path = None
+    if column_profile is None:
+        artifact_storage = get_artifact_storage()
+        storage_response = artifact_storage.get("data_artifacts", data_artifact_db_record.data_artifact_id + data_artifact_db_record.file_extension)
+        if not storage_response:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error Downloading Data Artifact!")
+        data_artifact_file_path = storage_response
+
+    model_config, column_profile = get_model_configuration(data_artifact_file_path, project_data.modelType, column_profile)
+    if data_artifact_file_path is not None:
+        # Delete the file from the Client Buffer, the column profile is all that is needed from here on
+        os.remove(data_artifact_file_path)
 
     if model_config == None:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error While Generating Model Configuration For Data Artifact: "+project_data.data_artifact_id+" Project ID: "+project_data.project_id)
@@ -339,95 +410,147 @@ def update_empty_project(user: user_dependency, db: db_dependency, project_data:
     model_config_db_record = ModelConfigs(
             model_config_id = model_config_id,
             model_config_data = json.dumps(model_config),
-            project_id = db.query(Projects).filter(Projects.project_id == project_data.project_id).first().id,
+            project_id = project_db_record.id,
             user_id = user["id"]
         )
-    try:
-        db.add(model_config_db_record)
-        db.commit()
-        print("[Database][SUCCESS] New Model Config Created Successfully:", model_config_id)
-    except Exception as e:
-        print("[Database][ERROR] Failed To Create New Model Config:",str(e))
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Error Creating New Model Config Record!")
-
-    project_db_record = db.query(Projects).filter(Projects.project_id == project_data.project_id).first()
+    # The Model Config and the Project update go out in one transaction, the relationships
+    # fill in the foreign keys once the new Model Config is flushed
     project_db_record.model_type = project_data.modelType
-    project_db_record.data_artifact_id = db.query(DataArtifacts).filter(DataArtifacts.data_artifact_id == project_data.data_artifact_id).first().id
-    project_db_record.model_config_id = db.query(ModelConfigs).filter(ModelConfigs.model_config_id == model_config_id).first().id
+    project_db_record.data_artifact = data_artifact_db_record
+    project_db_record.model_config = model_config_db_record
     project_db_record.status = "pending"
+    if data_artifact_file_path is not None:
+        store_column_profile(data_artifact_db_record, column_profile)
     try:
+        db.add(model_config_db_record)
         db.commit()
-        print("[Database][SUCCESS] Empty Project Updated Successfully:", project_data.project_id)
+        print("[Database][SUCCESS] New Model Config Created and Empty Project Updated Successfully:", model_config_id, project_data.project_id)
     except Exception as e:
-        print("[Database][ERROR] Failed To Update Empty Project:", str(e))
+        db.rollback()
+        print("[Database][ERROR] Failed To Create New Model Config / Update Empty Project:", str(e))
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Error Updating Empty Project Record!")
-    
-    # Delete the file from the Client Buffer (Background Task)
-    background_tasks.add_task(os.remove, data_artifact_file_path)
-    
+
     return UpdateEmptyProjectResponse(
         project_id =  project_data.project_id,
-        modelConfig_id = model_config_id
+        modelConfig_id = model_config_id,
+        sampling_report = column_profile.get("sampling_report")
     )
 
 @app.post("/update_pending_project")
-def update_pending_project(user: user_dependency, db: db_dependency, project_data: UpdatePendingProjectRequest, background_tasks: BackgroundTasks):
+def update_pending_project(user: user_dependency, db: db_dependency, project_data: UpdatePendingProjectRequest):
+    project_db_record = db.query(Projects).filter(Projects.project_id == project_data.project_id).first()
+    if project_db_record is None or project_db_record.user_id != user["id"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project Not Found!")
+    # Pending and failed projects train, completed ones retrain into a new model
+    if project_db_record.status == "empty" or project_db_record.model_config_id is None:
+        raise HTTPException(status_code=status.HTTP_425_TOO_EARLY, detail="Project Has No Model Config Yet!")
+    if project_db_record.status not in ("pending", "training_failed", "completed"):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Project Cannot Be Trained In Status: " + str(project_db_record.status))
+
+    if project_data.warm_start_model_id is not None:
+        warm_start_model_db_record = db.query(Models).filter(Models.model_id == project_data.warm_start_model_id).first()
+        if warm_start_model_db_record is None or warm_start_model_db_record.user_id != user["id"]:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Warm Start Model Not Found!")
+        if warm_start_model_db_record.model_type != project_db_record.model_type:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Warm Start Model Type Does Not Match Project Model Type!")
+        # The warm start model's encodings are reused, so it must have been trained on the same columns
+        warm_start_model_config_data = warm_start_model_db_record.model_config_data
+        if warm_start_model_config_data is None:
+            # Models from before Models.model_config_data: the config of the project the model is still the current model of
+            warm_start_project_db_record = db.query(Projects).options(joinedload(Projects.model_config)).filter(Projects.model_id == warm_start_model_db_record.id).first()
+            if warm_start_project_db_record is not None and warm_start_project_db_record.model_config is not None:
+                warm_start_model_config_data = warm_start_project_db_record.model_config.model_config_data
+        if warm_start_model_config_data is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Warm Start Model Config Not Found!")
+        try:
+            model_schema = synthetic_model_schema(project_db_record.model_type, json.loads(project_data.modelConfig_data))
+            warm_start_model_schema = synthetic_model_schema(warm_start_model_db_record.model_type, json.loads(str(warm_start_model_config_data)))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Model Config!")
+        if model_schema != warm_start_model_schema:
+            mismatched_keys = [key for key in dict.fromkeys(list(model_schema) + list(warm_start_model_schema)) if model_schema.get(key) != warm_start_model_schema.get(key)]
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Warm Start Model Was Trained On Different Columns: " + ", ".join(mismatched_keys))
+
+    if get_active_training_job(db, project_db_record.id) is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Project Already Has A Queued Or Running Training Job!")
+
     model_log_id = "model_log_" + str(uuid.uuid4())
-    background_tasks.add_task(start_model_training, model_log_id, user["id"], project_data)
+    try:
+        training_job_db_record = enqueue_training_job(db, model_log_id, user["id"], project_db_record, project_data)
+    except Exception as e:
+        print("[Database][ERROR] Failed To Queue Training Job:", str(e))
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Error Queueing Training Job!")
 
     return UpdatePendingProjectResponse(
         project_id =  project_data.project_id,
-        modelLog_id = model_log_id
+        modelLog_id = training_job_db_record.model_log_id
+    )
+
+@app.get("/get_training_job/{project_id}")
+def get_training_job(user: user_dependency, db: db_dependency, project_id: str):
+    project_db_record = db.query(Projects).filter(Projects.project_id == project_id).first()
+    if project_db_record is None or project_db_record.user_id != user["id"]:
+        raise HTTPException(status_code=status.HTTP_204_NO_CONTENT, detail="Specified Project Was Not Found!")
+
+    training_job_db_record = db.query(TrainingJobs).filter(TrainingJobs.project_id == project_db_record.id).order_by(TrainingJobs.id.desc()).first()
+    if training_job_db_record is None:
+        raise HTTPException(status_code=status.HTTP_204_NO_CONTENT, detail="Specified Project Has No Training Job!")
+
+    return GetTrainingJobResponse(
+        project_id = project_db_record.project_id,
+        training_job_id = training_job_db_record.training_job_id,
+        modelLog_id = training_job_db_record.model_log_id,
+        status = training_job_db_record.status,
+        priority = training_job_db_record.priority,
+        attempts = training_job_db_record.attempts,
+        queue_position = get_training_queue_position(db, training_job_db_record),
+        created_on = training_job_db_record.created_on,
+        started_on = training_job_db_record.started_on,
+        finished_on = training_job_db_record.finished_on,
+        error = training_job_db_record.error
+    )
+
+@app.get("/get_all_training_jobs")
+def get_all_training_jobs(user: user_dependency, db: db_dependency):
+    training_job_db_records = db.query(TrainingJobs).filter(TrainingJobs.user_id == user["id"]).order_by(TrainingJobs.id.desc()).all()
+
+    training_jobs = [{"training_job_id":training_job.training_job_id, "modelLog_id":training_job.model_log_id, "status":training_job.status, "priority":training_job.priority, "attempts":training_job.attempts, "created_on":training_job.created_on, "started_on":training_job.started_on, "finished_on":training_job.finished_on, "error":training_job.error} for training_job in training_job_db_records]
+
+    return GetTrainingJobsResponse(
+        training_jobs = training_jobs
     )
 
 @app.post("/generate_synthetic_data")
 def generate_synthetic_data(user: user_dependency, db: db_dependency, project_data: GenerateSyntheticDataRequest, background_tasks: BackgroundTasks):
-    project_db_record = db.query(Projects).filter(Projects.project_id == project_data.project_id).first()
+    project_db_record = db.query(Projects).options(joinedload(Projects.model), joinedload(Projects.model_config)).filter(Projects.project_id == project_data.project_id).first()
     if project_db_record is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project Not Found!")
     if project_db_record.status != "completed":
         raise HTTPException(status_code=status.HTTP_425_TOO_EARLY, detail="Project Status Not Completed Yet!")
     
-    model_db_record = db.query(Models).filter(Models.id == project_db_record.model_id).first()
-    model_config_db_record = db.query(ModelConfigs).filter(ModelConfigs.id == project_db_record.model_config_id).first()
-    model_file_name = model_db_record.model_id + model_db_record.file_extension
+    model_db_record = project_db_record.model
+    model_config_db_record = project_db_record.model_config
 
-    # Download Model and Encoding file from Google Drive
-    google_drive_api = GoogleDriveAPI()
-    gdrive_response = google_drive_api.download_file("models", model_file_name)
-    
-    if not gdrive_response:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error Downloading Model File!")
-    
-    model_file_path = gdrive_response
-
-    if project_db_record.model_type == "dgan":
-        model_encoding_mappings_file_name = "encodings_" + model_db_record.model_id + ".pkl"
-        gdrive_response = google_drive_api.download_file("model_encoding_mappings", model_encoding_mappings_file_name)
-        if not gdrive_response:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error Downloading Model File!")
-        model_encoding_mappings_file_path = gdrive_response
+    # Load Model (and Encoding mappings) from the Model Cache or Artifact Storage
+    artifact_storage = get_artifact_storage()
+    model_loader = get_synthetic_model_loader(artifact_storage, project_db_record, model_db_record, json.loads(model_config_db_record.model_config_data))
 
     # Generate Synthetic Data
     synthetic_data_artifact_id = "synthiumAI_" + project_db_record.model_type + "_" + str(uuid.uuid4())
-    synthetic_data_artifact_local_file_name = synthetic_data_artifact_id + ".csv"
+    file_extension = ARTIFACT_FILE_EXTENSIONS[SYNTHETIC_DATA_ARTIFACT_FORMAT]
+    synthetic_data_artifact_local_file_name = synthetic_data_artifact_id + file_extension
     synthetic_data_artifact_local_file_path = os.path.join(CLIENT_BUFFER_FOLDER_NAME, synthetic_data_artifact_local_file_name)
     
-    synthetic_model_data_generator(
+    num_rows = synthetic_model_data_generator(
         project_data.num_rows,
         synthetic_data_artifact_local_file_path,
-        model_file_path,
-        json.loads(model_config_db_record.model_config_data),
-        project_db_record.model_type,
-        model_encoding_mappings_file_path if project_db_record.model_type == "dgan" else None
+        model_loader
     )
 
-    # Get number of rows in the synthetic data artifact file
-    num_rows = len(pd.read_csv(synthetic_data_artifact_local_file_path))
-
     # Create Synthetic Data Artifact DB Record
     synthetic_data_artifact_db_record = SyntheticDataArtifacts(
             synthetic_data_artifact_id = synthetic_data_artifact_id,
+            file_extension = file_extension,
             num_rows = num_rows,
             project_id = project_db_record.id,
             user_id = user["id"]
@@ -440,15 +563,12 @@ def generate_synthetic_data(user: user_dependency, db: db_dependency, project_da
         print("[Database][ERROR] Failed To Create New Synthetic Data Artifact:",str(e))
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Error Creating New Synthetic Data Artifact Record!")
 
-    # Upload Synthetic Data Artifact to Google Drive
-    gdrive_response = google_drive_api.upload_file("synthetic_data_artifacts", synthetic_data_artifact_local_file_path)
-    if not gdrive_response:
+    # Upload Synthetic Data Artifact to Artifact Storage
+    storage_response = artifact_storage.put("synthetic_data_artifacts", synthetic_data_artifact_local_file_path)
+    if not storage_response:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error Uploading Synthetic Data Artifact File!")
     
     # Delete the file from the Client Buffer (Background Task)
-    background_tasks.add_task(os.remove, model_file_path)
-    if project_db_record.model_type == "dgan":
-        background_tasks.add_task(os.remove, model_encoding_mappings_file_path)
     background_tasks.add_task(os.remove, synthetic_data_artifact_local_file_path)
 
     print("[SyntheticDataGenerator][SUCCESS] Synthetic Data Generated Successfully!: " + synthetic_data_artifact_id)
@@ -458,6 +578,32 @@ def generate_synthetic_data(user: user_dependency, db: db_dependency, project_da
         synthetic_data_artifact_id = synthetic_data_artifact_id
     )
 
+@app.post("/stream_synthetic_data")
+def stream_synthetic_data(user: user_dependency, db: db_dependency, project_data: StreamSyntheticDataRequest):
+    project_db_record = db.query(Projects).options(joinedload(Projects.model), joinedload(Projects.model_config)).filter(Projects.project_id == project_data.project_id).first()
+    if project_db_record is None or project_db_record.user_id != user["id"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project Not Found!")
+    if project_db_record.status != "completed":
+        raise HTTPException(status_code=status.HTTP_425_TOO_EARLY, detail="Project Status Not Completed Yet!")
+    if project_data.output_format not in SYNTHETIC_DATA_STREAMING_MEDIA_TYPES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Output Format Must Be One Of: " + ", ".join(SYNTHETIC_DATA_STREAMING_MEDIA_TYPES))
+
+    model_db_record = project_db_record.model
+    model_config_db_record = project_db_record.model_config
+
+    # Load Model (and Encoding mappings) from the Model Cache or Artifact Storage
+    artifact_storage = get_artifact_storage()
+    model_loader = get_synthetic_model_loader(artifact_storage, project_db_record, model_db_record, json.loads(model_config_db_record.model_config_data))
+
+    synthetic_data_file_name = "synthiumAI_" + project_db_record.model_type + "_" + str(uuid.uuid4()) + "." + project_data.output_format
+    print("[SyntheticDataStreamer][SUCCESS] Streaming Synthetic Data For Client: " + synthetic_data_file_name)
+
+    return StreamingResponse(
+            synthetic_model_data_streamer(model_loader, project_data.num_rows, project_data.output_format),
+            media_type=SYNTHETIC_DATA_STREAMING_MEDIA_TYPES[project_data.output_format],
+            headers={"Content-Disposition": f"attachment; filename={synthetic_data_file_name}"}
+        )
+
 @app.get("/config/{key}")
 def get_config(user: user_dependency, key: str, model="ctgan"):
     folder_path = os.path.join("client", key)
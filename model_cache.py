@@ -0,0 +1,59 @@
+from collections import OrderedDict
+from dotenv import load_dotenv, find_dotenv
+import threading
+import os
+
+load_dotenv(find_dotenv())
+
+MODEL_CACHE_MAX_ENTRIES = int(os.getenv("MODEL_CACHE_MAX_ENTRIES", 8))
+MODEL_CACHE_MAX_BYTES = int(os.getenv("MODEL_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+class SyntheticModelCache:
+    """
+    In-process LRU cache of loaded synthetic models (CTGANER | DGANER in load mode)
+    ### Note:
+    - Keyed by Models.model_id, every training run creates a new model_id, so a retrained project is a cache
+    miss and its previous model just ages out (nothing has to be invalidated from the training workers)
+    - Evicts least recently used models once either max_entries or max_bytes is exceeded
+    - estimated_size is the on-disk size of the model files, a close proxy for their unpickled size
+    """
+    def __init__(self, max_entries=MODEL_CACHE_MAX_ENTRIES, max_bytes=MODEL_CACHE_MAX_BYTES) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, model_id):
+        with self.lock:
+            if model_id not in self.entries:
+                return None
+            self.entries.move_to_end(model_id)
+            model_loader, estimated_size = self.entries[model_id]
+            return model_loader
+
+    def put(self, model_id, model_loader, estimated_size):
+        if self.max_entries <= 0 or estimated_size > self.max_bytes:
+            return
+        with self.lock:
+            if model_id in self.entries:
+                self.total_bytes -= self.entries.pop(model_id)[1]
+            self.entries[model_id] = (model_loader, estimated_size)
+            self.total_bytes += estimated_size
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                evicted_model_id, (evicted_model_loader, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                print("[SyntheticModelCache][SUCCESS] Evicted Model: " + evicted_model_id)
+
+    def invalidate(self, model_id):
+        with self.lock:
+            if model_id in self.entries:
+                self.total_bytes -= self.entries.pop(model_id)[1]
+                print("[SyntheticModelCache][SUCCESS] Invalidated Model: " + model_id)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+synthetic_model_cache = SyntheticModelCache()
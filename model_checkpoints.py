@@ -0,0 +1,98 @@
+from dotenv import load_dotenv, find_dotenv
+import threading
+import torch
+import os
+
+load_dotenv(find_dotenv())
+
+CLIENT_BUFFER_FOLDER_NAME = os.getenv("CLIENT_BUFFER_FOLDER_NAME")
+# Epochs between two training checkpoints (0 disables checkpointing)
+MODEL_CHECKPOINT_INTERVAL = int(os.getenv("MODEL_CHECKPOINT_INTERVAL", 10))
+MODEL_CHECKPOINTS_FOLDER_NAME = os.getenv("MODEL_CHECKPOINTS_FOLDER_NAME", "model_checkpoints")
+
+class ModelCheckpointer:
+    """
+    Keeps the latest epoch checkpoint of a model's training in Artifact Storage
+    ### Note:
+    - One checkpoint per model ("checkpoint_<model_id>.pt"), each upload overwrites the previous one in place
+    - A checkpoint is the training state of CTGANER / DGANER (networks, optimizers, data encoding, epoch)
+    - save() only writes the checkpoint to the Client Buffer, a background thread uploads it, so the training
+    loop never waits on Artifact Storage (if saves outpace uploads, only the newest checkpoint is uploaded)
+    - Failing to store a checkpoint is reported but never stops the training
+    """
+    def __init__(self, artifact_storage, model_id, checkpoint_interval=MODEL_CHECKPOINT_INTERVAL) -> None:
+        self.artifact_storage = artifact_storage
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_file_name = "checkpoint_" + model_id + ".pt"
+        self.checkpoint_file_path = os.path.join(CLIENT_BUFFER_FOLDER_NAME, self.checkpoint_file_name)
+        self.pending_file_path = self.checkpoint_file_path + ".pending"
+        self.pending_epoch = None
+        self.upload_thread = None
+        self.upload_condition = threading.Condition()
+        self.is_folder_ready = False
+
+    def load(self):
+        """Returns: The stored training state, or None if the training has no checkpoint yet"""
+        if not self.artifact_storage.exists(MODEL_CHECKPOINTS_FOLDER_NAME, self.checkpoint_file_name):
+            return None
+        storage_response = self.artifact_storage.get(MODEL_CHECKPOINTS_FOLDER_NAME, self.checkpoint_file_name)
+        if not storage_response:
+            return None
+        try:
+            training_state = torch.load(storage_response, map_location="cpu", weights_only=False)
+            print("[ModelCheckpointer][SUCCESS] Checkpoint Loaded At Epoch:", training_state["epoch"], self.checkpoint_file_name)
+            return training_state
+        finally:
+            os.remove(storage_response)
+
+    def save(self, training_state):
+        try:
+            part_file_path = self.checkpoint_file_path + ".part"
+            torch.save(training_state, part_file_path)
+            with self.upload_condition:
+                # A checkpoint still waiting for the uploader is replaced by the newer one
+                os.replace(part_file_path, self.pending_file_path)
+                self.pending_epoch = training_state["epoch"]
+                if self.upload_thread is None:
+                    self.upload_thread = threading.Thread(target=self.upload_pending_checkpoints, daemon=True)
+                    self.upload_thread.start()
+        except Exception as e:
+            print("[ModelCheckpointer][ERROR] Error Saving Checkpoint: " + str(e))
+
+    def upload_pending_checkpoints(self):
+        while True:
+            with self.upload_condition:
+                if self.pending_epoch is None:
+                    self.upload_thread = None
+                    self.upload_condition.notify_all()
+                    return
+                epoch = self.pending_epoch
+                self.pending_epoch = None
+                os.replace(self.pending_file_path, self.checkpoint_file_path)
+            try:
+                self.upload_checkpoint(epoch)
+            finally:
+                if os.path.exists(self.checkpoint_file_path):
+                    os.remove(self.checkpoint_file_path)
+
+    def upload_checkpoint(self, epoch):
+        try:
+            if not self.is_folder_ready:
+                self.is_folder_ready = self.artifact_storage.ensure_folder(MODEL_CHECKPOINTS_FOLDER_NAME)
+                if not self.is_folder_ready:
+                    print("[ModelCheckpointer][ERROR] Checkpoint Folder Not Available: " + MODEL_CHECKPOINTS_FOLDER_NAME)
+                    return
+            if self.artifact_storage.put(MODEL_CHECKPOINTS_FOLDER_NAME, self.checkpoint_file_path, overwrite=True):
+                print("[ModelCheckpointer][SUCCESS] Checkpoint Stored At Epoch:", epoch, self.checkpoint_file_name)
+        except Exception as e:
+            print("[ModelCheckpointer][ERROR] Error Storing Checkpoint: " + str(e))
+
+    def wait(self):
+        """Blocks until the checkpoints saved so far are uploaded"""
+        with self.upload_condition:
+            while self.upload_thread is not None:
+                self.upload_condition.wait()
+
+    def delete(self):
+        if self.artifact_storage.exists(MODEL_CHECKPOINTS_FOLDER_NAME, self.checkpoint_file_name):
+            self.artifact_storage.delete(MODEL_CHECKPOINTS_FOLDER_NAME, self.checkpoint_file_name, permanent=True)
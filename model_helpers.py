@@ -1,41 +1,126 @@
 from sdv.metadata import SingleTableMetadata
-from dateutil.parser import parse
+from column_profiler import profile_data_artifact
+from artifact_formats import is_parquet_file, write_artifact_batches
+from dotenv import load_dotenv, find_dotenv
 import pandas as pd
+import os
 from ctgan_model import CTGANER
 from dgan_model import DGANER
 
+load_dotenv(find_dotenv())
 
-def synthetic_model_trainer(data_artifact_file_path, model_config, model_type, save_model_file_path, save_model_encoding_mappings_path=None):
+# Number of rows sampled per batch while generating synthetic data
+SYNTHETIC_DATA_GENERATION_BATCH_SIZE = int(os.getenv("SYNTHETIC_DATA_GENERATION_BATCH_SIZE", 50000))
+# Smaller batches for HTTP streaming so that clients receive their first rows quickly
+SYNTHETIC_DATA_STREAMING_BATCH_SIZE = int(os.getenv("SYNTHETIC_DATA_STREAMING_BATCH_SIZE", 1000))
+
+SYNTHETIC_DATA_STREAMING_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson"
+}
+
+
+def synthetic_model_trainer(data_artifact_file_path, model_config, model_type, save_model_file_path, save_model_encoding_mappings_path=None, epoch_callback=None, progress_callback=None, checkpoint_callback=None, checkpoint_interval=None, training_state=None):
     """## Train a synthetic model
     - model_config: dict() or json() object
     - model_type: "ctgan" | "dgan"
+    - checkpoint_callback(training_state) is called every checkpoint_interval epochs (optional)
+    - training_state: continue from a checkpoint or a synthetic_model_warm_start_state (optional)
+    ## Returns:
+    - Training summary {"start_epoch", "trained_epochs", "total_epochs", "stopped_early"}
     ## Model Requirements:-
     ### CTGAN:
     - save_model_file_path (.pkl)
+    - epoch_callback(epoch, total_epochs, generator_loss, discriminator_loss) (optional)
     ### DGAN:
     - save_model_file_path (.pt)
     - save_model_encoding_mappings_path (.pkl)
+    - progress_callback(progress_info: ProgressInfo) (optional)
     """
     if model_type == "ctgan":
         model_trainer = CTGANER(data_artifact_file_path, model_config)
-        model_trainer.train()
+        training_summary = model_trainer.train(epoch_callback, checkpoint_callback, checkpoint_interval, training_state)
         model_trainer.save(save_model_file_path)
     elif model_type == "dgan":
         model_trainer = DGANER(data_artifact_file_path, model_config)
-        model_trainer.train()
+        training_summary = model_trainer.train(progress_callback, checkpoint_callback, checkpoint_interval, training_state)
         model_trainer.save(save_model_file_path, save_model_encoding_mappings_path)
+    return training_summary
+
+def synthetic_model_warm_start_state(model_type, model_file_path, model_encoding_mappings_path=None):
+    """## Training state that warm-starts a new training from a trained synthetic model
+    - model_type: "ctgan" | "dgan"
+    - model_encoding_mappings_path: required for "dgan"
+    """
+    if model_type == "ctgan":
+        return CTGANER.get_warm_start_state(model_file_path)
+    elif model_type == "dgan":
+        return DGANER.get_warm_start_state(model_file_path, model_encoding_mappings_path)
+
+def synthetic_model_schema(model_type, model_config):
+    """## Columns (and their roles) a synthetic model is trained on, from its model config
+    - model_type: "ctgan" | "dgan"
+    - A model only warm-starts a training with the same schema: CTGAN's DataTransformer and DGAN's
+    encodings and networks are shaped by these columns
+    """
+    if model_type == "ctgan":
+        return {column: column_metadata.get("sdtype") for column, column_metadata in model_config["metadata"]["columns"].items()}
+    elif model_type == "dgan":
+        return {
+            column_role: model_config.get(column_role)
+            for column_role in ("df_style", "time_column", "example_id_column", "feature_columns", "attribute_columns", "discrete_columns", "encodable_columns")
+        }
 
-def synthetic_model_data_generator(num_examples, save_synthetic_data_artifact_file_path, model_file_path, model_config, model_type, model_encoding_mappings_path=None):
+def synthetic_model_loader(model_file_path, model_config, model_type, model_encoding_mappings_path=None):
+    """## Load a trained synthetic model
+    - model_type: "ctgan" | "dgan"
+    - model_encoding_mappings_path: required for "dgan"
+    """
     if model_type == "ctgan":
-        model_loader = CTGANER(model_file_path, model_config, load_mode=True)
-        model_loader.generate_synthetic_data_csv(save_synthetic_data_artifact_file_path, num_examples)
+        return CTGANER(model_file_path, model_config, load_mode=True)
     elif model_type == "dgan":
-        model_loader = DGANER(model_file_path, model_config, load_mode=True, model_encoding_mappings_path=model_encoding_mappings_path)
-        model_loader.generate_synthetic_data_csv(save_synthetic_data_artifact_file_path, num_examples)
+        return DGANER(model_file_path, model_config, load_mode=True, model_encoding_mappings_path=model_encoding_mappings_path)
+
+def synthetic_model_data_generator(num_examples, save_synthetic_data_artifact_file_path, model_loader, batch_size=SYNTHETIC_DATA_GENERATION_BATCH_SIZE):
+    """## Generate synthetic data into a csv or parquet file (by its extension) in batches
+    - model_loader: CTGANER | DGANER in load mode (see synthetic_model_loader)
+    - batch_size: rows sampled per batch (None samples everything at once, csv only)
+    ## Returns:
+    - Number of rows written to save_synthetic_data_artifact_file_path
+    """
+    if is_parquet_file(save_synthetic_data_artifact_file_path):
+        synthetic_data_batches = model_loader.generate_synthetic_data_batches(num_examples, batch_size or SYNTHETIC_DATA_GENERATION_BATCH_SIZE)
+        return write_artifact_batches(synthetic_data_batches, save_synthetic_data_artifact_file_path)
+    return model_loader.generate_synthetic_data_csv(save_synthetic_data_artifact_file_path, num_examples, batch_size=batch_size)
+
+def synthetic_model_data_streamer(model_loader, num_examples, output_format="csv", batch_size=SYNTHETIC_DATA_STREAMING_BATCH_SIZE):
+    """## Stream synthetic data from a loaded model while it is still sampling
+    - model_loader: CTGANER | DGANER in load mode
+    - output_format: "csv" | "ndjson"
+    ## Yields:
+    - Encoded text chunks, one per sampled batch (csv header only in the first chunk)
+    """
+    is_first_batch = True
+    for synthetic_data_batch_df in model_loader.generate_synthetic_data_batches(num_examples, batch_size):
+        if output_format == "csv":
+            yield synthetic_data_batch_df.to_csv(index=False, header=is_first_batch)
+        elif output_format == "ndjson":
+            yield synthetic_data_batch_df.to_json(orient="records", lines=True, date_format="iso")
+        is_first_batch = False
 
 class AutoSyntheticConfigurator:
-    def __init__(self, file_path):
-        self.data_df = pd.read_csv(file_path)
+    """
+    Proposes CTGAN / DGAN configs for a data artifact from its column profile (see column_profiler)
+    ### Note:
+    - Given the profile cached on the DataArtifacts record the csv is not read at all,
+    else it (csv or parquet) is streamed once and profiled on a bounded sample of its rows (self.column_profile,
+    to be cached by the caller, its "sampling_report" tells what the sample may have missed)
+    """
+    def __init__(self, file_path=None, column_profile=None):
+        if column_profile is None:
+            column_profile = profile_data_artifact(file_path)
+        self.column_profile = column_profile
+        self.columns = column_profile["columns"]
 
     def get_ctgan_config(self):
         ctgan_main_config = {
@@ -57,11 +142,13 @@ class AutoSyntheticConfigurator:
             "verbose": True,
             "epochs": 300,
             "pac": 10,
-            "cuda": True
+            "cuda": True,
+            # Stop before "epochs" once losses and quality probes plateau (see early_stopping.EarlyStopping)
+            "early_stopping": True,
+            "early_stopping_probe_interval": 25
         }
 
-        metadata = SingleTableMetadata()
-        metadata.detect_from_dataframe(self.data_df)
+        metadata = SingleTableMetadata.load_from_dict(self.column_profile["metadata"])
         ctgan_main_config["metadata"] = metadata.to_dict()
         try:
             metadata.validate()
@@ -91,11 +178,14 @@ class AutoSyntheticConfigurator:
             "generator_learning_rate": 1e-4,
             "discriminator_learning_rate": 1e-4,
             "epochs": 500,
-            "cuda": True
+            "cuda": True,
+            # Stop before "epochs" once quality probes plateau (see early_stopping.EarlyStopping)
+            "early_stopping": True,
+            "early_stopping_probe_interval": 50
         }
         # Set Model Configs
-        dgan_main_config["max_sequence_len"] = self.data_df.shape[0]//4
-        dgan_main_config["batch_size"] = min(100, self.data_df.shape[1])
+        dgan_main_config["max_sequence_len"] = self.column_profile["num_rows"]//4
+        dgan_main_config["batch_size"] = min(100, self.column_profile["num_columns"])
         # First check the datetime column
         datetime_candidate = self.detect_datetime_column()
         if datetime_candidate:
@@ -120,91 +210,26 @@ class AutoSyntheticConfigurator:
         return dgan_main_config
 
     def detect_datetime_column(self):
-        # Load the CSV file
-        df = self.data_df
-        # Dictionary to hold the success rate of date parsing for each column
-        datetime_success_rate = {}
-        overflow_errors_list = []
-
-        # Iterate over each column in the DataFrame
-        for column in df.columns:
-            total_count = 0
-            success_count = 0
-
-            # Attempt to parse each value in the column
-            for value in df[column].dropna().unique():
-                try:
-                    # Try parsing the value as a date
-                    parsed_date = parse(str(value), fuzzy=False)
-                    success_count += 1
-                except (ValueError, TypeError):
-                    # If parsing fails, continue to the next value
-                    continue
-                except OverflowError:
-                    # Handle OverflowError specifically and log the value
-                    if column not in overflow_errors_list:
-                        overflow_errors_list.append(column)
-                    continue
-                finally:
-                    total_count += 1
-
-            # Calculate the success rate of parsing for the current column
-            if total_count > 0:
-                success_rate = success_count / total_count
-                datetime_success_rate[column] = success_rate
-
-        if len(overflow_errors_list) > 0:
-            print("[NOTICE] Overflow Error Occured in these Columns: {}".format(", ".join(overflow_errors_list)))
-        
-        # Find the column with the highest success rate of date parsing
+        """Returns: (name of the column that most likely represents a datetime, its parse success rate),
+        or (None, None) if no column parses as dates"""
+        datetime_success_rate = {column: column_profile["date_ratio"] for column, column_profile in self.columns.items()}
         datetime_column = max(datetime_success_rate, key=datetime_success_rate.get, default=None)
-
-        # Return the name of the column that most likely represents a datetime
-        return datetime_column, datetime_success_rate[datetime_column] if datetime_column else None
+        if datetime_column is None or datetime_success_rate[datetime_column] == 0:
+            return None, None
+        return datetime_column, datetime_success_rate[datetime_column]
 
     def detect_numeric_columns(self):
-        df = self.data_df
-        numeric_columns = []
-
-        for column in df.columns:
-            # Attempt to convert the column to numeric, non-convertible values become NaN
-            numeric_series = pd.to_numeric(df[column], errors='coerce')
-
-            # Check if all non-NaN values are numeric
-            if pd.to_numeric(df[column].dropna(), errors='coerce').notna().all():
-                # Ensure there are no alphabetic characters in the original column (excluding NaNs)
-                if not df[column].dropna().astype(str).str.contains('[a-zA-Z]').any():
-                    numeric_columns.append(column)
-
-        # Return the list of numeric and non-alphabetic columns or None if empty
+        # Columns whose non-null values all convert to numbers and contain no alphabetic characters
+        numeric_columns = [
+            column for column, column_profile in self.columns.items()
+            if column_profile["numeric_ratio"] == 1 and column_profile["alpha_ratio"] == 0
+        ]
         return numeric_columns if numeric_columns else None
 
     def detect_string_columns(self):
-        # Load the CSV file
-        df = self.data_df
-        # List to hold the names of string-like columns
-        string_columns = []
-        # Iterate over each column in the DataFrame
-        for column in df.columns:
-            # Initially assume the column is string-like
-            is_string_like = True
-            # Check if the column is of object type (commonly used for strings in pandas)
-            if df[column].dtype == 'object':
-                # Check if the majority of the values in the column are non-numeric
-                non_numeric_count = 0
-                for value in df[column].dropna().unique():
-                    if isinstance(value, str) and not value.replace('.', '', 1).isdigit():
-                        non_numeric_count += 1
-                # Determine if the majority of the column's values are non-numeric
-                if non_numeric_count / len(df[column].dropna().unique()) < 0.5:
-                    is_string_like = False
-            else:
-                # If the column's dtype is not 'object', it's less likely to be string-like
-                is_string_like = False
-
-            # If the column is determined to be string-like, add it to the list
-            if is_string_like:
-                string_columns.append(column)
-
-        # Return the list of column names that are string-like
-        return string_columns if string_columns != [] else None
\ No newline at end of file
+        # String columns where the majority of the distinct values are non-numeric
+        string_columns = [
+            column for column, column_profile in self.columns.items()
+            if column_profile["is_string"] and column_profile["num_unique"] > 0 and column_profile["non_numeric_unique_ratio"] >= 0.5
+        ]
+        return string_columns if string_columns else None
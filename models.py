@@ -1,5 +1,8 @@
 import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+# Highest priority a client may give a training job, so no user's jobs can crowd the others out of the claim window
+TRAINING_JOB_MAX_PRIORITY = 10
 
 # Create New Project Models
 class CreateNewProjectRequest(BaseModel):
@@ -19,11 +22,14 @@ class UpdateEmptyProjectRequest(BaseModel):
 class UpdateEmptyProjectResponse(BaseModel):
     project_id: str
     modelConfig_id: str
+    sampling_report: dict | None = None # Set when the config was generated from a sample of the data artifact
 
 # Pending Project Updation Models
 class UpdatePendingProjectRequest(BaseModel):
     project_id: str
     modelConfig_data: str
+    priority: int = Field(default=0, ge=0, le=TRAINING_JOB_MAX_PRIORITY)
+    warm_start_model_id: str | None = None # Models.model_id of a trained model of the same type to continue from
 
 class UpdatePendingProjectResponse(BaseModel):
     project_id: str
@@ -38,6 +44,12 @@ class GenerateSyntheticDataResponse(BaseModel):
     project_id: str
     synthetic_data_artifact_id: str
 
+# Stream Synthetic Data Models
+class StreamSyntheticDataRequest(BaseModel):
+    project_id: str
+    num_rows: int
+    output_format: str = "csv" # OR "ndjson"
+
 class GetAllDataArtifactsResponse(BaseModel):
     data_artifacts: list
 
@@ -97,4 +109,20 @@ class GetSyntheticQualityReportResponse(BaseModel):
     overall_score: float
     column_shapes: float
     column_pair_trends: float
-    created_on: datetime.datetime
\ No newline at end of file
+    created_on: datetime.datetime
+
+class GetTrainingJobResponse(BaseModel):
+    project_id: str
+    training_job_id: str
+    modelLog_id: str
+    status: str
+    priority: int
+    attempts: int
+    queue_position: int | None
+    created_on: datetime.datetime
+    started_on: datetime.datetime | None
+    finished_on: datetime.datetime | None
+    error: str | None = None
+
+class GetTrainingJobsResponse(BaseModel):
+    training_jobs: list
@@ -1,19 +1,23 @@
 from sdmetrics.reports.single_table import QualityReport
 from sdv.metadata import SingleTableMetadata
+from artifact_formats import read_artifact
 import pandas as pd
 import json
 import os
 
 class SyntheticQualityAssurance:
-    def __init__(self, original_file_path, synthetic_file_path, model="ctgan") -> None:
-        self.data_df = pd.read_csv(original_file_path)
-        self.synthetic_data_df = pd.read_csv(synthetic_file_path)
+    def __init__(self, original_file_path, synthetic_file_path, model="ctgan", metadata=None) -> None:
+        """metadata: SingleTableMetadata dict of the original data (e.g. from its cached column profile), detected if None"""
+        self.data_df = read_artifact(original_file_path)
+        self.synthetic_data_df = read_artifact(synthetic_file_path)
         if model == "dgan":        # Metadata not happy with 'example_id' column
             if 'example_id' in self.synthetic_data_df.columns:
                 self.synthetic_data_df.drop('example_id', axis = 1, inplace = True) 
-        self.metadata = SingleTableMetadata()
-        self.metadata.detect_from_dataframe(self.data_df)
-        self.metadata = self.metadata.to_dict()
+        if metadata is None:
+            metadata = SingleTableMetadata()
+            metadata.detect_from_dataframe(self.data_df)
+            metadata = metadata.to_dict()
+        self.metadata = metadata
         self.report = QualityReport()
 
     def generate_report(self, save_dir_path=None):
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+import pyarrow.parquet as pq
+from artifact_formats import write_artifact_batches, convert_csv_to_parquet, read_artifact, read_typed_artifact
+
+
+def test_write_artifact_batches_promotes_column_null_in_first_batch(tmp_path):
+    file_path = str(tmp_path / "synthetic.parquet")
+    data_batches = [
+        pd.DataFrame({"id": [1, 2], "sparse": [None, None]}),
+        pd.DataFrame({"id": [3, 4], "sparse": ["a", None]}),
+        pd.DataFrame({"id": [5, 6], "sparse": [None, "b"]})
+    ]
+
+    assert write_artifact_batches(data_batches, file_path) == 6
+    data_df = read_artifact(file_path)
+    assert data_df["id"].tolist() == [1, 2, 3, 4, 5, 6]
+    assert data_df["sparse"].dropna().tolist() == ["a", "b"]
+    assert data_df["sparse"].isna().tolist() == [True, True, False, True, True, False]
+    assert pq.ParquetFile(file_path).num_row_groups == 3
+
+
+def test_write_artifact_batches_promotes_int_to_float(tmp_path):
+    file_path = str(tmp_path / "synthetic.parquet")
+    data_batches = [pd.DataFrame({"value": [1, 2]}), pd.DataFrame({"value": [0.5, None]})]
+
+    assert write_artifact_batches(data_batches, file_path) == 4
+    assert read_artifact(file_path)["value"].tolist()[:3] == [1.0, 2.0, 0.5]
+
+
+def test_convert_csv_to_parquet_streams_blocks(tmp_path):
+    csv_file_path = tmp_path / "data.csv"
+    csv_file_path.write_text("a,b,c\n" + "".join("{},,2024-01-0{}\n".format(i, i % 9 + 1) for i in range(2000)) + "2000,late,2024-01-01\n")
+
+    parquet_file_path, num_rows = convert_csv_to_parquet(str(csv_file_path), block_size=1024)
+    assert num_rows == 2001
+    data_df = read_artifact(parquet_file_path)
+    assert data_df["a"].tolist() == list(range(2001))
+    assert data_df["b"].iloc[-1] == "late" and data_df["b"].iloc[:-1].isna().all()
+    assert data_df["c"].iloc[0] == "2024-01-01"
+
+
+def test_read_typed_artifact_parses_mixed_datetime_formats(tmp_path):
+    csv_file_path = tmp_path / "data.csv"
+    csv_file_path.write_text("id,time\n1,2024-01-02\n2,03/04/2024 10:30\n3,\n4,2024-02-01\n")
+
+    data_df = read_typed_artifact(str(csv_file_path), datetime_columns=["time"])
+    assert data_df["time"].tolist()[:2] == [pd.Timestamp("2024-01-02"), pd.Timestamp("2024-03-04 10:30")]
+    assert data_df["time"].isna().tolist() == [False, False, True, False]
+
+
+def test_read_typed_artifact_rejects_values_that_are_not_dates(tmp_path):
+    csv_file_path = tmp_path / "data.csv"
+    csv_file_path.write_text("id,time\n1,2024-01-02\n2,not a date\n")
+
+    with pytest.raises(ValueError, match="not a date"):
+        read_typed_artifact(str(csv_file_path), datetime_columns=["time"])
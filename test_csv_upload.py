@@ -0,0 +1,39 @@
+import io
+import pandas as pd
+import pytest
+from csv_upload import StreamingCSVUploadWriter
+
+CSV_UPLOADS = {
+    "quoted_newlines": b'id,text\n1,"first\nsecond"\n2,"a\n\nb"\n',
+    "escaped_quotes": b'id,text\n1,"say ""hi""\n"\n2,""""\n3,""\n',
+    "blank_lines": b"id,value\n1,2\n\n3,4\n\n\n",
+    "whitespace_only_lines": b"id,value\n1,2\n  \n\t\n3,4\n \n",
+    "crlf": b"id,value\r\n1,2\r\n\r\n3,\"x\r\ny\"\r\n",
+    "no_trailing_newline": b"id,value\n1,2\n3,4",
+    "header_only": b"id,value\n",
+    "header_without_newline": b"id,value"
+}
+
+
+def write_in_chunks(csv_upload, chunk_size):
+    file_object = io.BytesIO()
+    csv_upload_writer = StreamingCSVUploadWriter(file_object)
+    for chunk_start in range(0, len(csv_upload), chunk_size):
+        csv_upload_writer.write(csv_upload[chunk_start:chunk_start + chunk_size])
+    return csv_upload_writer.close(), file_object.getvalue()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1024])
+@pytest.mark.parametrize("csv_upload_name", list(CSV_UPLOADS))
+def test_record_count_matches_read_csv(csv_upload_name, chunk_size):
+    num_rows, written_csv = write_in_chunks(CSV_UPLOADS[csv_upload_name], chunk_size)
+
+    assert num_rows == len(pd.read_csv(io.BytesIO(written_csv)))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 1024])
+def test_header_split_across_chunks_is_cleaned(chunk_size):
+    num_rows, written_csv = write_in_chunks(b"'id','first name'\n1,\"it's\"\n", chunk_size)
+
+    assert written_csv == b"id,first name\n1,\"it's\"\n"
+    assert num_rows == 1
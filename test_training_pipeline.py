@@ -0,0 +1,91 @@
+import os
+import pytest
+
+# training_pipeline imports the training stack through model_helpers and model_checkpoints
+pytest.importorskip("sdv")
+pytest.importorskip("gretel_synthetics")
+pytest.importorskip("torch")
+
+from database import SessionLocal, Users, Projects, Models, ModelConfigs, DataArtifacts, TrainingCheckpoints
+from models import UpdatePendingProjectRequest
+from training_pipeline import TrainingPipeline, CLIENT_BUFFER_FOLDER_NAME
+
+
+def create_pending_project(db):
+    user_db_record = Users(email="a@test")
+    db.add(user_db_record)
+    db.commit()
+    data_artifact_db_record = DataArtifacts(data_artifact_id="data_artifact_1", file_extension=".csv", num_rows=2, user_id=user_db_record.id)
+    project_db_record = Projects(project_id="project_1", model_type="ctgan", status="pending", user_id=user_db_record.id, data_artifact=data_artifact_db_record)
+    db.add(project_db_record)
+    db.commit()
+    project_db_record.model_config = ModelConfigs(model_config_id="model_config_1", model_config_data="{}", project_id=project_db_record.id, user_id=user_db_record.id)
+    db.commit()
+    return project_db_record
+
+
+def create_pipeline(db, project_db_record, stage_calls, failing_stages=()):
+    """Training pipeline whose train, upload, generate and quality report stages only record their calls
+    (prepare and finalize run for real), failing_stages raise"""
+    project_data = UpdatePendingProjectRequest(project_id=project_db_record.project_id, modelConfig_data="{}")
+    training_pipeline = TrainingPipeline(db, "model_log_1", project_db_record.user_id, project_data)
+
+    def train():
+        with open(training_pipeline.model_file_path, "wb") as model_file:
+            model_file.write(b"model")
+        return {"model_training_time": 12.5, "trained_epochs": 10, "configured_epochs": 10, "model_training_time_saved": 0.0}
+
+    def generate():
+        synthetic_data_artifact_id = "synthetic_data_artifact_" + str(len(stage_calls))
+        with open(os.path.join(CLIENT_BUFFER_FOLDER_NAME, synthetic_data_artifact_id + ".csv"), "w") as synthetic_data_file:
+            synthetic_data_file.write("a\n1\n")
+        return {"synthetic_data_artifact_id": synthetic_data_artifact_id, "synthetic_data_artifact_db_id": None, "num_rows": 1, "file_extension": ".csv"}
+
+    stage_outputs = {
+        "train": train,
+        "upload_model": dict,
+        "generate": generate,
+        "upload_synthetic_data": dict,
+        "quality_report": lambda: {"synthetic_quality_report_db_id": None, "synthetic_quality_score": 0.75}
+    }
+    for stage, stage_output in stage_outputs.items():
+        def run_stage(stage=stage, stage_output=stage_output):
+            stage_calls.append(stage)
+            if stage in failing_stages:
+                raise RuntimeError(stage + " failed")
+            return stage_output()
+        training_pipeline.stage_functions[stage] = run_stage
+    return training_pipeline
+
+
+def test_retry_resumes_after_completed_stages(db):
+    project_db_record = create_pending_project(db)
+    first_attempt_calls = []
+    with pytest.raises(RuntimeError, match="upload_synthetic_data failed"):
+        create_pipeline(db, project_db_record, first_attempt_calls, failing_stages=("upload_synthetic_data",)).run()
+
+    # Uploads run in a worker thread next to the following stage, so only the set of stages is fixed
+    assert sorted(first_attempt_calls) == sorted(["train", "upload_model", "generate", "upload_synthetic_data", "quality_report"])
+    completed_stages = {training_checkpoint.stage for training_checkpoint in db.query(TrainingCheckpoints).filter(TrainingCheckpoints.model_log_id == "model_log_1")}
+    assert completed_stages == {"prepare", "train", "upload_model", "generate", "quality_report"}
+    assert db.get(Projects, project_db_record.id).status == "training"
+
+    # The retry runs in a new session, like the next attempt of the training job
+    retry_db = SessionLocal()
+    try:
+        retry_calls = []
+        training_pipeline = create_pipeline(retry_db, retry_db.get(Projects, project_db_record.id), retry_calls)
+        training_pipeline.run()
+
+        assert retry_calls == ["upload_synthetic_data"]
+        # prepare is not repeated: the model of the first attempt is reused
+        model_db_records = retry_db.query(Models).all()
+        assert len(model_db_records) == 1 and model_db_records[0].model_id == training_pipeline.model_id
+        # finalize reads the outputs the first attempt checkpointed
+        project_db_record = retry_db.get(Projects, project_db_record.id)
+        assert project_db_record.status == "completed" and project_db_record.model_id == model_db_records[0].id
+        assert project_db_record.model_training_time == 12.5 and project_db_record.synthetic_quality_score == 0.75
+        assert not os.path.exists(training_pipeline.model_file_path)
+        assert not os.path.exists(training_pipeline.get_synthetic_data_artifact_file_path())
+    finally:
+        retry_db.close()
@@ -0,0 +1,165 @@
+import datetime
+import threading
+import pytest
+
+# training_queue imports the training stack through api_helpers
+pytest.importorskip("sdv")
+pytest.importorskip("gretel_synthetics")
+
+import training_queue
+from database import SessionLocal, Users, Projects, TrainingJobs
+from models import UpdatePendingProjectRequest
+from training_queue import enqueue_training_job, claim_next_training_job, requeue_stale_training_jobs, run_training_job, utc_now
+
+
+def create_project(db, email):
+    user_db_record = Users(email=email)
+    db.add(user_db_record)
+    db.commit()
+    project_db_record = Projects(project_id="project_" + email, model_type="ctgan", status="pending", user_id=user_db_record.id)
+    db.add(project_db_record)
+    db.commit()
+    return project_db_record
+
+
+def enqueue(db, project_db_record, priority=0):
+    project_data = UpdatePendingProjectRequest(project_id=project_db_record.project_id, modelConfig_data="{}", priority=priority)
+    return enqueue_training_job(db, "model_log_" + project_db_record.project_id, project_db_record.user_id, project_db_record, project_data)
+
+
+def make_stale(db, training_job_db_record):
+    stale_heartbeat_on = utc_now() - datetime.timedelta(seconds=training_queue.TRAINING_JOB_STALE_TIMEOUT + 60)
+    db.query(TrainingJobs).filter(TrainingJobs.id == training_job_db_record.id).update({TrainingJobs.heartbeat_on: stale_heartbeat_on})
+    db.commit()
+
+
+@pytest.fixture
+def training_calls(monkeypatch):
+    """Replaces the training run with one completing the project (or running a queued interruption / raising a queued error)"""
+    calls = {"started": [], "interruptions": [], "errors": [], "removed": []}
+
+    def start_model_training(model_log_id, user_id, project_data, is_final_attempt=True):
+        calls["started"].append(is_final_attempt)
+        if calls["interruptions"]:
+            calls["interruptions"].pop(0)()
+        if calls["errors"]:
+            raise calls["errors"].pop(0)
+        db = SessionLocal()
+        try:
+            db.query(Projects).filter(Projects.project_id == project_data.project_id).update({Projects.status: "completed"})
+            db.commit()
+        finally:
+            db.close()
+
+    monkeypatch.setattr(training_queue, "start_model_training", start_model_training)
+    monkeypatch.setattr(training_queue, "remove_model_training_files", lambda model_log_id, user_id, project_data: calls["removed"].append(model_log_id))
+    return calls
+
+
+def test_concurrent_claims_run_a_job_once(db):
+    enqueue(db, create_project(db, "a@test"))
+    claimed_jobs = []
+
+    def claim(worker_index):
+        worker_db = SessionLocal()
+        try:
+            claimed_jobs.append(claim_next_training_job(worker_db, "worker_{}".format(worker_index)))
+        finally:
+            worker_db.close()
+
+    claim_threads = [threading.Thread(target=claim, args=(worker_index,)) for worker_index in range(8)]
+    for claim_thread in claim_threads:
+        claim_thread.start()
+    for claim_thread in claim_threads:
+        claim_thread.join()
+
+    assert len([claimed_job for claimed_job in claimed_jobs if claimed_job is not None]) == 1
+    training_job_db_record = db.query(TrainingJobs).one()
+    assert training_job_db_record.status == "running" and training_job_db_record.attempts == 1
+
+
+def test_claims_users_with_fewest_running_jobs_then_priority_then_oldest(db):
+    busy_project_db_record = create_project(db, "busy@test")
+    enqueue(db, busy_project_db_record)
+    assert claim_next_training_job(db, "worker_0") is not None
+    busy_job = enqueue(db, busy_project_db_record, priority=9)
+    idle_project_db_record = create_project(db, "idle@test")
+    idle_old_job = enqueue(db, idle_project_db_record, priority=1)
+    idle_urgent_job = enqueue(db, idle_project_db_record, priority=5)
+    idle_new_job = enqueue(db, idle_project_db_record, priority=1)
+
+    # The idle user has no running job, so its jobs go first despite the busy user's higher priority
+    assert claim_next_training_job(db, "worker_1").id == idle_urgent_job.id
+    # Both users run one job now, so priority decides
+    assert claim_next_training_job(db, "worker_2").id == busy_job.id
+    assert claim_next_training_job(db, "worker_3").id == idle_old_job.id
+    assert claim_next_training_job(db, "worker_4").id == idle_new_job.id
+    assert claim_next_training_job(db, "worker_5") is None
+
+
+def test_stale_job_is_requeued_then_failed_after_max_attempts(db):
+    project_db_record = create_project(db, "a@test")
+    training_job_db_record = enqueue(db, project_db_record)
+    for attempt in range(1, training_queue.TRAINING_JOB_MAX_ATTEMPTS + 1):
+        assert claim_next_training_job(db, "worker_0").attempts == attempt
+        requeue_stale_training_jobs(db)
+        assert db.get(TrainingJobs, training_job_db_record.id).status == "running"
+        make_stale(db, training_job_db_record)
+        requeue_stale_training_jobs(db)
+
+    training_job_db_record = db.get(TrainingJobs, training_job_db_record.id)
+    assert training_job_db_record.status == "failed" and training_job_db_record.worker_id is None
+    assert db.get(Projects, project_db_record.id).status == "training_failed"
+
+
+def test_failed_attempts_are_retried_until_max_attempts(db, training_calls):
+    project_db_record = create_project(db, "a@test")
+    training_job_db_record = enqueue(db, project_db_record)
+    training_calls["errors"] = [RuntimeError("attempt {} failed".format(attempt)) for attempt in range(1, training_queue.TRAINING_JOB_MAX_ATTEMPTS + 1)]
+
+    for attempt in range(1, training_queue.TRAINING_JOB_MAX_ATTEMPTS):
+        run_training_job(db, claim_next_training_job(db, "worker_0"))
+        training_job_db_record = db.get(TrainingJobs, training_job_db_record.id)
+        assert training_job_db_record.status == "queued" and training_job_db_record.error == "attempt {} failed".format(attempt)
+        assert db.get(Projects, project_db_record.id).status == "pending"
+        assert training_calls["removed"] == []
+
+    run_training_job(db, claim_next_training_job(db, "worker_0"))
+    training_job_db_record = db.get(TrainingJobs, training_job_db_record.id)
+    assert training_job_db_record.status == "failed" and training_job_db_record.finished_on is not None
+    assert training_job_db_record.error == "attempt {} failed".format(training_queue.TRAINING_JOB_MAX_ATTEMPTS)
+    assert db.get(Projects, project_db_record.id).status == "training_failed"
+    assert training_calls["started"][-1] is True and not any(training_calls["started"][:-1])
+    assert training_calls["removed"] == [training_job_db_record.model_log_id]
+
+
+def test_requeued_stale_job_is_only_finished_by_its_new_worker(db, training_calls):
+    project_db_record = create_project(db, "a@test")
+    training_job_db_record = enqueue(db, project_db_record)
+    old_worker_job = claim_next_training_job(db, "old_worker")
+    new_worker_db = SessionLocal()
+    new_worker_jobs = []
+
+    def lose_old_worker():
+        # While the old worker trains, its job goes stale and a new worker claims it, then the old worker fails
+        make_stale(new_worker_db, old_worker_job)
+        requeue_stale_training_jobs(new_worker_db)
+        new_worker_jobs.append(claim_next_training_job(new_worker_db, "new_worker"))
+
+    training_calls["interruptions"] = [lose_old_worker]
+    training_calls["errors"] = [RuntimeError("old worker failed")]
+    try:
+        run_training_job(db, old_worker_job)
+        training_job_db_record = db.get(TrainingJobs, training_job_db_record.id)
+        assert training_job_db_record.status == "running" and training_job_db_record.worker_id == "new_worker"
+        assert training_job_db_record.attempts == 2 and training_job_db_record.error is None
+
+        run_training_job(new_worker_db, new_worker_jobs[0])
+    finally:
+        new_worker_db.close()
+
+    db.expire_all()
+    training_job_db_record = db.get(TrainingJobs, training_job_db_record.id)
+    assert training_job_db_record.status == "completed" and training_job_db_record.error is None
+    assert db.get(Projects, project_db_record.id).status == "completed"
+    assert training_calls["removed"] == []
@@ -0,0 +1,135 @@
+from database import SessionLocal, ModelLogChunks
+from sqlalchemy import func
+from contextlib import contextmanager
+from dotenv import load_dotenv, find_dotenv
+import contextvars
+import threading
+import time
+import sys
+import os
+
+load_dotenv(find_dotenv())
+
+# Buffered log text is written to the database once it is this old (seconds) or this large (characters)
+MODEL_LOG_FLUSH_INTERVAL = float(os.getenv("MODEL_LOG_FLUSH_INTERVAL", 2))
+MODEL_LOG_FLUSH_SIZE = int(os.getenv("MODEL_LOG_FLUSH_SIZE", 16 * 1024))
+
+class ModelLogSink:
+    """
+    Append-only, buffered training log sink
+    ### Note:
+    - Writes are buffered in memory and stored as new ModelLogChunks rows, never by rewriting ModelLogs.model_log_data
+    - A flush happens at most every MODEL_LOG_FLUSH_INTERVAL seconds, or as soon as MODEL_LOG_FLUSH_SIZE characters are buffered
+    - Uses its own database session so log flushes never commit the training session's pending changes
+    """
+    def __init__(self, model_log_db_id) -> None:
+        self.model_log_db_id = model_log_db_id
+        self.db = SessionLocal()
+        self.buffer = []
+        self.buffer_size = 0
+        self.last_flush_time = time.monotonic()
+        self.lock = threading.Lock()
+        # Continue after any chunks already stored for this log (e.g. a restarted training job)
+        last_sequence_number = self.db.query(func.max(ModelLogChunks.sequence_number)).filter(ModelLogChunks.model_log_id == model_log_db_id).scalar()
+        self.next_sequence_number = 0 if last_sequence_number is None else last_sequence_number + 1
+
+    def write(self, data):
+        if not data:
+            return 0
+        with self.lock:
+            self.buffer.append(data)
+            self.buffer_size += len(data)
+        self.flush_if_due()
+        return len(data)
+
+    def flush_if_due(self):
+        if self.buffer_size >= MODEL_LOG_FLUSH_SIZE or time.monotonic() - self.last_flush_time >= MODEL_LOG_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            self.last_flush_time = time.monotonic()
+            if not self.buffer:
+                return
+            model_log_chunk_data = ''.join(self.buffer)
+            self.buffer = []
+            self.buffer_size = 0
+            self.db.add(ModelLogChunks(
+                model_log_id = self.model_log_db_id,
+                sequence_number = self.next_sequence_number,
+                model_log_chunk_data = model_log_chunk_data
+            ))
+            self.next_sequence_number += 1
+            try:
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                sys.__stderr__.write("[ModelLogSink][ERROR] Error Storing Model Log Chunk: {}\n".format(str(e)))
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+def read_model_log_data(db, model_log_db_record):
+    """Returns the full log text: the ModelLogs header followed by every stored chunk in order"""
+    model_log_chunks = (
+        db.query(ModelLogChunks.model_log_chunk_data)
+        .filter(ModelLogChunks.model_log_id == model_log_db_record.id)
+        .order_by(ModelLogChunks.sequence_number)
+        .all()
+    )
+    return (model_log_db_record.model_log_data or "") + ''.join(model_log_chunk.model_log_chunk_data for model_log_chunk in model_log_chunks)
+
+# Sink of the training job running in the current context (thread / task), None outside of training jobs
+current_model_log_sink = contextvars.ContextVar("current_model_log_sink", default=None)
+
+class ContextLocalLogStream:
+    """
+    Replacement for sys.stdout / sys.stderr that routes every write to the ModelLogSink of the
+    current context, or to the original stream when no training job is running in that context.
+    Installed once per process, so concurrent trainings never swap the global streams under each other.
+    """
+    def __init__(self, original_stream) -> None:
+        self.original_stream = original_stream
+
+    def write(self, data):
+        model_log_sink = current_model_log_sink.get()
+        if model_log_sink is not None:
+            return model_log_sink.write(data)
+        return self.original_stream.write(data)
+
+    def flush(self):
+        model_log_sink = current_model_log_sink.get()
+        if model_log_sink is not None:
+            # Callers such as tqdm flush after every update, the sink decides when to hit the database
+            model_log_sink.flush_if_due()
+        else:
+            self.original_stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.original_stream, name)
+
+context_local_log_streams_lock = threading.Lock()
+
+def install_context_local_log_streams():
+    with context_local_log_streams_lock:
+        if not isinstance(sys.stdout, ContextLocalLogStream):
+            sys.stdout = ContextLocalLogStream(sys.stdout)
+        if not isinstance(sys.stderr, ContextLocalLogStream):
+            sys.stderr = ContextLocalLogStream(sys.stderr)
+
+@contextmanager
+def log_to_database(db_session, model_log_db_record):
+    """
+    Captures everything printed in the current context (CTGAN verbose output, DGANER.progress_callbacker, ...)
+    into the model log. Threads started inside the block only inherit the routing when run through
+    contextvars.copy_context().
+    """
+    install_context_local_log_streams()
+    model_log_sink = ModelLogSink(model_log_db_record.id)
+    token = current_model_log_sink.set(model_log_sink)
+    try:
+        yield model_log_sink
+    finally:
+        current_model_log_sink.reset(token)
+        model_log_sink.close()
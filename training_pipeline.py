@@ -0,0 +1,411 @@
+from fastapi import status, HTTPException
+from database import Projects, Models, ModelLogs, SyntheticDataArtifacts, SyntheticQualityReports, TrainingCheckpoints
+from model_helpers import synthetic_model_trainer, synthetic_model_loader, synthetic_model_data_generator, synthetic_model_warm_start_state
+from model_checkpoints import ModelCheckpointer
+from training_logs import log_to_database
+from training_progress import record_training_progress
+from synthetic_quality_report import SyntheticQualityAssurance
+from column_profiler import load_column_profile
+from artifact_formats import ARTIFACT_FILE_EXTENSIONS, SYNTHETIC_DATA_ARTIFACT_FORMAT
+from artifact_storage import get_artifact_storage
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.orm import joinedload
+from dotenv import load_dotenv, find_dotenv
+import contextvars
+import traceback
+import json
+import uuid
+import time
+import os
+
+load_dotenv(find_dotenv())
+
+CLIENT_BUFFER_FOLDER_NAME = os.getenv("CLIENT_BUFFER_FOLDER_NAME")
+
+TRAINING_PIPELINE_STAGES = ["prepare", "train", "upload_model", "generate", "upload_synthetic_data", "quality_report", "finalize"]
+# Stage -> stages whose outputs it consumes, running a stage again invalidates the checkpoints of every stage depending on it
+TRAINING_PIPELINE_STAGE_DEPENDENCIES = {
+    "train": ["prepare"],
+    "upload_model": ["train"],
+    "generate": ["train"],
+    "upload_synthetic_data": ["generate"],
+    "quality_report": ["generate"],
+    "finalize": ["upload_model", "upload_synthetic_data", "quality_report"]
+}
+
+class TrainingPipeline:
+    """
+    Staged, resumable training pipeline of a pending project
+    ### Note:
+    - prepare -> train -> (upload_model || generate) -> (upload_synthetic_data || quality_report) -> finalize
+    - Every finished stage stores a TrainingCheckpoints row under the job's model_log_id, so a retried job
+    (same model_log_id) skips finished stages and only redoes a stage whose local outputs are gone and were never uploaded
+    - Uploads run in a worker thread under a copy of the current context, they must not use the database session
+    """
+    def __init__(self, db, model_log_id, user_id, project_data) -> None:
+        self.db = db
+        self.model_log_id = model_log_id
+        self.user_id = user_id
+        self.project_data = project_data
+        self.artifact_storage = get_artifact_storage()
+        # The project comes with its data artifact, model config and previous model in one query
+        self.project_db_record = (
+            db.query(Projects)
+            .options(joinedload(Projects.data_artifact), joinedload(Projects.model_config), joinedload(Projects.model))
+            .filter(Projects.project_id == project_data.project_id)
+            .first()
+        )
+        if self.project_db_record is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project Not Found!")
+        self.model_type = self.project_db_record.model_type
+        self.data_artifact_db_record = self.project_db_record.data_artifact
+        self.model_config_db_record = self.project_db_record.model_config
+        self.data_artifact_file_path = os.path.join(CLIENT_BUFFER_FOLDER_NAME, self.data_artifact_db_record.data_artifact_id + self.data_artifact_db_record.file_extension)
+        # Set by load_prepared_records
+        self.model_file_path = None
+        self.model_encoding_mappings_path = None
+        self.checkpoints = {
+            training_checkpoint.stage: json.loads(training_checkpoint.checkpoint_data)
+            for training_checkpoint in db.query(TrainingCheckpoints).filter(TrainingCheckpoints.model_log_id == model_log_id).all()
+        }
+        self.stage_functions = {
+            "prepare": self.prepare,
+            "train": self.train,
+            "upload_model": self.upload_model,
+            "generate": self.generate,
+            "upload_synthetic_data": self.upload_synthetic_data,
+            "quality_report": self.quality_report,
+            "finalize": self.finalize
+        }
+
+    def run(self):
+        if self.checkpoints:
+            print("[TrainingPipeline][NOTICE] Resuming Training After Stages:", ", ".join(stage for stage in TRAINING_PIPELINE_STAGES if stage in self.checkpoints))
+        if "finalize" not in self.checkpoints:
+            self.project_db_record.status = "training"
+            self.db.commit()
+
+        self.run_stage("prepare")
+        self.load_prepared_records()
+        self.run_stage("train")
+        self.run_concurrent_stages("upload_model", "generate")
+        self.run_concurrent_stages("upload_synthetic_data", "quality_report")
+        self.run_stage("finalize")
+        self.remove_local_files()
+
+    # Checkpoints
+
+    def record_checkpoint(self, stage, checkpoint_data):
+        self.db.query(TrainingCheckpoints).filter(TrainingCheckpoints.model_log_id == self.model_log_id, TrainingCheckpoints.stage == stage).delete(synchronize_session=False)
+        self.db.add(TrainingCheckpoints(
+                model_log_id = self.model_log_id,
+                stage = stage,
+                checkpoint_data = json.dumps(checkpoint_data),
+                project_id = self.project_db_record.id
+            ))
+        self.db.commit()
+        self.checkpoints[stage] = checkpoint_data
+        print("[TrainingPipeline][SUCCESS] Training Stage Completed:", stage, self.model_log_id)
+
+    def discard_dependent_checkpoints(self, stage):
+        for dependent_stage, required_stages in TRAINING_PIPELINE_STAGE_DEPENDENCIES.items():
+            if stage not in required_stages:
+                continue
+            if dependent_stage in self.checkpoints:
+                self.db.query(TrainingCheckpoints).filter(TrainingCheckpoints.model_log_id == self.model_log_id, TrainingCheckpoints.stage == dependent_stage).delete(synchronize_session=False)
+                del self.checkpoints[dependent_stage]
+            self.discard_dependent_checkpoints(dependent_stage)
+        self.db.commit()
+
+    def needs_stage(self, stage):
+        """A stage runs if it has no checkpoint, or if its outputs are needed but neither on disk nor uploaded"""
+        if stage not in self.checkpoints:
+            return True
+        if stage == "train":
+            return not self.model_files_exist() and "upload_model" not in self.checkpoints
+        if stage == "generate":
+            return not os.path.exists(self.get_synthetic_data_artifact_file_path()) and "upload_synthetic_data" not in self.checkpoints
+        return False
+
+    def run_stage(self, stage):
+        if not self.needs_stage(stage):
+            return
+        self.discard_dependent_checkpoints(stage)
+        self.record_checkpoint(stage, self.stage_functions[stage]())
+
+    def run_concurrent_stages(self, background_stage, foreground_stage):
+        """Runs background_stage (an upload) in a worker thread while foreground_stage runs in this thread"""
+        background_future = None
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            if self.needs_stage(background_stage):
+                self.discard_dependent_checkpoints(background_stage)
+                # copy_context keeps the training log and progress routing of this job in the worker thread
+                background_future = executor.submit(contextvars.copy_context().run, self.stage_functions[background_stage])
+
+            foreground_error = None
+            try:
+                self.run_stage(foreground_stage)
+            except Exception as e:
+                foreground_error = e
+
+            if background_future is not None:
+                try:
+                    self.record_checkpoint(background_stage, background_future.result())
+                except Exception:
+                    if foreground_error is None:
+                        raise
+                    traceback.print_exc()
+            if foreground_error is not None:
+                raise foreground_error
+
+    # Local Files
+
+    def model_files_exist(self):
+        return os.path.exists(self.model_file_path) and (self.model_encoding_mappings_path is None or os.path.exists(self.model_encoding_mappings_path))
+
+    def get_synthetic_data_artifact_file_path(self):
+        generate_checkpoint = self.checkpoints["generate"]
+        # Checkpoints from before parquet artifacts carry no file_extension
+        return os.path.join(CLIENT_BUFFER_FOLDER_NAME, generate_checkpoint["synthetic_data_artifact_id"] + generate_checkpoint.get("file_extension", ".csv"))
+
+    def ensure_local_file(self, folder_name, local_file_path):
+        """Downloads an artifact into the Client Buffer unless an earlier stage (or attempt) left it there"""
+        if os.path.exists(local_file_path):
+            return local_file_path
+        storage_response = self.artifact_storage.get(folder_name, os.path.basename(local_file_path))
+        if not storage_response:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error Downloading Artifact: " + os.path.basename(local_file_path))
+        return storage_response
+
+    def remove_local_files(self):
+        """Removes every file the stages of this job placed in the Client Buffer (also of earlier attempts)"""
+        if self.model_file_path is None and "prepare" in self.checkpoints:
+            self.load_prepared_records()
+        local_file_paths = [self.data_artifact_file_path, self.model_file_path, self.model_encoding_mappings_path]
+        if "generate" in self.checkpoints:
+            local_file_paths.append(self.get_synthetic_data_artifact_file_path())
+        for local_file_path in local_file_paths:
+            if local_file_path is not None and os.path.exists(local_file_path):
+                os.remove(local_file_path)
+
+    # Stages
+
+    def prepare(self):
+        model_id = self.model_type + "_model_" + str(uuid.uuid4())
+        self.model_config_db_record.model_config_data = self.project_data.modelConfig_data
+        model_db_record = Models(
+                model_id = model_id,
+                file_extension = ".pkl" if self.model_type == "ctgan" else ".pt",
+                model_type = self.model_type,
+                model_config_data = self.project_data.modelConfig_data,
+                project_id = self.project_db_record.id,
+                user_id = self.user_id
+            )
+        # An earlier attempt of this job may already have created the model log
+        model_log_db_record = self.db.query(ModelLogs).filter(ModelLogs.model_log_id == self.model_log_id).first()
+        if model_log_db_record is None:
+            model_log_db_record = ModelLogs(
+                    model_log_id = self.model_log_id,
+                    model_log_data = "----- Model Training Started -----\n",
+                    project_id = self.project_db_record.id,
+                    user_id = self.user_id
+                )
+            self.db.add(model_log_db_record)
+        # Model, model log and project are committed together, so a failed attempt never leaves half of them behind
+        try:
+            self.db.add(model_db_record)
+            self.project_db_record.model = model_db_record
+            self.project_db_record.model_log = model_log_db_record
+            self.db.commit()
+            print("[Database][SUCCESS] New Model and Model Log Created and Pending Project Updated Successfully:", model_id, self.model_log_id)
+        except Exception as e:
+            self.db.rollback()
+            print("[Database][ERROR] Failed To Create New Model:", str(e))
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Error Creating New Model Record!")
+
+        return {"model_id": model_id, "model_db_id": model_db_record.id, "model_log_db_id": model_log_db_record.id}
+
+    def load_prepared_records(self):
+        prepare_checkpoint = self.checkpoints["prepare"]
+        self.model_id = prepare_checkpoint["model_id"]
+        # Session.get answers from the identity map when prepare ran in this session
+        self.model_db_record = self.db.get(Models, prepare_checkpoint["model_db_id"])
+        self.model_log_db_record = self.db.get(ModelLogs, prepare_checkpoint["model_log_db_id"])
+        self.model_config = json.loads(str(self.model_config_db_record.model_config_data))
+        self.model_file_path = os.path.join(CLIENT_BUFFER_FOLDER_NAME, self.model_id + self.model_db_record.file_extension)
+        self.model_encoding_mappings_path = os.path.join(CLIENT_BUFFER_FOLDER_NAME, "encodings_" + self.model_id + ".pkl") if self.model_type == "dgan" else None
+
+    def train(self):
+        data_artifact_file_path = self.ensure_local_file("data_artifacts", self.data_artifact_file_path)
+        # Continue from the last epoch checkpoint of an earlier attempt, else optionally from a previous model
+        model_checkpointer = ModelCheckpointer(self.artifact_storage, self.model_id)
+        training_state = model_checkpointer.load()
+        if training_state is None and self.project_data.warm_start_model_id is not None:
+            training_state = self.get_warm_start_state()
+        checkpoint_callback = model_checkpointer.save if model_checkpointer.checkpoint_interval > 0 else None
+
+        start_time = time.time()
+        try:
+            # Model Training Process Starts Here and Ends wiht Saving them to Client Buffer
+            with log_to_database(self.db, self.model_log_db_record), record_training_progress(self.model_log_db_record.id, self.project_db_record.id, self.data_artifact_db_record.num_rows) as training_progress_recorder:
+                if self.model_type == "ctgan":
+                    training_summary = synthetic_model_trainer(
+                        data_artifact_file_path,
+                        self.model_config,
+                        self.model_type,
+                        self.model_file_path,
+                        epoch_callback=training_progress_recorder.on_ctgan_epoch,
+                        checkpoint_callback=checkpoint_callback,
+                        checkpoint_interval=model_checkpointer.checkpoint_interval,
+                        training_state=training_state
+                    )
+                elif self.model_type == "dgan":
+                    training_summary = synthetic_model_trainer(
+                        data_artifact_file_path,
+                        self.model_config,
+                        self.model_type,
+                        self.model_file_path,
+                        self.model_encoding_mappings_path,
+                        progress_callback=training_progress_recorder.on_dgan_progress,
+                        checkpoint_callback=checkpoint_callback,
+                        checkpoint_interval=model_checkpointer.checkpoint_interval,
+                        training_state=training_state
+                    )
+        finally:
+            # The newest checkpoint is stored before a failed attempt ends, so its retry resumes from it
+            model_checkpointer.wait()
+        model_training_time = time.time() - start_time
+        # Time saved by early stopping, estimated from the average time of the epochs trained in this run
+        epochs_trained_in_run = training_summary["trained_epochs"] - training_summary["start_epoch"]
+        model_training_time_saved = model_training_time / epochs_trained_in_run * (training_summary["total_epochs"] - training_summary["trained_epochs"]) if epochs_trained_in_run > 0 else 0.0
+        return {
+            "model_training_time": model_training_time,
+            "trained_epochs": training_summary["trained_epochs"],
+            "configured_epochs": training_summary["total_epochs"],
+            "model_training_time_saved": model_training_time_saved
+        }
+
+    def get_warm_start_state(self):
+        warm_start_model_db_record = self.db.query(Models).filter(Models.model_id == self.project_data.warm_start_model_id).first()
+        if warm_start_model_db_record is None or warm_start_model_db_record.user_id != self.user_id or warm_start_model_db_record.model_type != self.model_type:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Warm Start Model Not Found!")
+        model_file_path = self.ensure_local_file("models", os.path.join(CLIENT_BUFFER_FOLDER_NAME, warm_start_model_db_record.model_id + warm_start_model_db_record.file_extension))
+        model_encoding_mappings_path = None
+        if self.model_type == "dgan":
+            model_encoding_mappings_path = self.ensure_local_file("model_encoding_mappings", os.path.join(CLIENT_BUFFER_FOLDER_NAME, "encodings_" + warm_start_model_db_record.model_id + ".pkl"))
+        try:
+            print("[TrainingPipeline][SUCCESS] Warm Starting From Model:", warm_start_model_db_record.model_id)
+            return synthetic_model_warm_start_state(self.model_type, model_file_path, model_encoding_mappings_path)
+        finally:
+            os.remove(model_file_path)
+            if model_encoding_mappings_path is not None:
+                os.remove(model_encoding_mappings_path)
+
+    def upload_model(self):
+        # Upload Model
+        storage_response = self.artifact_storage.put("models", self.model_file_path)
+        if not storage_response:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error Uploading Model File!")
+        # Upload Model Encoding Mappings
+        if self.model_type == "dgan":
+            storage_response = self.artifact_storage.put("model_encoding_mappings", self.model_encoding_mappings_path)
+            if not storage_response:
+                raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error Uploading Model Encoding Mappings!")
+        return {}
+
+    def generate(self):
+        # A regenerated artifact keeps the ID (and DB record) of the earlier attempt
+        generate_checkpoint = self.checkpoints.get("generate", {})
+        synthetic_data_artifact_id = generate_checkpoint.get("synthetic_data_artifact_id", "synthiumAI_" + self.model_type + "_" + str(uuid.uuid4()))
+        file_extension = generate_checkpoint.get("file_extension", ARTIFACT_FILE_EXTENSIONS[SYNTHETIC_DATA_ARTIFACT_FORMAT])
+        synthetic_data_artifact_local_file_path = os.path.join(CLIENT_BUFFER_FOLDER_NAME, synthetic_data_artifact_id + file_extension)
+
+        model_file_path = self.ensure_local_file("models", self.model_file_path)
+        model_encoding_mappings_path = self.ensure_local_file("model_encoding_mappings", self.model_encoding_mappings_path) if self.model_type == "dgan" else None
+        model_loader = synthetic_model_loader(model_file_path, self.model_config, self.model_type, model_encoding_mappings_path)
+
+        num_rows = synthetic_model_data_generator(
+            self.data_artifact_db_record.num_rows,
+            synthetic_data_artifact_local_file_path,
+            model_loader
+        )
+
+        # Create Synthetic Data Artifact DB Record
+        synthetic_data_artifact_db_record = None
+        if "synthetic_data_artifact_db_id" in generate_checkpoint:
+            synthetic_data_artifact_db_record = self.db.query(SyntheticDataArtifacts).filter(SyntheticDataArtifacts.id == generate_checkpoint["synthetic_data_artifact_db_id"]).first()
+        if synthetic_data_artifact_db_record is None:
+            synthetic_data_artifact_db_record = SyntheticDataArtifacts(
+                    synthetic_data_artifact_id = synthetic_data_artifact_id,
+                    file_extension = file_extension,
+                    project_id = self.project_db_record.id,
+                    user_id = self.user_id
+                )
+            self.db.add(synthetic_data_artifact_db_record)
+        synthetic_data_artifact_db_record.num_rows = num_rows
+        try:
+            self.db.commit()
+            print("[Database][SUCCESS] New Synthetic Data Artifact Created Successfully:", synthetic_data_artifact_id)
+        except Exception as e:
+            self.db.rollback()
+            print("[Database][ERROR] Failed To Create New Synthetic Data Artifact:",str(e))
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Error Creating New Synthetic Data Artifact Record!")
+
+        return {"synthetic_data_artifact_id": synthetic_data_artifact_id, "synthetic_data_artifact_db_id": synthetic_data_artifact_db_record.id, "num_rows": num_rows, "file_extension": file_extension}
+
+    def upload_synthetic_data(self):
+        # Upload Synthetic Data Artifact to Artifact Storage
+        storage_response = self.artifact_storage.put("synthetic_data_artifacts", self.get_synthetic_data_artifact_file_path())
+        if not storage_response:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error Uploading Synthetic Data Artifact File!")
+        return {}
+
+    def quality_report(self):
+        # Generate Synthetic Quality Report
+        data_artifact_file_path = self.ensure_local_file("data_artifacts", self.data_artifact_file_path)
+        synthetic_data_artifact_local_file_path = self.ensure_local_file("synthetic_data_artifacts", self.get_synthetic_data_artifact_file_path())
+        # The metadata detected when the data artifact was profiled saves detecting it again
+        column_profile = load_column_profile(self.data_artifact_db_record)
+        quality_manager = SyntheticQualityAssurance(data_artifact_file_path, synthetic_data_artifact_local_file_path, self.model_type, column_profile["metadata"] if column_profile else None)
+        synthetic_quality_report_data = quality_manager.generate_report()
+
+        # Create Synthetic Quality Report DB Record
+        synthetic_quality_report_id = "synthetic_quality_report_" + str(uuid.uuid4())
+        synthetic_quality_report_db_record = SyntheticQualityReports(
+                synthetic_quality_report_id = synthetic_quality_report_id,
+                synthetic_quality_report_data = str(synthetic_quality_report_data),
+                project_id = self.project_db_record.id,
+                user_id = self.user_id
+            )
+        try:
+            self.db.add(synthetic_quality_report_db_record)
+            self.db.commit()
+            print("[Database][SUCCESS] New Synthetic Quality Report Created Successfully:", synthetic_quality_report_id)
+        except Exception as e:
+            self.db.rollback()
+            print("[Database][ERROR] Failed To Create New Synthetic Quality Report:",str(e))
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Error Creating New Synthetic Quality Report Record!")
+
+        return {"synthetic_quality_report_db_id": synthetic_quality_report_db_record.id, "synthetic_quality_score": synthetic_quality_report_data["overall_score"]}
+
+    def finalize(self):
+        # Update Project DB Record with New Information
+        model_training_time = self.checkpoints["train"]["model_training_time"]
+        self.project_db_record.status = "completed"
+        self.project_db_record.synthetic_quality_report_id = self.checkpoints["quality_report"]["synthetic_quality_report_db_id"]
+        self.project_db_record.synthetic_quality_score = self.checkpoints["quality_report"]["synthetic_quality_score"]
+        self.project_db_record.model_training_time = model_training_time
+        self.model_db_record.model_training_time = model_training_time
+        self.model_db_record.trained_epochs = self.checkpoints["train"].get("trained_epochs")
+        self.model_db_record.configured_epochs = self.checkpoints["train"].get("configured_epochs")
+        self.model_db_record.model_training_time_saved = self.checkpoints["train"].get("model_training_time_saved")
+        try:
+            self.db.commit()
+            print("[Database][SUCCESS] Pending Project Finally Updated Successfully:", self.project_data.project_id)
+        except Exception as e:
+            self.db.rollback()
+            print("[Database][ERROR] Failed To Update Pending Project Finally:", str(e))
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Error Updating Pending Project Finally Record!")
+        # The uploaded model supersedes its epoch checkpoints
+        ModelCheckpointer(self.artifact_storage, self.model_id).delete()
+        return {}
@@ -0,0 +1,153 @@
+from database import SessionLocal, Projects, TrainingProgress
+from starlette.concurrency import run_in_threadpool
+from contextlib import contextmanager
+from dotenv import load_dotenv, find_dotenv
+import threading
+import asyncio
+import json
+import time
+import sys
+import os
+
+load_dotenv(find_dotenv())
+
+# Buffered progress records are written to the database at most this often (seconds)
+TRAINING_PROGRESS_FLUSH_INTERVAL = float(os.getenv("TRAINING_PROGRESS_FLUSH_INTERVAL", 2))
+# Per-batch records are kept at most this often (seconds), epoch records are always kept
+TRAINING_PROGRESS_BATCH_INTERVAL = float(os.getenv("TRAINING_PROGRESS_BATCH_INTERVAL", 1))
+# How often the Server-Sent Events stream checks for new progress records (seconds)
+TRAINING_PROGRESS_POLL_INTERVAL = float(os.getenv("TRAINING_PROGRESS_POLL_INTERVAL", 1))
+TRAINING_PROGRESS_KEEP_ALIVE_INTERVAL = float(os.getenv("TRAINING_PROGRESS_KEEP_ALIVE_INTERVAL", 15))
+
+class TrainingProgressRecorder:
+    """
+    Records structured training progress (epoch, batch, losses, fraction done, rows/s) into TrainingProgress
+    ### Note:
+    - on_ctgan_epoch and on_dgan_progress plug into CTGANER.train / DGANER.train
+    - rows_per_second is derived from the training rows processed since the previous record
+    - Records are buffered and written with their own session every TRAINING_PROGRESS_FLUSH_INTERVAL seconds
+    """
+    def __init__(self, model_log_db_id, project_db_id, num_training_rows) -> None:
+        self.model_log_db_id = model_log_db_id
+        self.project_db_id = project_db_id
+        self.num_training_rows = num_training_rows or 0
+        self.db = SessionLocal()
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.last_flush_time = time.monotonic()
+        self.last_batch_record_time = 0
+        self.last_record_time = time.monotonic()
+        self.last_processed_rows = 0
+
+    def on_ctgan_epoch(self, epoch, total_epochs, generator_loss, discriminator_loss):
+        self.record(epoch + 1, total_epochs, None, None, (epoch + 1) / total_epochs, generator_loss, discriminator_loss)
+        return True
+
+    def on_dgan_progress(self, progress_info):
+        is_epoch_end = progress_info.batch + 1 >= progress_info.total_batches
+        if not is_epoch_end and time.monotonic() - self.last_batch_record_time < TRAINING_PROGRESS_BATCH_INTERVAL:
+            return
+        self.last_batch_record_time = time.monotonic()
+        self.record(progress_info.epoch, progress_info.total_epochs, progress_info.batch, progress_info.total_batches, progress_info.frac_completed)
+
+    def record(self, epoch, total_epochs, batch, total_batches, frac_completed, generator_loss=None, discriminator_loss=None):
+        now = time.monotonic()
+        processed_rows = frac_completed * total_epochs * self.num_training_rows
+        elapsed_time = now - self.last_record_time
+        rows_per_second = (processed_rows - self.last_processed_rows) / elapsed_time if elapsed_time > 0 else None
+        self.last_record_time = now
+        self.last_processed_rows = processed_rows
+        with self.lock:
+            self.buffer.append(TrainingProgress(
+                model_log_id = self.model_log_db_id,
+                project_id = self.project_db_id,
+                epoch = epoch,
+                total_epochs = total_epochs,
+                batch = batch,
+                total_batches = total_batches,
+                frac_completed = frac_completed,
+                generator_loss = generator_loss,
+                discriminator_loss = discriminator_loss,
+                rows_per_second = rows_per_second
+            ))
+        if now - self.last_flush_time >= TRAINING_PROGRESS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            self.last_flush_time = time.monotonic()
+            if not self.buffer:
+                return
+            self.db.add_all(self.buffer)
+            self.buffer = []
+            try:
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                sys.__stderr__.write("[TrainingProgressRecorder][ERROR] Error Storing Training Progress: {}\n".format(str(e)))
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+@contextmanager
+def record_training_progress(model_log_db_id, project_db_id, num_training_rows):
+    training_progress_recorder = TrainingProgressRecorder(model_log_db_id, project_db_id, num_training_rows)
+    try:
+        yield training_progress_recorder
+    finally:
+        training_progress_recorder.close()
+
+def training_progress_to_dict(training_progress_db_record):
+    return {
+        "epoch": training_progress_db_record.epoch,
+        "total_epochs": training_progress_db_record.total_epochs,
+        "batch": training_progress_db_record.batch,
+        "total_batches": training_progress_db_record.total_batches,
+        "frac_completed": training_progress_db_record.frac_completed,
+        "generator_loss": training_progress_db_record.generator_loss,
+        "discriminator_loss": training_progress_db_record.discriminator_loss,
+        "rows_per_second": training_progress_db_record.rows_per_second,
+        "created_on": training_progress_db_record.created_on.isoformat() if training_progress_db_record.created_on else None
+    }
+
+def get_new_training_progress(project_db_id, last_event_id):
+    """Returns (project status, progress records of the project's current training run newer than last_event_id)"""
+    db = SessionLocal()
+    try:
+        project_db_record = db.query(Projects).filter(Projects.id == project_db_id).first()
+        if project_db_record is None or project_db_record.model_log_id is None:
+            return (project_db_record.status if project_db_record else None), []
+        training_progress_db_records = (
+            db.query(TrainingProgress)
+            .filter(TrainingProgress.model_log_id == project_db_record.model_log_id, TrainingProgress.id > last_event_id)
+            .order_by(TrainingProgress.id)
+            .limit(500)
+            .all()
+        )
+        return project_db_record.status, [(training_progress.id, training_progress_to_dict(training_progress)) for training_progress in training_progress_db_records]
+    finally:
+        db.close()
+
+async def training_progress_event_stream(project_db_id, last_event_id=0):
+    """
+    Server-Sent Events stream of a project's training progress
+    ### Note:
+    - Each record is one "progress" event whose id can be sent back as Last-Event-ID to resume
+    - Ends with an "end" event once the project is "completed" or "training_failed" and all records were sent
+    """
+    last_keep_alive_time = time.monotonic()
+    while True:
+        project_status, new_training_progress = await run_in_threadpool(get_new_training_progress, project_db_id, last_event_id)
+        for training_progress_id, training_progress in new_training_progress:
+            last_event_id = training_progress_id
+            yield "id: {}\nevent: progress\ndata: {}\n\n".format(training_progress_id, json.dumps(training_progress))
+        if new_training_progress:
+            continue
+        if project_status in ("completed", "training_failed", None):
+            yield "event: end\ndata: {}\n\n".format(json.dumps({"status": project_status}))
+            return
+        if time.monotonic() - last_keep_alive_time >= TRAINING_PROGRESS_KEEP_ALIVE_INTERVAL:
+            last_keep_alive_time = time.monotonic()
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(TRAINING_PROGRESS_POLL_INTERVAL)
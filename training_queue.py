@@ -0,0 +1,259 @@
+from database import SessionLocal, Projects, TrainingJobs
+from models import UpdatePendingProjectRequest
+from api_helpers import start_model_training, remove_model_training_files
+from sqlalchemy import func
+from dotenv import load_dotenv, find_dotenv
+import multiprocessing
+import threading
+import datetime
+import argparse
+import socket
+import json
+import uuid
+import time
+import os
+
+load_dotenv(find_dotenv())
+
+# Number of training worker processes started by "python training_queue.py"
+TRAINING_WORKER_CONCURRENCY = int(os.getenv("TRAINING_WORKER_CONCURRENCY", 1))
+# Number of training worker processes the API starts itself. Every API process (uvicorn --workers N) starts
+# its own, so keep it 0 and run training_queue.py unless the API runs in a single process
+API_TRAINING_WORKER_CONCURRENCY = int(os.getenv("API_TRAINING_WORKER_CONCURRENCY", 0))
+TRAINING_QUEUE_POLL_INTERVAL = float(os.getenv("TRAINING_QUEUE_POLL_INTERVAL", 2))
+TRAINING_JOB_HEARTBEAT_INTERVAL = float(os.getenv("TRAINING_JOB_HEARTBEAT_INTERVAL", 30))
+# A running job whose heartbeat is older than this is assumed to have lost its worker
+TRAINING_JOB_STALE_TIMEOUT = float(os.getenv("TRAINING_JOB_STALE_TIMEOUT", 300))
+TRAINING_JOB_MAX_ATTEMPTS = int(os.getenv("TRAINING_JOB_MAX_ATTEMPTS", 3))
+# Number of queued jobs considered per claim when applying per-user fairness
+TRAINING_QUEUE_CLAIM_WINDOW = int(os.getenv("TRAINING_QUEUE_CLAIM_WINDOW", 200))
+# Longest error message kept on a failed training job (TrainingJobs.error)
+TRAINING_JOB_ERROR_MAX_LENGTH = 10000
+
+def utc_now():
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+def get_active_training_job(db, project_db_id):
+    """The queued or running training job of a project, None if it has none"""
+    return db.query(TrainingJobs).filter(TrainingJobs.project_id == project_db_id, TrainingJobs.status.in_(("queued", "running"))).first()
+
+def enqueue_training_job(db, model_log_id, user_id, project_db_record, project_data):
+    """
+    Adds a training job for a pending project to the durable training queue
+    ### Note:
+    - Callers check get_active_training_job first, a project has at most one queued or running job
+    - Resubmitting the exact request of the project's last failed job reuses its model_log_id,
+    so the new job resumes from that job's training checkpoints
+    """
+    training_job_data = json.dumps({"project_id": project_data.project_id, "modelConfig_data": project_data.modelConfig_data, "warm_start_model_id": project_data.warm_start_model_id})
+    last_training_job_db_record = db.query(TrainingJobs).filter(TrainingJobs.project_id == project_db_record.id).order_by(TrainingJobs.id.desc()).first()
+    if last_training_job_db_record is not None and last_training_job_db_record.status == "failed" and last_training_job_db_record.training_job_data == training_job_data:
+        model_log_id = last_training_job_db_record.model_log_id
+    training_job_db_record = TrainingJobs(
+            training_job_id = "training_job_" + str(uuid.uuid4()),
+            model_log_id = model_log_id,
+            training_job_data = training_job_data,
+            status = "queued",
+            priority = project_data.priority,
+            attempts = 0,
+            project_id = project_db_record.id,
+            user_id = user_id
+        )
+    db.add(training_job_db_record)
+    db.commit()
+    print("[TrainingQueue][SUCCESS] Training Job Queued Successfully:", training_job_db_record.training_job_id)
+    return training_job_db_record
+
+def get_training_queue_position(db, training_job_db_record):
+    """Number of queued jobs that would be claimed before this one, ignoring fairness (None if not queued)"""
+    if training_job_db_record.status != "queued":
+        return None
+    return db.query(TrainingJobs).filter(
+            TrainingJobs.status == "queued",
+            (TrainingJobs.priority > training_job_db_record.priority) |
+            ((TrainingJobs.priority == training_job_db_record.priority) & (TrainingJobs.id < training_job_db_record.id))
+        ).count()
+
+def claim_next_training_job(db, worker_id):
+    """
+    Atomically claims the next queued training job
+    ### Note:
+    - Per-user fairness first: jobs of users with the fewest running jobs go first
+    - Then higher priority, then the oldest job
+    - The claim is a conditional UPDATE, so concurrent workers never run the same job
+    """
+    while True:
+        queued_jobs = (
+            db.query(TrainingJobs)
+            .filter(TrainingJobs.status == "queued")
+            .order_by(TrainingJobs.priority.desc(), TrainingJobs.id)
+            .limit(TRAINING_QUEUE_CLAIM_WINDOW)
+            .all()
+        )
+        if not queued_jobs:
+            return None
+
+        running_jobs_per_user = dict(
+            db.query(TrainingJobs.user_id, func.count(TrainingJobs.id))
+            .filter(TrainingJobs.status == "running")
+            .group_by(TrainingJobs.user_id)
+            .all()
+        )
+        next_job = min(queued_jobs, key=lambda job: (running_jobs_per_user.get(job.user_id, 0), -job.priority, job.id))
+
+        now = utc_now()
+        claimed = (
+            db.query(TrainingJobs)
+            .filter(TrainingJobs.id == next_job.id, TrainingJobs.status == "queued")
+            .update({
+                TrainingJobs.status: "running",
+                TrainingJobs.worker_id: worker_id,
+                TrainingJobs.attempts: TrainingJobs.attempts + 1,
+                TrainingJobs.started_on: now,
+                TrainingJobs.heartbeat_on: now
+            }, synchronize_session=False)
+        )
+        db.commit()
+        if claimed == 1:
+            db.expire_all()
+            return db.query(TrainingJobs).filter(TrainingJobs.id == next_job.id).first()
+
+def requeue_stale_training_jobs(db):
+    """
+    Requeues running jobs whose worker stopped sending heartbeats (or fails them after TRAINING_JOB_MAX_ATTEMPTS)
+    ### Note:
+    - Each recovery is a conditional UPDATE on the stale heartbeat, so a job whose worker finishes it meanwhile is left alone
+    """
+    stale_before = utc_now() - datetime.timedelta(seconds=TRAINING_JOB_STALE_TIMEOUT)
+    stale_jobs = db.query(TrainingJobs).filter(TrainingJobs.status == "running", TrainingJobs.heartbeat_on < stale_before).all()
+    for training_job_db_record in stale_jobs:
+        is_final_attempt = training_job_db_record.attempts >= TRAINING_JOB_MAX_ATTEMPTS
+        if is_final_attempt:
+            recovered_values = {TrainingJobs.status: "failed", TrainingJobs.error: "Worker Lost Too Many Times", TrainingJobs.finished_on: utc_now()}
+        else:
+            recovered_values = {TrainingJobs.status: "queued"}
+        recovered_values[TrainingJobs.worker_id] = None
+        recovered = (
+            db.query(TrainingJobs)
+            .filter(TrainingJobs.id == training_job_db_record.id, TrainingJobs.status == "running", TrainingJobs.heartbeat_on < stale_before)
+            .update(recovered_values, synchronize_session=False)
+        )
+        if recovered == 1 and is_final_attempt:
+            db.query(Projects).filter(Projects.id == training_job_db_record.project_id).update({Projects.status: "training_failed"}, synchronize_session=False)
+        db.commit()
+        if recovered == 1:
+            print("[TrainingQueue][NOTICE] Stale Training Job Recovered:", training_job_db_record.training_job_id, recovered_values[TrainingJobs.status])
+    db.expire_all()
+
+def owned_training_job_filter(training_job_id, worker_id, attempts):
+    """Matches a training job only while it is still running under the claim (worker and attempt) of the caller"""
+    return (
+        (TrainingJobs.id == training_job_id) & (TrainingJobs.status == "running") &
+        (TrainingJobs.worker_id == worker_id) & (TrainingJobs.attempts == attempts)
+    )
+
+def send_training_job_heartbeats(training_job_id, worker_id, attempts, stop_event):
+    db = SessionLocal()
+    try:
+        while not stop_event.wait(TRAINING_JOB_HEARTBEAT_INTERVAL):
+            db.query(TrainingJobs).filter(owned_training_job_filter(training_job_id, worker_id, attempts)).update({TrainingJobs.heartbeat_on: utc_now()}, synchronize_session=False)
+            db.commit()
+    finally:
+        db.close()
+
+def finish_training_job(db, training_job_id, worker_id, attempts, error, is_final_attempt):
+    """
+    Records the outcome of one attempt of a training job
+    Returns: New status of the job, or None if the job was requeued as stale meanwhile (another worker owns it now)
+    ### Note:
+    - The status update is conditional on the claim of this attempt, so a job requeued as stale (and maybe
+    claimed again) is never finished by both its old and its new worker
+    """
+    project_id = db.query(TrainingJobs.project_id).filter(TrainingJobs.id == training_job_id).scalar()
+    project_db_record = db.query(Projects).filter(Projects.id == project_id).first()
+    if error is None and project_db_record is not None and project_db_record.status == "completed":
+        finished_values = {TrainingJobs.status: "completed", TrainingJobs.finished_on: utc_now()}
+    elif project_db_record is not None and not is_final_attempt:
+        # Retried with the same model_log_id, the training pipeline resumes after its last completed stage
+        finished_values = {TrainingJobs.status: "queued", TrainingJobs.worker_id: None}
+    else:
+        finished_values = {TrainingJobs.status: "failed", TrainingJobs.finished_on: utc_now()}
+    finished_values[TrainingJobs.error] = error
+
+    finished = db.query(TrainingJobs).filter(owned_training_job_filter(training_job_id, worker_id, attempts)).update(finished_values, synchronize_session=False)
+    if finished == 1 and finished_values[TrainingJobs.status] == "failed" and project_db_record is not None:
+        project_db_record.status = "training_failed"
+    db.commit()
+    db.expire_all()
+    return finished_values[TrainingJobs.status] if finished == 1 else None
+
+def run_training_job(db, training_job_db_record):
+    """
+    Runs one claimed job to completion and records its final status
+    ### Note:
+    - A failed attempt with attempts left is requeued and its project stays "training", so progress
+    streams only end once the job completes or fails for good
+    - Local files of the job stay in the Client Buffer while a retry may reuse them, and are removed once it failed for good
+    - The error of the last attempt is kept on the job (TrainingJobs.error)
+    """
+    # The claim this attempt runs under, the job's row may be requeued and claimed again while it runs
+    training_job_id, worker_id, attempts = training_job_db_record.id, training_job_db_record.worker_id, training_job_db_record.attempts
+    training_job_name, model_log_id, user_id = training_job_db_record.training_job_id, training_job_db_record.model_log_id, training_job_db_record.user_id
+    is_final_attempt = attempts >= TRAINING_JOB_MAX_ATTEMPTS
+    stop_event = threading.Event()
+    heartbeat_thread = threading.Thread(target=send_training_job_heartbeats, args=(training_job_id, worker_id, attempts, stop_event), daemon=True)
+    heartbeat_thread.start()
+    project_data = None
+    try:
+        project_data = UpdatePendingProjectRequest(**json.loads(training_job_db_record.training_job_data))
+        start_model_training(model_log_id, user_id, project_data, is_final_attempt)
+        error = None
+    except Exception as e:
+        error = (str(e) or type(e).__name__)[:TRAINING_JOB_ERROR_MAX_LENGTH]
+    finally:
+        stop_event.set()
+        heartbeat_thread.join()
+
+    training_job_status = finish_training_job(db, training_job_id, worker_id, attempts, error, is_final_attempt)
+    if training_job_status is None:
+        print("[TrainingQueue][NOTICE] Training Job Was Requeued While Running, Outcome Discarded:", training_job_name)
+        return
+    print("[TrainingQueue][SUCCESS] Training Job Finished:", training_job_name, training_job_status)
+    if training_job_status == "failed" and project_data is not None:
+        remove_model_training_files(model_log_id, user_id, project_data)
+
+def run_training_worker(worker_id):
+    """Worker process loop: recover stale jobs, claim the next job, train, repeat"""
+    print("[TrainingWorker][SUCCESS] Training Worker Started:", worker_id)
+    while True:
+        db = SessionLocal()
+        try:
+            requeue_stale_training_jobs(db)
+            training_job_db_record = claim_next_training_job(db, worker_id)
+            if training_job_db_record is None:
+                time.sleep(TRAINING_QUEUE_POLL_INTERVAL)
+                continue
+            run_training_job(db, training_job_db_record)
+        except Exception as e:
+            print("[TrainingWorker][ERROR] Training Worker Error:", str(e))
+            time.sleep(TRAINING_QUEUE_POLL_INTERVAL)
+        finally:
+            db.close()
+
+def start_training_workers(concurrency=TRAINING_WORKER_CONCURRENCY):
+    """Starts training worker processes (spawned, so they never inherit the API server's threads)"""
+    spawn_context = multiprocessing.get_context("spawn")
+    training_workers = []
+    for worker_index in range(concurrency):
+        worker_id = "{}:{}:{}".format(socket.gethostname(), os.getpid(), worker_index)
+        training_worker = spawn_context.Process(target=run_training_worker, args=(worker_id,), daemon=True)
+        training_worker.start()
+        training_workers.append(training_worker)
+    return training_workers
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run training worker processes for the training job queue")
+    parser.add_argument("--workers", type=int, default=TRAINING_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+    for training_worker in start_training_workers(args.workers):
+        training_worker.join()